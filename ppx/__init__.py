@@ -1,23 +1,65 @@
 """See the README for detailed documentation and examples."""
 
-try:
-    from importlib.metadata import PackageNotFoundError, version
-
-    try:
-        __version__ = version(__name__)
-    except PackageNotFoundError:
-        pass
-
-except ImportError:
-    from pkg_resources import DistributionNotFound, get_distribution
-
-    try:
-        __version__ = get_distribution(__name__).version
-    except DistributionNotFound:
-        pass
-
-from . import massive, pride
-from .config import get_data_dir, set_data_dir
-from .factory import find_project
-from .massive import MassiveProject
-from .pride import PrideProject
+import importlib
+
+# The public API and the version are resolved on first use, so that
+# "import ppx" does not load requests, tqdm, or cloudpathlib until they are
+# needed.
+_LAZY = {
+    "get_data_dir": "config",
+    "set_data_dir": "config",
+    "find_project": "factory",
+    "find_projects": "factory",
+    "MassiveProject": "massive",
+    "PrideProject": "pride",
+}
+
+_SUBMODULES = {
+    "aio",
+    "checksum",
+    "client",
+    "config",
+    "events",
+    "factory",
+    "ftp",
+    "httpcache",
+    "index",
+    "manifest",
+    "massive",
+    "pride",
+    "project",
+    "retry",
+    "stall",
+    "throttle",
+    "transport",
+    "upload",
+    "utils",
+}
+
+__all__ = list(_LAZY) + ["massive", "pride"]
+
+
+def __getattr__(name):
+    """Import the public API and submodules on first use."""
+    if name == "__version__":
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            value = version(__name__)
+        except PackageNotFoundError as err:
+            raise AttributeError(name) from err
+    elif name in _LAZY:
+        module = importlib.import_module(f".{_LAZY[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the public API."""
+    return sorted(set(globals()) | set(_LAZY) | _SUBMODULES)
@@ -0,0 +1,257 @@
+"""An asyncio facade for ppx.
+
+The coroutines in this module let metadata lookups and downloads be
+awaited from an event loop, but they do not transfer data asynchronously:
+each one runs the blocking HTTP and FTP calls of ppx in a worker thread,
+and the event loop only waits for the result. Calls on the same project
+run one at a time, while calls on different projects run in separate
+threads.
+
+This is a thread-backed facade, not a native asyncio transport. Each call
+occupies a thread from a dedicated pool while it runs, so the number of
+calls in progress at once is limited by the size of the pool. It is set
+with :py:func:`set_workers` or the PPX_AIO_WORKERS environment variable.
+Calls beyond that limit wait for a free thread.
+
+Examples
+--------
+>>> import asyncio
+>>> import ppx.aio
+>>> async def main(identifiers):
+...     projects = await asyncio.gather(
+...         *[ppx.aio.find_project(i) for i in identifiers]
+...     )
+...     return await asyncio.gather(*[p.remote_files() for p in projects])
+>>> asyncio.run(main(["PXD000001", "MSV000087408"]))  # doctest: +SKIP
+
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from . import factory
+from .config import config
+
+_EXECUTOR = None
+_WORKERS = None
+_LOCK = threading.Lock()
+
+
+def set_workers(workers=None):
+    """Set the number of threads that run the blocking calls.
+
+    Calls that are already running finish in the previous pool.
+
+    Parameters
+    ----------
+    workers : int, optional
+        The maximum number of calls to run at once. By default, this is
+        read from the PPX_AIO_WORKERS environment variable.
+
+    """
+    global _EXECUTOR, _WORKERS
+    with _LOCK:
+        old, _EXECUTOR = _EXECUTOR, None
+        _WORKERS = workers
+
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def executor():
+    """Get the thread pool that runs the blocking calls.
+
+    The pool is created on first use.
+
+    Returns
+    -------
+    concurrent.futures.ThreadPoolExecutor
+        The thread pool.
+
+    """
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            workers = config.aio_workers if _WORKERS is None else _WORKERS
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="ppx-aio"
+            )
+
+        return _EXECUTOR
+
+
+async def _to_thread(func, *args, **kwargs):
+    """Run a blocking call in the thread pool, like asyncio.to_thread()."""
+    loop = asyncio.get_running_loop()
+    call = partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(executor(), call)
+
+
+async def find_project(
+    identifier, local=None, repo=None, fetch=False, timeout=10.0
+):
+    """Find a project in the PRIDE or MassIVE repositories.
+
+    Parameters
+    ----------
+    identifier : str
+        The project identifier.
+    local :  str, pathlib.Path, or cloudpathlib.CloudPath, optional
+        The local data directory in which the project files will be
+        downloaded. In addition to local paths, paths to AWS S3,
+        Google Cloud Storage, or Azure Blob Storage can be used.
+        The default is :code:`~/.ppx`
+    repo : {"pride", "massive"}, optional
+        The repository in which to look for the project. If :code:`None`,
+        ppx will try to figure it out.
+    fetch : bool, optional
+        Should ppx check the remote repository for updated metadata?
+    timeout : float, optional
+        The maximum amount of time to wait for a server response
+
+    Returns
+    -------
+    AsyncProject
+        An object to interact with the project data in the repository.
+
+    """
+    proj = await _to_thread(
+        factory.find_project,
+        identifier,
+        local=local,
+        repo=repo,
+        fetch=fetch,
+        timeout=timeout,
+    )
+    return AsyncProject(proj)
+
+
+class AsyncProject:
+    """Await the methods of a PRIDE or MassIVE project.
+
+    Attributes that do not require network access, such as ``id`` and
+    ``local``, are read directly from the wrapped project.
+
+    Parameters
+    ----------
+    project : PrideProject or MassiveProject
+        The project to wrap.
+
+    Attributes
+    ----------
+    project : PrideProject or MassiveProject
+        The wrapped project.
+
+    """
+
+    def __init__(self, project):
+        """Initialize the AsyncProject"""
+        self.project = project
+        self._lock = asyncio.Lock()
+
+    def __getattr__(self, name):
+        """Get an attribute from the wrapped project."""
+        return getattr(self.project, name)
+
+    def __repr__(self):
+        """The representation of the AsyncProject"""
+        return f"AsyncProject({self.project.id!r})"
+
+    async def url(self):
+        """The FTP address associated with this project."""
+        return await self._run(getattr, self.project, "url")
+
+    async def metadata(self):
+        """The project metadata."""
+        return await self._run(getattr, self.project, "metadata")
+
+    async def remote_files(self, glob=None):
+        """List the project files in the remote repository.
+
+        Parameters
+        ----------
+        glob : str, optional
+            Use Unix wildcards to return specific files. For example,
+            :code:`"*.mzML"` would return all of the mzML files.
+
+        Returns
+        -------
+        list of str
+            The remote files available for this project.
+
+        """
+        return await self._run(self.project.remote_files, glob)
+
+    async def remote_dirs(self, glob=None):
+        """List the project directories in the remote repository.
+
+        Parameters
+        ----------
+        glob : str, optional
+            Use Unix wildcards to return specific files. For example,
+            :code:`"*peak"` would return all directories ending in "peak".
+
+        Returns
+        -------
+        list of str
+            The remote directories available for this project.
+
+        """
+        return await self._run(self.project.remote_dirs, glob)
+
+    async def checksums(self):
+        """The checksums that the repository provides for the project files.
+
+        Returns
+        -------
+        dict of str, tuple of (str, str)
+            The hash algorithm and hex digest, keyed by remote file.
+
+        """
+        return await self._run(self.project.checksums)
+
+    async def verify(self, files=None, workers=None):
+        """Verify local files against the repository checksums.
+
+        See :py:meth:`ppx.PrideProject.verify` for details.
+        """
+        return await self._run(self.project.verify, files, workers)
+
+    async def plan(self, files=None, force_=False):
+        """Preview a download, without transferring any files.
+
+        See :py:meth:`ppx.PrideProject.plan` for details.
+        """
+        return await self._run(self.project.plan, files, force_=force_)
+
+    async def download(
+        self, files, force_=False, silent=True, workers=1, verify=False
+    ):
+        """Download files from the remote repository.
+
+        Unlike the synchronous method, the progress bars are hidden by
+        default, since the bars for many concurrent projects would
+        overlap. See :py:meth:`ppx.PrideProject.download` for details.
+
+        Returns
+        -------
+        list of Path objects
+            The paths of the downloaded files.
+
+        """
+        return await self._run(
+            self.project.download,
+            files,
+            force_=force_,
+            silent=silent,
+            workers=workers,
+            verify=verify,
+        )
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking call on the project in a worker thread."""
+        async with self._lock:
+            return await _to_thread(func, *args, **kwargs)
@@ -0,0 +1,128 @@
+"""Verify files against the checksums provided by the repositories."""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+LOGGER = logging.getLogger(__name__)
+
+# The hash algorithms, by the length of their hex digests:
+ALGORITHMS = {32: "md5", 40: "sha1", 64: "sha256"}
+
+BLOCKSIZE = 2**20
+
+
+def parse_checksum(digest, algorithm=None):
+    """Create a checksum from a hex digest.
+
+    Parameters
+    ----------
+    digest : str
+        The hex digest.
+    algorithm : str, optional
+        The hash algorithm. By default, this is guessed from the length of
+        the digest.
+
+    Returns
+    -------
+    tuple of (str, str) or None
+        The algorithm and the lowercase digest, or None if the algorithm
+        could not be determined.
+
+    """
+    if not digest:
+        return None
+
+    digest = digest.strip().lower()
+    algorithm = ALGORITHMS.get(len(digest)) if algorithm is None else algorithm
+    if algorithm is None:
+        return None
+
+    return algorithm, digest
+
+
+def update_hash(hasher, fhandle, n_bytes=None):
+    """Hash the contents of an open file.
+
+    Parameters
+    ----------
+    hasher : hashlib hash object
+        The hash to update.
+    fhandle : file object
+        The file, opened for binary reading at the position to start from.
+    n_bytes : int, optional
+        The number of bytes to hash. By default, the rest of the file.
+
+    Returns
+    -------
+    hashlib hash object
+        The updated hash.
+
+    """
+    remaining = float("inf") if n_bytes is None else n_bytes
+    while remaining > 0:
+        data = fhandle.read(int(min(BLOCKSIZE, remaining)))
+        if not data:
+            break
+
+        hasher.update(data)
+        remaining -= len(data)
+
+    return hasher
+
+
+def hash_file(path, algorithm="sha1"):
+    """Calculate the hex digest of a file.
+
+    Parameters
+    ----------
+    path : pathlib.Path or cloudpathlib.CloudPath
+        The file to hash.
+    algorithm : str, optional
+        The hash algorithm.
+
+    Returns
+    -------
+    str
+        The hex digest.
+
+    """
+    with path.open("rb") as ref:
+        return update_hash(hashlib.new(algorithm), ref).hexdigest()
+
+
+def verify_files(checksums, workers=None):
+    """Verify local files against their checksums in parallel.
+
+    hashlib releases the GIL while hashing, so the files are hashed on
+    multiple cores using threads.
+
+    Parameters
+    ----------
+    checksums : dict of Path, tuple of (str, str)
+        The algorithm and expected hex digest for each local file.
+    workers : int, optional
+        The number of files to hash concurrently. By default, the number of
+        CPUs.
+
+    Returns
+    -------
+    dict of Path, bool or None
+        Whether each file matched its checksum, or None if the file does
+        not exist.
+
+    """
+    workers = os.cpu_count() if workers is None else workers
+
+    def verify(item):
+        """Verify a single file."""
+        path, (algorithm, digest) = item
+        if not path.exists():
+            return None
+
+        return hash_file(path, algorithm) == digest
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = pool.map(verify, checksums.items())
+        return dict(zip(checksums.keys(), results))
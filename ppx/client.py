@@ -0,0 +1,280 @@
+"""The HTTP client used for all of ppx's requests.
+
+All HTTP requests share a single :py:class:`Session`, which keeps
+connections to each host alive in a pool, retries failed requests with
+exponential backoff, and applies a default timeout. Metadata requests made
+with :py:func:`cached_get` are also stored in a persistent
+:py:class:`~ppx.httpcache.ResponseCache` and revalidated with conditional
+requests. In offline mode, responses are served only from the cache.
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import events
+from .config import config
+from .httpcache import ResponseCache
+from .throttle import limits
+
+LOGGER = logging.getLogger(__name__)
+
+# The HTTP status codes for which a request is retried:
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_SESSION = None
+_CACHE = None
+_LOCK = threading.Lock()
+
+
+class Session(requests.Session):
+    """A requests session with connection pooling, retries, and a timeout.
+
+    Requests that fail to connect, or that return a status code in
+    ``RETRY_STATUSES``, are retried with exponential backoff. The
+    ``Retry-After`` header is respected for 429 and 503 responses. Once
+    the retries are exhausted, the last response is returned. Requests are
+    also subject to the rate and connection limits in
+    ``ppx.throttle.limits``.
+
+    Parameters
+    ----------
+    pool_size : int, optional
+        The maximum number of connections to keep alive for each host.
+    retries : int, optional
+        The maximum number of times to retry a request.
+    backoff : float, optional
+        The backoff factor, in seconds. The nth retry waits
+        ``backoff * 2 ** (n - 1)`` seconds.
+    timeout : float, optional
+        The timeout, in seconds, for requests that do not specify one.
+
+    """
+
+    def __init__(self, pool_size=10, retries=5, backoff=0.5, timeout=10.0):
+        """Initialize the Session"""
+        super().__init__()
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """Send a request, applying the default timeout and the limits.
+
+        An "http_request" event is emitted for each request; see
+        :py:mod:`ppx.events`.
+        """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+
+        host = urlsplit(url).hostname
+        with limits.connection(host):
+            started = time.monotonic()
+            res = super().request(method, url, **kwargs)
+            n_bytes = None
+            if not kwargs.get("stream"):
+                n_bytes = len(res.content)
+                limits.throttle(host, n_bytes)
+
+        retries = getattr(getattr(res.raw, "retries", None), "history", ())
+        events.emit(
+            "http_request",
+            host=host,
+            method=method,
+            url=res.url,
+            status=res.status_code,
+            n_bytes=n_bytes,
+            seconds=time.monotonic() - started,
+            retries=len(retries),
+        )
+        return res
+
+
+def session():
+    """Get the shared HTTP session.
+
+    The session is created on first use, with the settings in the ppx
+    configuration.
+
+    Returns
+    -------
+    Session
+        The shared session.
+
+    """
+    global _SESSION
+    with _LOCK:
+        if _SESSION is None:
+            _SESSION = Session(
+                pool_size=config.http_pool_size,
+                retries=config.http_retries,
+                backoff=config.http_backoff,
+                timeout=config.http_timeout,
+            )
+
+        return _SESSION
+
+
+def cache():
+    """Get the shared HTTP response cache.
+
+    The cache is opened on first use, with the settings in the ppx
+    configuration.
+
+    Returns
+    -------
+    ResponseCache
+        The shared cache.
+
+    """
+    global _CACHE
+    with _LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache(
+                config.http_cache_dir,
+                max_size=config.http_cache_size,
+            )
+
+        return _CACHE
+
+
+def reset():
+    """Close the shared HTTP session and response cache.
+
+    They are created again with the current settings when they are next
+    used.
+    """
+    global _SESSION, _CACHE
+    with _LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+
+        if _CACHE is not None:
+            _CACHE.close()
+
+        _SESSION = None
+        _CACHE = None
+
+
+def get(url, **kwargs):
+    """Send a GET request with the shared session.
+
+    Parameters
+    ----------
+    url : str
+        The URL.
+    **kwargs : dict
+        Keyword arguments for :py:meth:`requests.Session.get`.
+
+    Returns
+    -------
+    requests.Response
+        The response.
+
+    """
+    _check_online(url)
+    return session().get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    """Send a HEAD request with the shared session.
+
+    Parameters
+    ----------
+    url : str
+        The URL.
+    **kwargs : dict
+        Keyword arguments for :py:meth:`requests.Session.head`.
+
+    Returns
+    -------
+    requests.Response
+        The response.
+
+    """
+    _check_online(url)
+    return session().head(url, **kwargs)
+
+
+def cached_get(url, params=None, http_session=None, **kwargs):
+    """Send a GET request, using the response cache.
+
+    A cached response is revalidated with a conditional request, so an
+    unchanged response costs only a "304 Not Modified". If the server
+    cannot be reached, or ppx is offline, the cached response is used.
+
+    Parameters
+    ----------
+    url : str
+        The URL.
+    params : dict, optional
+        The query parameters.
+    http_session : requests.Session, optional
+        The session to use, instead of the shared session.
+    **kwargs : dict
+        Keyword arguments for :py:meth:`requests.Session.get`.
+
+    Returns
+    -------
+    requests.Response
+        The response.
+
+    """
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    responses = cache()
+    if config.offline:
+        res = responses.load(full_url)
+        if res is None:
+            _check_online(full_url)
+
+        return res
+
+    headers = {**kwargs.pop("headers", {}), **responses.validators(full_url)}
+    if http_session is None:
+        http_session = session()
+
+    try:
+        res = http_session.get(url, params=params, headers=headers, **kwargs)
+    except requests.ConnectionError:
+        res = responses.load(full_url)
+        if res is None:
+            raise
+
+        LOGGER.warning("Unable to connect; using cached %s", full_url)
+        return res
+
+    if res.status_code == 304:
+        cached = responses.load(full_url)
+        if cached is not None:
+            return cached
+
+    elif res.status_code == 200:
+        responses.store(full_url, res)
+
+    return res
+
+
+def _check_online(url):
+    """Raise an error if ppx is offline."""
+    if config.offline:
+        raise requests.ConnectionError(
+            f"ppx is offline and {url} is not cached."
+        )
@@ -2,9 +2,7 @@
 
 import logging
 import os
-from pathlib import Path
-
-from cloudpathlib import AnyPath
+from pathlib import Path, PurePath
 
 LOGGER = logging.getLogger(__name__)
 
@@ -15,17 +13,117 @@ class PPXConfig:
     Attributes
     ----------
     path : pathlib.Path object
+    listing_ttl : float
+        The number of seconds for which cached remote file listings are used
+        without checking the remote repository, even when fetching. Set with
+        the PPX_LISTING_TTL environment variable.
+    url_ttl : float
+        The number of seconds for which resolved project URLs are cached.
+        Set with the PPX_URL_TTL environment variable.
+    http_pool_size : int
+        The maximum number of HTTP connections to keep alive for each host.
+        Set with the PPX_HTTP_POOL_SIZE environment variable.
+    http_retries : int
+        The maximum number of times to retry a failed HTTP request. Set with
+        the PPX_HTTP_RETRIES environment variable.
+    http_backoff : float
+        The backoff factor, in seconds, between HTTP retries. Set with the
+        PPX_HTTP_BACKOFF environment variable.
+    http_timeout : float
+        The default timeout, in seconds, for HTTP requests. Set with the
+        PPX_HTTP_TIMEOUT environment variable.
+    http_cache_dir : pathlib.Path
+        The local directory in which HTTP responses are cached. By default,
+        this is ".http-cache" in the ppx data directory, or
+        "~/.cache/ppx" if the data directory is in cloud storage. Set with
+        the PPX_HTTP_CACHE_DIR environment variable.
+    http_cache_size : int
+        The maximum size of the HTTP response cache, in bytes. Set with the
+        PPX_HTTP_CACHE_SIZE environment variable.
+    offline : bool
+        Serve HTTP responses only from the cache, without contacting any
+        server. Set the PPX_OFFLINE environment variable to "1" to enable.
+    limit_rate : str or None
+        The maximum total transfer rate in bytes per second, such as "10M".
+        Set with the PPX_LIMIT_RATE environment variable.
+    max_connections : int or None
+        The maximum number of concurrent transfers from each host. Set with
+        the PPX_MAX_CONNECTIONS environment variable.
+    ftp_backoff : float
+        The backoff factor, in seconds, between FTP retries. Set with the
+        PPX_FTP_BACKOFF environment variable.
+    circuit_threshold : int
+        The number of consecutive failures after which an FTP server is not
+        contacted until the cooldown has passed. 0 disables this. Set with
+        the PPX_CIRCUIT_THRESHOLD environment variable.
+    circuit_cooldown : float
+        The number of seconds to wait before contacting an FTP server again
+        after too many failures. Set with the PPX_CIRCUIT_COOLDOWN
+        environment variable.
+    stall_rate : str
+        The minimum rate of an FTP transfer, in bytes per second, such as
+        "1k". Slower transfers are aborted and resumed. Set with the
+        PPX_STALL_RATE environment variable.
+    stall_window : float
+        The number of seconds over which the rate of a transfer is measured
+        to detect a stall. Set with the PPX_STALL_WINDOW environment
+        variable.
+    transport : str
+        How PRIDE files are transferred: "auto" benchmarks FTP and HTTPS and
+        uses the fastest, "https" prefers HTTPS, and "ftp" uses only FTP.
+        Set with the PPX_TRANSPORT environment variable.
+    aio_workers : int
+        The maximum number of blocking calls that ``ppx.aio`` runs at once.
+        Set with the PPX_AIO_WORKERS environment variable.
 
     """
 
     def __init__(self):
         """Initialize the _PPXDataDir"""
-        self._path = None
-        self.path = os.getenv("PPX_DATA_DIR")
+        self._path = None  # Resolved on first use.
+        self.listing_ttl = float(os.getenv("PPX_LISTING_TTL", "0"))
+        self.url_ttl = float(os.getenv("PPX_URL_TTL", 7 * 24 * 60 * 60))
+        self.http_pool_size = int(os.getenv("PPX_HTTP_POOL_SIZE", "10"))
+        self.http_retries = int(os.getenv("PPX_HTTP_RETRIES", "5"))
+        self.http_backoff = float(os.getenv("PPX_HTTP_BACKOFF", "0.5"))
+        self.http_timeout = float(os.getenv("PPX_HTTP_TIMEOUT", "10"))
+        self._http_cache_dir = os.getenv("PPX_HTTP_CACHE_DIR")
+        self.http_cache_size = int(os.getenv("PPX_HTTP_CACHE_SIZE", 2**28))
+        self.offline = os.getenv("PPX_OFFLINE", "0") not in ("", "0")
+        self.limit_rate = os.getenv("PPX_LIMIT_RATE") or None
+        self.max_connections = (
+            int(os.getenv("PPX_MAX_CONNECTIONS", "0")) or None
+        )
+        self.ftp_backoff = float(os.getenv("PPX_FTP_BACKOFF", "0.5"))
+        self.circuit_threshold = int(os.getenv("PPX_CIRCUIT_THRESHOLD", "20"))
+        self.circuit_cooldown = float(os.getenv("PPX_CIRCUIT_COOLDOWN", "60"))
+        self.stall_rate = os.getenv("PPX_STALL_RATE", "1k")
+        self.stall_window = float(os.getenv("PPX_STALL_WINDOW", "30"))
+        self.transport = os.getenv("PPX_TRANSPORT", "auto")
+        self.aio_workers = int(os.getenv("PPX_AIO_WORKERS", "64"))
+
+    @property
+    def http_cache_dir(self):
+        """The local directory in which HTTP responses are cached."""
+        if self._http_cache_dir is not None:
+            return Path(self._http_cache_dir).expanduser()
+
+        if isinstance(self.path, Path):
+            return self.path / ".http-cache"
+
+        return Path.home() / ".cache" / "ppx"
+
+    @http_cache_dir.setter
+    def http_cache_dir(self, path):
+        """Set the HTTP cache directory."""
+        self._http_cache_dir = path
 
     @property
     def path(self):
         """The current ppx data directory."""
+        if self._path is None:
+            self.path = None
+
         return self._path
 
     @path.setter
@@ -65,7 +163,7 @@ class PPXConfig:
             The resolved path.
 
         """
-        path = AnyPath(path)
+        path = any_path(path)
         try:
             path = path.expanduser().resolve()
         except AttributeError:
@@ -74,6 +172,34 @@ class PPXConfig:
         return path
 
 
+def any_path(path):
+    """Create a local or cloud path.
+
+    This is :py:class:`cloudpathlib.AnyPath`, except that cloudpathlib and
+    its cloud storage SDKs are only imported for cloud paths.
+
+    Parameters
+    ----------
+    path : str, pathlib.Path, or cloudpathlib.CloudPath
+        The path.
+
+    Returns
+    -------
+    pathlib.Path or cloudpathlib.CloudPath
+        The path object.
+
+    """
+    if isinstance(path, PurePath):
+        return Path(path)
+
+    if isinstance(path, str) and "://" not in path:
+        return Path(path)
+
+    from cloudpathlib import AnyPath
+
+    return AnyPath(path)
+
+
 def get_data_dir():
     """Retrieve the current data directory for ppx."""
     return config.path
@@ -0,0 +1,255 @@
+"""Instrumentation events for transfers.
+
+ppx emits an :py:class:`Event` at each notable point of a transfer, such as
+connecting to a server, receiving the first byte of a file, reconnecting
+after an error, or completing an HTTP request. Register a callback with
+:py:func:`subscribe` to receive them. Events are emitted from the thread
+doing the work, so callbacks should be quick and thread-safe. An error
+raised by a callback is logged and does not interrupt the transfer. When
+nothing is subscribed, emitting an event costs almost nothing.
+
+Two subscribers are provided: :py:class:`JSONLinesExporter` writes every
+event to a file as it happens, and :py:class:`MetricsCollector` aggregates
+the events for each host and exports them in the OpenMetrics text format.
+
+The events and their fields are:
+
+``connect``
+    A new FTP connection was opened: ``host``, ``seconds``.
+``login``
+    An FTP login completed: ``host``, ``seconds``.
+``first_byte``
+    The first data of an FTP or HTTP transfer arrived: ``host``, ``file``,
+    ``seconds`` since the transfer was requested.
+``transfer``
+    An FTP or HTTP transfer finished: ``host``, ``file``, ``n_bytes``,
+    ``seconds``.
+``reconnect``
+    An FTP operation failed and will be retried: ``host``, ``attempt``,
+    ``error``, and the ``delay`` in seconds before the retry.
+``circuit_open``
+    An FTP server failed too many times in a row and will not be contacted
+    until the cooldown has passed: ``host``, ``failures``.
+``probe``
+    An endpoint was benchmarked before the first transfer: ``url``,
+    ``file``, ``n_bytes``, ``seconds``, and the ``error``, if it failed.
+``failover``
+    Transfers switched to another endpoint: ``url``, and the ``previous``
+    endpoint.
+``file``
+    The download of a file finished: ``host``, ``file``, ``status``,
+    ``seconds``.
+``http_request``
+    An HTTP request completed: ``host``, ``method``, ``url``, ``status``,
+    ``n_bytes``, ``seconds``, ``retries``.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+Event = namedtuple("Event", ["name", "time", "fields"])
+Event.__doc__ = """An instrumentation event.
+
+Parameters
+----------
+name : str
+    The type of event, such as "transfer".
+time : float
+    When the event occurred, in seconds since the epoch.
+fields : dict
+    The details of the event, such as the ``host`` and ``seconds``.
+"""
+
+LOGGER = logging.getLogger(__name__)
+
+_SUBSCRIBERS = ()
+_LOCK = threading.Lock()
+
+
+def subscribe(callback):
+    """Receive events.
+
+    Parameters
+    ----------
+    callback : callable
+        A function that is called with each :py:class:`Event`.
+
+    Returns
+    -------
+    callable
+        The callback, so this can be used as a decorator.
+
+    """
+    global _SUBSCRIBERS
+    with _LOCK:
+        _SUBSCRIBERS = (*_SUBSCRIBERS, callback)
+
+    return callback
+
+
+def unsubscribe(callback):
+    """Stop receiving events.
+
+    Parameters
+    ----------
+    callback : callable
+        A callback previously passed to :py:func:`subscribe`.
+
+    """
+    global _SUBSCRIBERS
+    with _LOCK:
+        _SUBSCRIBERS = tuple(s for s in _SUBSCRIBERS if s != callback)
+
+
+def emit(name, **fields):
+    """Send an event to the subscribers.
+
+    Parameters
+    ----------
+    name : str
+        The type of event.
+    **fields : dict
+        The details of the event.
+
+    """
+    subscribers = _SUBSCRIBERS
+    if not subscribers:
+        return
+
+    event = Event(name, time.time(), fields)
+    for callback in subscribers:
+        try:
+            callback(event)
+        except Exception:
+            LOGGER.exception("Event subscriber %r failed.", callback)
+
+
+class JSONLinesExporter:
+    """Write events to a file, one JSON object per line.
+
+    Each line has the ``event`` name, its ``time``, and its fields. Lines
+    are written as events occur, so the file can be followed while a
+    download is running.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The file to append the events to.
+
+    """
+
+    def __init__(self, path):
+        """Initialize the JSONLinesExporter"""
+        self.path = path
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """Write an event."""
+        line = json.dumps(
+            {"event": event.name, "time": event.time, **event.fields},
+            default=str,
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        """Close the file."""
+        with self._lock:
+            self._file.close()
+
+
+class MetricsCollector:
+    """Aggregate events for each host.
+
+    For each type of event and host, the collector counts the events and
+    sums their ``seconds`` and ``n_bytes`` fields.
+    """
+
+    def __init__(self):
+        """Initialize the MetricsCollector"""
+        self._metrics = defaultdict(lambda: [0, 0.0, 0])
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """Add an event."""
+        key = (event.name, event.fields.get("host") or "")
+        with self._lock:
+            metric = self._metrics[key]
+            metric[0] += 1
+            metric[1] += event.fields.get("seconds") or 0.0
+            metric[2] += event.fields.get("n_bytes") or 0
+
+    def totals(self):
+        """The aggregated events.
+
+        Returns
+        -------
+        dict of tuple of (str, str), tuple of (int, float, int)
+            The number of events, total seconds, and total bytes, keyed by
+            the event name and host.
+
+        """
+        with self._lock:
+            return {k: tuple(v) for k, v in self._metrics.items()}
+
+    def throughput(self):
+        """The FTP transfer throughput from each host.
+
+        Returns
+        -------
+        dict of str, float
+            The bytes per second received from each host.
+
+        """
+        return {
+            host: n_bytes / seconds
+            for (name, host), (_, seconds, n_bytes) in self.totals().items()
+            if name == "transfer" and seconds > 0
+        }
+
+    def openmetrics(self):
+        """Export the metrics in the OpenMetrics text format.
+
+        Each type of event becomes a counter of events, a summary of their
+        duration, and a counter of bytes, labeled by host.
+
+        Returns
+        -------
+        str
+            The metrics.
+
+        """
+        by_name = defaultdict(list)
+        for (name, host), metric in sorted(self.totals().items()):
+            by_name[name].append((json.dumps(host), *metric))
+
+        lines = []
+        for name, metrics in by_name.items():
+            prefix = f"ppx_{name}"
+            lines.append(f"# TYPE {prefix} counter")
+            lines += [
+                f"{prefix}_total{{host={h}}} {n}" for h, n, _, _ in metrics
+            ]
+            if any(s for _, _, s, _ in metrics):
+                lines.append(f"# TYPE {prefix}_seconds summary")
+                lines.append(f"# UNIT {prefix}_seconds seconds")
+                for host, count, seconds, _ in metrics:
+                    labels = f"{{host={host}}}"
+                    lines.append(f"{prefix}_seconds_count{labels} {count}")
+                    lines.append(f"{prefix}_seconds_sum{labels} {seconds}")
+
+            if any(b for _, _, _, b in metrics):
+                lines.append(f"# TYPE {prefix}_bytes counter")
+                lines.append(f"# UNIT {prefix}_bytes bytes")
+                lines += [
+                    f"{prefix}_bytes_total{{host={h}}} {b}"
+                    for h, _, _, b in metrics
+                ]
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
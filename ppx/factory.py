@@ -5,10 +5,13 @@ This is the foundation of the ppx package.
 
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 
 import requests
 
+from . import client
+from .config import any_path, config
 from .massive import MassiveProject
 from .pride import PrideProject
 
@@ -30,6 +33,8 @@ class PXDFactory:
         Should ppx check the remote repository for updated metadata?
     timeout : float, optional
         The maximum amount of time to wait for a server response.
+    session : requests.Session, optional
+        The session with which to query ProteomeXchange.
 
     """
 
@@ -47,7 +52,14 @@ class PXDFactory:
         "massive-ftp.ucsd.edu": "MassIVE",
     }
 
-    def __init__(self, pxid, local=None, fetch=False, timeout=10.0):
+    def __init__(
+        self,
+        pxid,
+        local=None,
+        fetch=False,
+        timeout=10.0,
+        session=None,
+    ):
         """Instantiate a PXDataset"""
         self._id = self._validate_id(pxid)
         self._local = local
@@ -55,13 +67,7 @@ class PXDFactory:
         self._timeout = timeout
 
         # Retrieve the data:
-        params = {"ID": self.id, "outputMode": "JSON", "test": "no"}
-        res = requests.get(self.rest, params=params, timeout=self._timeout)
-        if res.status_code != 200:
-            raise requests.HTTPError(f"Error {res.status_code}: {res.text}")
-
-        self._url = res.url
-        self._data = res.json()
+        self._url, self._data = self._get(session)
 
         # Determine the partner repository
         self._repo, self._repo_id = self._resolve_repo()
@@ -77,6 +83,34 @@ class PXDFactory:
         """The ProteomeXchange project identifier"""
         return self._id
 
+    def _get(self, session=None):
+        """Query ProteomeXchange for the dataset.
+
+        Parameters
+        ----------
+        session : requests.Session, optional
+            The session to use.
+
+        Returns
+        -------
+        url : str
+            The URL that was queried.
+        data : dict
+            The JSON response.
+
+        """
+        params = {"ID": self.id, "outputMode": "JSON", "test": "no"}
+        res = client.cached_get(
+            self.rest,
+            params=params,
+            http_session=session,
+            timeout=self._timeout,
+        )
+        if res.status_code != 200:
+            raise requests.HTTPError(f"Error {res.status_code}: {res.text}")
+
+        return res.url, res.json()
+
     def find(self):
         """Find the dataset at the partner repository"""
         kwargs = {
@@ -159,13 +193,119 @@ def find_project(identifier, local=None, repo=None, fetch=False, timeout=10.0):
     :py:class:`~ppx.PrideProject` or :py:class:`~ppx.MassiveProject`
         An object to interact with the project data in the repository.
 
+    """
+    kwargs = {"local": local, "fetch": fetch, "timeout": timeout}
+    return _find(identifier, repo, kwargs)
+
+
+def find_projects(
+    identifiers, local=None, repo=None, fetch=False, timeout=10.0, workers=8
+):
+    """Find many projects in the PRIDE or MassIVE repositories.
+
+    The projects are resolved concurrently, using a shared pool of HTTP
+    connections. Duplicate identifiers are only resolved once, and the
+    ProteomeXchange responses are kept in the HTTP response cache.
+
+    Parameters
+    ----------
+    identifiers : iterable of str
+        The project identifiers.
+    local :  str, pathlib.Path, or cloudpathlib.CloudPath, optional
+        The directory in which to create a local data directory for each
+        project, named after its identifier. By default, each project uses
+        the same local data directory as :py:func:`find_project`.
+    repo : {"pride", "massive"}, optional
+        The repository in which to look for the projects. If :code:`None`,
+        ppx will try to figure it out.
+    fetch : bool, optional
+        Should ppx check the remote repository for updated metadata?
+    timeout : float, optional
+        The maximum amount of time to wait for a server response
+    workers : int, optional
+        The number of projects to resolve concurrently.
+
+    Yields
+    ------
+    identifier : str
+        The project identifier, as it was provided. Identifiers that differ
+        only by case are resolved once and yielded together.
+    project : PrideProject, MassiveProject, or Exception
+        An object to interact with the project data in the repository, or
+        the exception raised while trying to find it. Projects are yielded
+        as they are found, not in the order that they were provided.
+
+    """
+    # Identifiers are case-insensitive:
+    groups = {}
+    for identifier in identifiers:
+        groups.setdefault(str(identifier).upper(), []).append(identifier)
+
+    base = None
+    if local is not None:
+        base = any_path(local)
+        base.mkdir(parents=True, exist_ok=True)
+
+    workers = max(1, min(int(workers), len(groups)))
+
+    session = client.Session(
+        pool_size=workers,
+        retries=config.http_retries,
+        backoff=config.http_backoff,
+        timeout=timeout,
+    )
+
+    def find(identifier):
+        """Find one project."""
+        kwargs = {
+            "local": None if base is None else base / identifier,
+            "fetch": fetch,
+            "timeout": timeout,
+        }
+        return _find(identifier, repo, kwargs, session)
+
+    with session:
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {pool.submit(find, i): i for i in groups}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as err:
+                    result = err
+
+                for identifier in groups[futures[future]]:
+                    yield identifier, result
+        finally:
+            # Don't wait for queued lookups if the caller stops early:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _find(identifier, repo, kwargs, session=None):
+    """Find a project in the PRIDE or MassIVE repositories.
+
+    Parameters
+    ----------
+    identifier : str
+        The project identifier.
+    repo : str or None
+        The repository in which to look for the project.
+    kwargs : dict
+        Keyword arguments for the project.
+    session : requests.Session, optional
+        The session with which to query ProteomeXchange.
+
+    Returns
+    -------
+    :py:class:`~ppx.PrideProject` or :py:class:`~ppx.MassiveProject`
+        An object to interact with the project data in the repository.
+
     """
     identifier = str(identifier).upper()
     if repo is not None:
         repo = str(repo).lower()
 
     # User-specified:
-    kwargs = {"local": local, "fetch": fetch, "timeout": timeout}
     if repo == "pride":
         return PrideProject(identifier, **kwargs)
 
@@ -181,7 +321,8 @@ def find_project(identifier, local=None, repo=None, fetch=False, timeout=10.0):
 
     if re.match("P[XR]D", identifier):
         try:
-            return PXDFactory(identifier, **kwargs).find()
+            factory = PXDFactory(identifier, session=session, **kwargs)
+            return factory.find()
         except requests.HTTPError:
             return PrideProject(identifier, **kwargs)
 
@@ -1,15 +1,30 @@
 """General utilities for working with the repository FTP sites."""
 
+import atexit
+import copy
+import hashlib
+import json
 import logging
+import posixpath
+import queue
 import re
-import socket
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from ftplib import FTP, error_perm, error_temp
 from functools import partial
-
-from cloudpathlib import CloudPath
-from cloudpathlib.exceptions import OverwriteNewerCloudError
-from tqdm.auto import tqdm
-
+from pathlib import PurePath
+from urllib.parse import urlsplit
+
+from . import events
+from .checksum import hash_file, update_hash
+from .config import config
+from .manifest import DONE, DOWNLOADING, FAILED
+from .retry import RetryPolicy, breaker
+from .stall import StallDetector, StallError, stats
+from .throttle import limits, parse_rate
 from .utils import listify
 
 LOGGER = logging.getLogger(__name__)
@@ -34,6 +49,30 @@ UNIX_TIME = re.compile(
     "\\s+([:\\d]{4,5})$"  # time of day or year
 )
 
+# The version of the listing cache format:
+CACHE_VERSION = 1
+
+# The FTP reply codes for unsupported commands:
+UNSUPPORTED = ("500", "501", "502", "504")
+
+# The smallest transfer, in bytes, whose throughput is recorded:
+MIN_MEASURED = 2**16
+
+RemoteEntry = namedtuple("RemoteEntry", ["name", "type", "size", "modify"])
+RemoteEntry.__doc__ = """A file or directory on the FTP server.
+
+Attributes
+----------
+name : str
+    The name of the file or directory.
+type : {"file", "dir"}
+    The type of entry.
+size : int or None
+    The size of a file in bytes.
+modify : datetime.datetime or None
+    The time that the entry was last modified, in UTC.
+"""
+
 
 # Classes ---------------------------------------------------------------------
 class FTPParser:
@@ -49,76 +88,202 @@ class FTPParser:
     max_depth : int, optional
         The maximum resursion depth when looking for files.
     max_reconnects : int, optional
-        The maximum number of reconnects to attempt during downloads.
+        The maximum number of attempts for each FTP operation, when a
+        ``retry`` policy is not provided.
     timeout : float, optional
         The maximum amount of time to wait for a response from the server.
+    blocksize : int, optional
+        The maximum number of bytes to read from the data connection at once.
+    buffer_size : int, optional
+        The number of bytes to collect before writing them to the file.
+    segments : int, optional
+        The number of byte ranges to download concurrently, each over its own
+        FTP session, for files larger than ``segment_threshold``.
+    segment_threshold : int, optional
+        The minimum file size, in bytes, for a segmented download.
+    list_workers : int, optional
+        The number of FTP sessions used to list directories concurrently.
+    cache_file : pathlib.Path or cloudpathlib.CloudPath, optional
+        A JSON file in which to cache directory listings. When the files are
+        listed again, only directories whose modification time has changed
+        are listed from the server.
+    cache_ttl : float, optional
+        The number of seconds for which the listing cache is used without
+        checking the server at all.
+    part_size : int, optional
+        The size, in bytes, of each part uploaded when streaming a file into
+        cloud storage.
+    upload_workers : int, optional
+        The number of parts of a file uploaded concurrently to cloud storage.
+    retry : ppx.retry.RetryPolicy, optional
+        When and after how long failed operations are retried. By default,
+        transient errors are retried up to ``max_reconnects`` times with
+        exponential backoff.
+    stall_rate : int, float, or str, optional
+        The minimum rate of a transfer in bytes per second, such as ``"1k"``.
+        A slower transfer is aborted and resumed. By default, this is read
+        from the PPX_STALL_RATE environment variable. 0 disables stall
+        detection.
+    stall_window : float, optional
+        The number of seconds over which the rate of a transfer is measured.
+        By default, this is read from the PPX_STALL_WINDOW environment
+        variable.
+    mirrors : ppx.transport.Mirrors, optional
+        Endpoints that serve the same files over HTTP(S). Files are
+        transferred from the fastest endpoint, failing over to the others.
+        By default, only FTP is used.
+
+    Notes
+    -----
+    The ``timeout`` applies to the control connection. The timeout for
+    data connections adapts to the round-trip times observed for the
+    server, up to ``timeout``; see :py:mod:`ppx.stall`.
 
     """
 
-    def __init__(self, url, max_depth=4, max_reconnects=10, timeout=10.0):
+    def __init__(
+        self,
+        url,
+        max_depth=4,
+        max_reconnects=10,
+        timeout=10.0,
+        blocksize=2**18,
+        buffer_size=2**22,
+        segments=4,
+        segment_threshold=2**30,
+        list_workers=4,
+        cache_file=None,
+        cache_ttl=0.0,
+        part_size=2**25,
+        upload_workers=4,
+        retry=None,
+        stall_rate=None,
+        stall_window=None,
+        mirrors=None,
+    ):
         """Initialize an FTPParser"""
         if not url.startswith("ftp://"):
             raise ValueError("The URL does not appear to be an FTP server")
 
         self.server, self.path = url.replace("ftp://", "").split("/", 1)
         self.connection = None
+        self._slot = 1
         self.max_depth = max_depth
         self.max_reconnects = max_reconnects
         self.timeout = timeout
+        self.blocksize = blocksize
+        self.buffer_size = buffer_size
+        self.segments = segments
+        self.segment_threshold = segment_threshold
+        self.list_workers = list_workers
+        self.cache_file = cache_file
+        self.cache_ttl = cache_ttl
+        self.part_size = part_size
+        self.upload_workers = upload_workers
+        self.retry = retry
+        if stall_rate is None:
+            stall_rate = config.stall_rate
+
+        if stall_window is None:
+            stall_window = config.stall_window
+
+        self.stall_rate = parse_rate(stall_rate)
+        self.stall_window = stall_window
+        self.mirrors = mirrors
+        self._crawl_start = None
         self._files = None
         self._dirs = None
-        self._depth = 0
+        self._entries = {}
+        self._features = {}  # Shared with clones.
+
+    @property
+    def host(self):
+        """The hostname of the FTP server."""
+        return urlsplit(f"ftp://{self.server}").hostname
 
     def _connect(self, path=None):
-        """Connect to the FTP server"""
+        """Borrow a connection to the FTP server from the pool."""
+        path = self.path if path is None else path
         if self.connection is not None and self.connection.file is None:
-            self.connection.close()
-            self.connection = None
+            self._drop()
 
         if self.connection is None:
-            self.connection = FTP(timeout=self.timeout)
-            self.connection.connect(self.server)
-            self.connection.login()
-            self.connection.cwd(self.path if path is None else path)
+            self.connection = connections.acquire(
+                self.server, path, self.timeout
+            )
+        elif not connections.in_dir(self.connection, path):
+            connections.chdir(self.connection, path)
 
     def connect(self, path=None):
         """Connect to the FTP server, with reconnects on failure."""
         self._with_reconnects(self._connect, path=path)
 
     def quit(self):
-        """Close the connection."""
+        """Return the connection to the pool."""
         if self.connection is not None:
-            self.connection.close()
+            connections.release(self.connection)
+            self.connection = None
+
+    def _drop(self):
+        """Close the connection, instead of returning it to the pool."""
+        if self.connection is not None:
+            connections.discard(self.connection)
             self.connection = None
 
     def _with_reconnects(self, func, *args, **kwargs):
-        """Try and execute a function, reconnecting on failure."""
+        """Try and execute a function, reconnecting on failure.
+
+        Transient errors are retried after a jittered, exponentially
+        increasing delay, while permanent errors, such as a missing file,
+        are raised immediately. Transient errors also count towards the
+        circuit breaker for the host (``ppx.retry.breaker``). Transfers
+        resume from the data already received, so a retry never downloads
+        the same bytes twice.
+        """
         path = kwargs.get("path", None)
-        for _ in range(self.max_reconnects):
+        policy = self.retry
+        if policy is None:
+            policy = RetryPolicy(self.max_reconnects, config.ftp_backoff)
+
+        for attempt in range(1, policy.attempts + 1):
+            breaker.check(self.host)
             try:
                 self._connect(path)
-                return func(*args, **kwargs)
-
-            except (
-                TimeoutError,
-                ConnectionRefusedError,
-                ConnectionResetError,
-                socket.gaierror,
-                socket.herror,
-                error_temp,
-                error_perm,
-                EOFError,
-                OSError,
-            ) as err:
-                self.quit()
+                result = func(*args, **kwargs)
+            except Exception as err:
+                self._drop()
+                if not policy.is_transient(err):
+                    raise
+
                 last_err = err
+                breaker.failure(self.host)
+                if isinstance(err, StallError):
+                    stats.observe_stall(self.host)
+                delay = 0.0
+                if attempt < policy.attempts:
+                    delay = policy.delay(attempt)
+
+                events.emit(
+                    "reconnect",
+                    host=self.host,
+                    attempt=attempt,
+                    error=repr(err),
+                    delay=delay,
+                )
+                time.sleep(delay)
+                continue
+
+            breaker.success(self.host)
+            return result
 
         raise error_temp(
-            f"Failed after {self.max_reconnects} reconnect(s), "
+            f"Failed after {policy.attempts} reconnect(s), "
             f"the last error was: {last_err}"
         )
 
-    def _download_file(self, remote_file, out_file, force_, silent):
+    def _download_file(
+        self, remote_file, out_file, force_, silent, checksum=None
+    ):
         """Download a single file.
 
         This wraps the ftplib.FTP.retrbinary to enable reconnects. It also
@@ -134,21 +299,155 @@ class FTPParser:
             Disable the progress bar?
         force_ : bool
             Force the file to be redownloaded, even if it exists.
+        checksum : tuple of (str, str), optional
+            The hash algorithm and expected hex digest of the file. A file
+            that does not match is downloaded again from scratch once, before
+            a ValueError is raised.
+
+        """
+        for attempt in range(2):
+            digest = self._fetch_file(
+                remote_file,
+                out_file,
+                force_=force_ or attempt > 0,
+                silent=silent,
+                checksum=checksum,
+            )
+
+            if checksum is None or digest == checksum[1]:
+                return
+
+            LOGGER.warning("%s did not match its checksum.", out_file)
+
+        raise ValueError(
+            f"The {checksum[0]} checksum of {out_file} ({digest}) did not "
+            f"match the expected checksum ({checksum[1]})."
+        )
+
+    def _download_tracked(
+        self, remote_file, out_file, force_, silent, checksum, manifest
+    ):
+        """Download a single file, recording its state in a manifest.
+
+        Parameters
+        ----------
+        remote_file : str
+            The file to download.
+        out_file : pathlib.Path object
+            The local file.
+        force_ : bool
+            Force the file to be redownloaded, even if it exists.
+        silent : bool
+            Disable the progress bar?
+        checksum : tuple of (str, str) or None
+            The hash algorithm and expected hex digest of the file.
+        manifest : Manifest or None
+            The manifest in which to record the state of the file, and the
+            throughput of the transfer.
+
+        """
+        if manifest is None:
+            self._download_timed(
+                remote_file, out_file, force_, silent, checksum
+            )
+            return
+
+        manifest.update(remote_file, DOWNLOADING)
+        status = FAILED
+        exists = not force_ and out_file.exists()
+        start = out_file.stat().st_size if exists else 0
+        started = time.monotonic()
+        try:
+            self._download_timed(
+                remote_file, out_file, force_, silent, checksum
+            )
+            status = DONE
+        finally:
+            size = out_file.stat().st_size if out_file.exists() else 0
+            manifest.update(remote_file, status, completed=size)
+
+        manifest.record(size - start, time.monotonic() - started)
+
+    def _download_timed(self, remote_file, out_file, force_, silent, checksum):
+        """Download a single file, emitting a "file" event when finished.
+
+        Parameters
+        ----------
+        remote_file : str
+            The file to download.
+        out_file : pathlib.Path object
+            The local file.
+        force_ : bool
+            Force the file to be redownloaded, even if it exists.
+        silent : bool
+            Disable the progress bar?
+        checksum : tuple of (str, str) or None
+            The hash algorithm and expected hex digest of the file.
+
+        """
+        status = FAILED
+        started = time.monotonic()
+        try:
+            self._download_file(
+                remote_file, out_file, force_, silent, checksum
+            )
+            status = DONE
+        finally:
+            events.emit(
+                "file",
+                host=self.host,
+                file=remote_file,
+                status=status,
+                seconds=time.monotonic() - started,
+            )
+
+    def _fetch_file(self, remote_file, out_file, force_, silent, checksum):
+        """Transfer a single file, hashing it if a checksum is provided.
+
+        Parameters
+        ----------
+        remote_file : str
+            The file to download.
+        out_file : pathlib.Path object
+            The local file.
+        force_ : bool
+            Force the file to be redownloaded, even if it exists.
+        silent : bool
+            Disable the progress bar?
+        checksum : tuple of (str, str) or None
+            The hash algorithm and expected hex digest of the file.
+
+        Returns
+        -------
+        str or None
+            The hex digest of the local file, if a checksum was provided.
 
         """
         if remote_file.startswith("ccms_peak"):
             # Special case for: https://github.com/CCMS-UCSD/MassIVEDocumentation/issues/30#issue
             path = "z01/" + self.path.split("/", 1)[1]
+            entry = None
         else:
             path = None
+            entry = self._entries.get(remote_file)
+
+        # Use the listing to avoid contacting the server if possible:
+        size = None
+        if entry is not None and entry.size is not None:
+            size = entry.size
+            force_ = force_ or not is_current(out_file, entry)
+            if not force_ and checksum is None and out_file.exists():
+                if out_file.stat().st_size == size:
+                    return None
 
         self.connect(path)
+        if size is None:
+            size = self.connection.size(remote_file)
 
-        size = self.connection.size(remote_file)
-        pbar = tqdm(
+        pbar = progress_bar(
             desc=str(remote_file),
             total=size,
-            position=1,
+            position=self._slot,
             unit="b",
             unit_divisor=1024,
             unit_scale=True,
@@ -156,24 +455,271 @@ class FTPParser:
             disable=silent,
         )
 
+        if is_cloud(out_file):
+            digest = self._stream_to_cloud(
+                remote_file, out_file, size, force_, pbar, checksum, path
+            )
+        elif self._use_segments(out_file, size, force_):
+            self._download_segments(
+                remote_file, out_file, size, pbar, path, force_
+            )
+            pbar.close()
+            digest = None
+            if checksum is not None:
+                digest = hash_file(out_file, checksum[0])
+        else:
+            digest = self._stream_to_file(
+                remote_file, out_file, size, force_, pbar, checksum, path
+            )
+
+        self.quit()
+        return digest
+
+    def _stream_to_file(
+        self, remote_file, out_file, size, force_, pbar, checksum, path=None
+    ):
+        """Transfer a file, appending to any partial local file.
+
+        Parameters
+        ----------
+        remote_file : str
+            The file to download.
+        out_file : pathlib.Path
+            The local file.
+        size : int
+            The size of the remote file in bytes.
+        force_ : bool
+            Force the file to be redownloaded, even if it exists.
+        pbar : tqdm.tqdm
+            The progress bar for the file.
+        checksum : tuple of (str, str) or None
+            The hash algorithm and expected hex digest of the file.
+        path : str, optional
+            The remote directory, if it differs from the project path.
+
+        Returns
+        -------
+        str or None
+            The hex digest of the file, if a checksum was provided.
+
+        """
+        hasher = None if checksum is None else hashlib.new(checksum[0])
         with self.open_(out_file, force_) as out:
             start_pos = out.tell()
+            if start_pos > size:
+                # A file larger than the remote is not a partial download:
+                LOGGER.warning(
+                    "%s is larger than the remote file; downloading it again.",
+                    out_file,
+                )
+                out.seek(0)
+                out.truncate()
+                start_pos = 0
+
+            if hasher is not None and start_pos:
+                out.seek(0)
+                update_hash(hasher, out, start_pos)
+                out.seek(start_pos)
+
             pbar.update(start_pos)
 
-            # Exit if all bytes are present:
-            if start_pos == size:
-                pbar.close()
-                return
+            # Download file if all bytes are not present:
+            if start_pos < size:
+                self._transfer(remote_file, out, pbar, hasher, path, size)
+
+        pbar.close()
+        return None if hasher is None else hasher.hexdigest()
+
+    def _stream_to_cloud(
+        self, remote_file, out_file, size, force_, pbar, checksum, path=None
+    ):
+        """Transfer a file directly into cloud storage.
+
+        The file is uploaded in parts as it is received, rather than staged
+        locally first. The parts of an interrupted transfer are kept, so
+        that it resumes after the last complete part.
+
+        Parameters
+        ----------
+        remote_file : str
+            The file to download.
+        out_file : cloudpathlib.CloudPath
+            The file in cloud storage.
+        size : int
+            The size of the remote file in bytes.
+        force_ : bool
+            Force the file to be redownloaded, even if it exists.
+        pbar : tqdm.tqdm
+            The progress bar for the file.
+        checksum : tuple of (str, str) or None
+            The hash algorithm and expected hex digest of the file.
+        path : str, optional
+            The remote directory, if it differs from the project path.
 
-            # Download file if not:
-            self._with_reconnects(
-                self._transfer_file,
-                fname=remote_file,
-                fhandle=out,
-                pbar=pbar,
+        Returns
+        -------
+        str or None
+            The hex digest of the file, if a checksum was provided.
+
+        """
+        from .upload import CloudSink
+
+        if (
+            not force_
+            and out_file.exists()
+            and out_file.stat().st_size == size
+        ):
+            pbar.close()
+            return (
+                None if checksum is None else hash_file(out_file, checksum[0])
             )
 
-        self.quit()
+        sink = CloudSink(
+            out_file,
+            size=size,
+            part_size=self.part_size,
+            workers=self.upload_workers,
+            restart=force_,
+        )
+        start_pos = sink.tell()
+        hasher = None
+        if checksum is not None and not start_pos:
+            hasher = hashlib.new(checksum[0])
+
+        pbar.update(start_pos)
+        with sink:
+            if start_pos < size:
+                self._transfer(remote_file, sink, pbar, hasher, path, size)
+
+        pbar.close()
+        if hasher is not None:
+            return hasher.hexdigest()
+
+        # Resumed parts were not hashed, so read the file back:
+        return None if checksum is None else hash_file(out_file, checksum[0])
+
+    def _use_segments(self, out_file, size, force_):
+        """Should a file be downloaded in segments?
+
+        Segments require random access to the output file, so they are only
+        used for new local files; an existing partial file is resumed
+        normally.
+        """
+        return (
+            self.segments > 1
+            and size >= self.segment_threshold
+            and not is_cloud(out_file)
+            and (force_ or not out_file.exists())
+        )
+
+    def _download_segments(
+        self, remote_file, out_file, size, pbar, path, force_=False
+    ):
+        """Download a file as byte ranges over multiple FTP sessions.
+
+        The ranges are written into a preallocated, hidden ".part" file.
+        Progress is recorded in a ".part.json" file alongside it, so that an
+        interrupted download can be resumed. The part file is moved to
+        ``out_file`` only once every range is complete and its size is
+        verified.
+
+        Parameters
+        ----------
+        remote_file : str
+            The file to download.
+        out_file : pathlib.Path
+            The local file.
+        size : int
+            The size of the remote file in bytes.
+        pbar : tqdm.tqdm
+            The progress bar for the file.
+        path : str or None
+            The remote directory, if it differs from the project path.
+        force_ : bool, optional
+            Discard the progress of a previous attempt, instead of resuming.
+
+        """
+        segments = _Segments(
+            out_file, size, self.segments, pbar, restart=force_
+        )
+        pending = [s for s in segments if s[2] < s[1]]
+
+        def fetch(segment):
+            """Download one segment with its own session."""
+            parser = self._clone(self._slot)
+            try:
+                parser._with_reconnects(
+                    parser._transfer_range,
+                    fname=remote_file,
+                    segment=segment,
+                    segments=segments,
+                    path=path,
+                )
+            finally:
+                parser.quit()
+
+        with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+            futures = [pool.submit(fetch, s) for s in pending]
+            for future in as_completed(futures):
+                future.result()
+
+        segments.finish()
+
+    def _transfer_range(self, fname, segment, segments, path=None):
+        """Transfer one byte range of a file.
+
+        Parameters
+        ----------
+        fname : str
+            The remote file name.
+        segment : list of int
+            The start, end, and current position of the range. The current
+            position is updated as data is received.
+        segments : _Segments
+            The segmented download that this range belongs to.
+        path : str or None
+            The remote directory, used by the reconnection logic.
+
+        """
+        start, end, pos = segment
+        self.connection.voidcmd("TYPE I")
+        self.connection.timeout = stats.timeout(self.host, self.timeout)
+        stall = self._stall_detector()
+        started, first_block, initial = time.monotonic(), None, pos
+        try:
+            with (
+                limits.connection(self.host),
+                segments.part_file.open("r+b") as out,
+                self.connection.transfercmd(f"RETR {fname}", rest=pos) as sock,
+            ):
+                out.seek(pos)
+                while pos < end:
+                    data = sock.recv(min(self.blocksize, end - pos))
+                    if not data:
+                        break
+
+                    if first_block is None:
+                        first_block = time.monotonic()
+
+                    out.write(data)
+                    pos += len(data)
+                    segment[2] = pos
+                    segments.update(len(data))
+                    limits.throttle(self.host, len(data))
+                    if stall is not None:
+                        stall.update(len(data))
+        finally:
+            segments.save()
+            self._record_transfer(fname, started, first_block, pos - initial)
+
+        if pos < end:
+            raise EOFError(f"Connection closed at byte {pos} of {fname}")
+
+        if end == segments.size:
+            self.connection.voidresp()
+        else:
+            # The server is still sending, so this session can't be reused.
+            self._drop()
 
     @staticmethod
     def open_(out_file, force_):
@@ -196,12 +742,49 @@ class FTPParser:
 
         """
         open_kwargs = {"mode": "wb+" if force_ else "ab+"}
-        if isinstance(out_file, CloudPath):
+        if is_cloud(out_file):
             open_kwargs["force_overwrite_to_cloud"] = force_
 
         return out_file.open(**open_kwargs)
 
-    def _transfer_file(self, fname, fhandle, pbar):
+    def _transfer(
+        self, fname, fhandle, pbar, hasher=None, path=None, size=None
+    ):
+        """Transfer a file with reconnects, or from the fastest mirror.
+
+        Mirrors serve the project path, so files in another directory are
+        always transferred over FTP.
+
+        Parameters
+        ----------
+        fname : str
+            The remote file name.
+        fhandle : file object
+            The opened file object where the data will be written.
+        pbar : tqdm.tqdm
+            The tqdm progress bar to update.
+        hasher : hashlib hash object, optional
+            A hash to update with the data as it is written.
+        path : str, optional
+            The remote directory, if it differs from the project path.
+        size : int, optional
+            The size of the remote file in bytes, if it is known.
+
+        """
+        if self.mirrors is not None and path is None:
+            self.mirrors.transfer(self, fname, fhandle, pbar, hasher, size)
+            return
+
+        self._with_reconnects(
+            self._transfer_file,
+            fname=fname,
+            fhandle=fhandle,
+            pbar=pbar,
+            hasher=hasher,
+            path=path,
+        )
+
+    def _transfer_file(self, fname, fhandle, pbar, hasher=None, path=None):
         """Perform the actual file transfer.
 
         Parameters
@@ -212,38 +795,351 @@ class FTPParser:
             The opened file object where the data will be written.
         pbar : tqdm.tqdm
             The tqdm progress bar to update.
+        hasher : hashlib hash object, optional
+            A hash to update with the data as it is written.
+        path : str or None
+            The remote directory, used by the reconnection logic.
 
         """
-        write = partial(write_file, fhandle=fhandle, pbar=pbar)
-        self.connection.retrbinary(f"RETR {fname}", write, rest=fhandle.tell())
+        write = self._writer(fhandle, pbar, hasher)
+        self.connection.timeout = stats.timeout(self.host, self.timeout)
+        started = time.monotonic()
+        try:
+            with limits.connection(self.host):
+                self.connection.retrbinary(
+                    f"RETR {fname}",
+                    write,
+                    blocksize=self.blocksize,
+                    rest=fhandle.tell(),
+                )
+        finally:
+            # Keep what was received, so a reconnect resumes after it:
+            write.flush(final=True)
+            self._record_transfer(
+                fname, started, write.first_block, write.total
+            )
+
         pbar.close()
 
+    def _writer(self, fhandle, pbar, hasher=None):
+        """Create a _BufferedWriter for a new transfer."""
+        return _BufferedWriter(
+            fhandle,
+            pbar,
+            hasher,
+            self.buffer_size,
+            throttle=partial(limits.throttle, self.host),
+            stall=self._stall_detector(),
+        )
+
+    def _stall_detector(self):
+        """Create a StallDetector for a new transfer, if enabled."""
+        if not self.stall_rate:
+            return None
+
+        min_rate = stats.min_rate(self.host, self.stall_rate)
+        return StallDetector(min_rate, self.stall_window)
+
+    def _record_transfer(self, fname, started, first_block, n_bytes):
+        """Record the throughput of a transfer and emit its events.
+
+        The "first_byte" and "transfer" events are emitted, and the
+        throughput is added to ``ppx.stall.stats`` if enough data was
+        received to measure it.
+
+        Parameters
+        ----------
+        fname : str
+            The remote file name.
+        started : float
+            When the transfer was requested, from time.monotonic().
+        first_block : float or None
+            When the first data was received, from time.monotonic().
+        n_bytes : int
+            The number of bytes received.
+
+        """
+        if first_block is not None and n_bytes >= MIN_MEASURED:
+            stats.observe_transfer(
+                self.host, n_bytes, time.monotonic() - first_block
+            )
+
+        if first_block is not None:
+            events.emit(
+                "first_byte",
+                host=self.host,
+                file=fname,
+                seconds=first_block - started,
+            )
+
+        events.emit(
+            "transfer",
+            host=self.host,
+            file=fname,
+            n_bytes=n_bytes,
+            seconds=time.monotonic() - started,
+        )
+
     def _get_files(self):
-        """Recursively list files from the FTP connection."""
-        self.connect()
-        self._files, self._dirs = self._with_reconnects(self._parse_files)
-        self._depth = 0
-        self.quit()
+        """List the files, reusing the listing cache where possible."""
+        cache = self._read_cache()
+        if cache is not None and time.time() - cache[0] < self.cache_ttl:
+            listings = cache[1]
+        else:
+            listings = self._crawl({} if cache is None else cache[1])
+            self._write_cache(listings)
+
+        files, dirs, entries = [], [], {}
+        level = [""]
+        while level:
+            next_level = []
+            for rpath in level:
+                for entry in listings[rpath]["entries"]:
+                    name = posixpath.join(rpath, entry.name)
+                    entries[name] = entry
+                    if entry.type == "file":
+                        files.append(name)
+                        continue
+
+                    dirs.append(name)
+                    if name in listings:
+                        next_level.append(name)
+
+            level = next_level
 
-    def _parse_files(self):
-        """A recursive function to parse the files."""
-        files, dirs = parse_response(self.connection)
-        new_files = []
-        new_dirs = []
-        for rpath in dirs:
-            self._depth += 1
-            if self._depth <= self.max_depth:
-                self.connection.cwd(rpath)
-                curr_files, curr_dirs = self._parse_files()
-                new_files += ["/".join([rpath, f]) for f in curr_files]
-                new_dirs += ["/".join([rpath, d]) for d in curr_dirs]
-                self.connection.cwd("..")
-
-            self._depth -= 1
-
-        return files + new_files, dirs + new_dirs
-
-    def download(self, files, dest_dir, force_=False, silent=False):
+        self._files, self._dirs, self._entries = files, dirs, entries
+
+    def _crawl(self, cached):
+        """List directories breadth-first, over several FTP sessions.
+
+        Each directory is listed with its own reconnect attempts, so a
+        failure deep in the tree does not restart the whole listing.
+        Directories whose modification time matches the cached listing are
+        not listed again.
+
+        Parameters
+        ----------
+        cached : dict of str, dict
+            Previous directory listings, keyed by relative path.
+
+        Returns
+        -------
+        dict of str, dict
+            The directory listings, keyed by relative path.
+
+        """
+        parsers = queue.SimpleQueue()
+        parsers.put(self)
+        for slot in range(2, self.list_workers + 1):
+            parsers.put(self._clone(slot))
+
+        def list_dir(item):
+            """List one directory with an idle parser."""
+            parser = parsers.get()
+            try:
+                return parser._with_reconnects(
+                    parser._list_dir,
+                    rpath=item[0],
+                    modify=item[1],
+                    cached=cached.get(item[0]),
+                )
+            finally:
+                parser.quit()
+                parsers.put(parser)
+
+        listings = {}
+        level = [("", None)]
+        depth = 0
+        with ThreadPoolExecutor(max_workers=self.list_workers) as pool:
+            while level:
+                depth += 1
+                next_level = []
+                results = pool.map(list_dir, level)
+                for (rpath, _), listing in zip(level, results):
+                    listings[rpath] = listing
+                    if depth > self.max_depth:
+                        continue
+
+                    # Modification times are only current if just listed:
+                    fresh = listing["fetched"] >= self._crawl_start
+                    for entry in listing["entries"]:
+                        if entry.type == "dir":
+                            subdir = posixpath.join(rpath, entry.name)
+                            modify = entry.modify if fresh else None
+                            next_level.append((subdir, modify))
+
+                level = next_level
+
+        return listings
+
+    def _list_dir(self, rpath, modify=None, cached=None):
+        """List a directory, relative to the project, by its absolute path.
+
+        Parameters
+        ----------
+        rpath : str
+            The directory, relative to the project directory.
+        modify : datetime.datetime, optional
+            The modification time of the directory, if known.
+        cached : dict, optional
+            The previous listing of the directory.
+
+        Returns
+        -------
+        dict
+            The listing, with its "modify" time, the time that it was
+            "fetched", and its "entries" as a list of RemoteEntry.
+
+        """
+        path = connections.abspath(self.connection, self.path, rpath)
+        if modify is None:
+            modify = self._modify(path)
+
+        if cached is not None and modify is not None:
+            if cached["modify"] == modify:
+                return cached
+
+        listing = {"modify": modify, "fetched": time.time()}
+        if self._features.get("MLSD", True):
+            try:
+                listing["entries"] = parse_mlsd(self.connection, path)
+                return listing
+            except error_perm as err:
+                if not str(err).startswith(UNSUPPORTED):
+                    raise
+
+                LOGGER.debug("MLSD is unsupported; falling back to LIST.")
+                self._features["MLSD"] = False
+
+        listing["entries"] = list_entries(self.connection, path)
+        return listing
+
+    def _modify(self, path):
+        """Get the modification time of a directory with MLST.
+
+        Parameters
+        ----------
+        path : str
+            The absolute path of the directory.
+
+        Returns
+        -------
+        datetime.datetime or None
+            The modification time, or None if it is unavailable.
+
+        """
+        if not self._features.get("MLST", True):
+            return None
+
+        try:
+            return parse_mlst(self.connection, path).modify
+        except error_perm as err:
+            if not str(err).startswith(UNSUPPORTED):
+                raise
+
+            self._features["MLST"] = False
+            return None
+
+    def _read_cache(self):
+        """Read the listing cache.
+
+        Returns
+        -------
+        tuple of (float, dict) or None
+            The time the cache was written and the cached directory listings,
+            or None if there is no valid cache for this parser.
+
+        """
+        self._crawl_start = time.time()
+        if self.cache_file is None or not self.cache_file.exists():
+            return None
+
+        try:
+            with self.cache_file.open() as ref:
+                cache = json.load(ref)
+
+            assert cache["version"] == CACHE_VERSION
+            assert cache["url"] == f"{self.server}/{self.path}"
+            assert cache["max_depth"] == self.max_depth
+            listings = {
+                rpath: {
+                    "modify": _from_iso(listing["modify"]),
+                    "fetched": listing["fetched"],
+                    "entries": [
+                        RemoteEntry(n, t, s, _from_iso(m))
+                        for n, t, s, m in listing["entries"]
+                    ],
+                }
+                for rpath, listing in cache["dirs"].items()
+            }
+        except (AssertionError, KeyError, TypeError, ValueError) as err:
+            LOGGER.debug("Ignoring invalid listing cache: %s", err)
+            return None
+
+        return cache["fetched"], listings
+
+    def _write_cache(self, listings):
+        """Write the listing cache.
+
+        Parameters
+        ----------
+        listings : dict of str, dict
+            The directory listings, keyed by relative path.
+
+        """
+        if self.cache_file is None:
+            return
+
+        cache = {
+            "version": CACHE_VERSION,
+            "url": f"{self.server}/{self.path}",
+            "max_depth": self.max_depth,
+            "fetched": self._crawl_start,
+            "dirs": {
+                rpath: {
+                    "modify": _to_iso(listing["modify"]),
+                    "fetched": listing["fetched"],
+                    "entries": [
+                        [e.name, e.type, e.size, _to_iso(e.modify)]
+                        for e in listing["entries"]
+                    ],
+                }
+                for rpath, listing in listings.items()
+            },
+        }
+
+        with self.cache_file.open("w+") as ref:
+            json.dump(cache, ref)
+
+    def _clone(self, slot):
+        """Create an independent parser for another FTP session.
+
+        Parameters
+        ----------
+        slot : int
+            The position of the progress bar for this session.
+
+        Returns
+        -------
+        FTPParser
+            A copy of this parser without a connection.
+
+        """
+        clone = copy.copy(self)
+        clone.connection = None
+        clone._slot = slot
+        return clone
+
+    def download(
+        self,
+        files,
+        dest_dir,
+        force_=False,
+        silent=False,
+        workers=1,
+        checksums=None,
+        manifest=None,
+    ):
         """Download the files
 
         Parameters
@@ -256,32 +1152,84 @@ class FTPParser:
             Force the files to be redownloaded, even they already exist.
         silent : bool
             Disable the progress bar?
+        workers : int
+            The number of files to download concurrently, each using its
+            own FTP session.
+        checksums : dict of str, tuple of (str, str), optional
+            The hash algorithm and expected hex digest for remote files. These
+            files are hashed as they are downloaded and verified.
+        manifest : Manifest, optional
+            A manifest in which to record the state of each file as it is
+            downloaded.
+
+        Returns
+        -------
+        list of pathlib.Path or cloudpathlib.CloudPath
+            The downloaded files, in the same order as the input.
 
         """
         files = listify(files)
-        out_files = []
-        overall_pbar = partial(
-            tqdm,
-            desc="TOTAL",
-            position=0,
-            unit="files",
-            disable=silent,
-        )
+        checksums = {} if checksums is None else checksums
+        out_files = [dest_dir / f for f in files]
 
-        for fname in overall_pbar(files):
-            out_file = dest_dir / fname
-            out_files.append(out_file)
+        # A file that is listed twice is downloaded once, so that two
+        # workers never write to the same output file:
+        files = list(dict.fromkeys(files))
+        for out_file in out_files:
             out_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Existing cloud files that are newer than the remote are skipped:
+        skipped = overwrite_errors(dest_dir)
+        workers = max(1, min(int(workers), len(files)))
+        parsers = queue.SimpleQueue()
+        parsers.put(self)
+        for slot in range(2, workers + 1):
+            parsers.put(self._clone(slot))
+
+        def fetch(fname, out_file):
+            """Download one file with an idle parser."""
+            parser = parsers.get()
             try:
-                self._download_file(
+                parser._download_tracked(
                     fname,
                     out_file,
                     silent=silent,
                     force_=force_,
+                    checksum=checksums.get(fname),
+                    manifest=manifest,
                 )
-            except OverwriteNewerCloudError:
+            except skipped:
                 if force_:
                     raise
+            finally:
+                parser.quit()
+                parsers.put(parser)
+
+        overall_pbar = progress_bar(
+            desc="TOTAL",
+            total=len(files),
+            position=0,
+            unit="files",
+            disable=silent,
+        )
+
+        with overall_pbar:
+            if workers == 1:
+                for fname in files:
+                    fetch(fname, dest_dir / fname)
+                    overall_pbar.update()
+
+                return out_files
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(fetch, f, dest_dir / f) for f in files]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                        overall_pbar.update()
+                except BaseException:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
 
         return out_files
 
@@ -303,21 +1251,447 @@ class FTPParser:
 
         return self._dirs
 
+    @property
+    def entries(self):
+        """The size and modification time of each remote file and directory.
+
+        Returns
+        -------
+        dict of str, RemoteEntry
+            The entries, keyed by their path relative to the project.
+
+        """
+        if self._files is None:
+            self._get_files()
+
+        return self._entries
+
+
+class ConnectionPool:
+    """A thread-safe pool of logged-in FTP connections.
+
+    Connections are keyed by server and working directory. An idle
+    connection to the same server, but in another directory, is reused by
+    changing directories, which is far cheaper than logging in again.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        The maximum number of idle connections to keep.
+    idle_timeout : float, optional
+        Idle connections older than this many seconds are closed.
+    check_after : float, optional
+        Connections that have been idle for more than this many seconds are
+        checked with a NOOP command before they are reused.
+
+    """
+
+    def __init__(self, max_size=8, idle_timeout=60.0, check_after=5.0):
+        """Initialize the ConnectionPool"""
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self._idle = []  # (released, server, conn) tuples.
+        self._state = {}  # conn -> [server, home, cwd]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """The number of idle connections."""
+        return len(self._idle)
+
+    def acquire(self, server, path, timeout=10.0):
+        """Borrow a connection.
+
+        Parameters
+        ----------
+        server : str
+            The FTP server, optionally with a port (``host:port``).
+        path : str
+            The directory to change to, relative to the login directory.
+        timeout : float
+            The timeout for the connection.
+
+        Returns
+        -------
+        ftplib.FTP
+            A logged-in connection in the requested directory.
+
+        """
+        while (idle := self._pop_idle(server, path)) is not None:
+            released, _, conn = idle
+            try:
+                conn.sock.settimeout(timeout)
+                conn.timeout = timeout
+                if time.monotonic() - released > self.check_after:
+                    started = time.monotonic()
+                    conn.voidcmd("NOOP")
+                    stats.observe_rtt(conn.host, time.monotonic() - started)
+
+                if not self.in_dir(conn, path):
+                    self.chdir(conn, path)
+
+                return conn
+            except (OSError, EOFError, error_temp, error_perm):
+                self.discard(conn)
+
+        host = urlsplit(f"ftp://{server}")
+        conn = FTP(timeout=timeout)
+        try:
+            started = time.monotonic()
+            conn.connect(host.hostname, host.port or 0)
+            connected = time.monotonic()
+            stats.observe_rtt(host.hostname, connected - started)
+            events.emit(
+                "connect", host=host.hostname, seconds=connected - started
+            )
+            conn.login()
+            events.emit(
+                "login",
+                host=host.hostname,
+                seconds=time.monotonic() - connected,
+            )
+            home = conn.pwd()
+            with self._lock:
+                self._state[conn] = [server, home, home]
+
+            self.chdir(conn, path)
+        except BaseException:
+            self.discard(conn)
+            raise
+
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, to be reused later."""
+        with self._lock:
+            state = self._state.get(conn)
+            if state is None or conn.sock is None:
+                state = None
+            else:
+                self._idle.append((time.monotonic(), state[0], conn))
+                surplus = self._idle[: max(len(self._idle) - self.max_size, 0)]
+                del self._idle[: len(surplus)]
+
+        if state is None:
+            self.discard(conn)
+            return
+
+        for _, _, old in surplus:
+            self.discard(old)
+
+    def discard(self, conn):
+        """Close a connection, removing it from the pool."""
+        with self._lock:
+            self._state.pop(conn, None)
+            self._idle = [i for i in self._idle if i[2] is not conn]
+
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+    def clear(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for _, _, conn in idle:
+            try:
+                conn.quit()
+            except (OSError, EOFError, error_temp, error_perm):
+                pass
+
+            self.discard(conn)
+
+    def abspath(self, conn, *paths):
+        """An absolute path, from paths relative to the login directory."""
+        with self._lock:
+            home = self._state[conn][1]
+
+        return posixpath.normpath(posixpath.join(home, *paths))
+
+    def in_dir(self, conn, path):
+        """Is a connection in a directory, relative to its login directory?"""
+        with self._lock:
+            return self._in_dir(conn, path)
+
+    def _in_dir(self, conn, path):
+        """Like in_dir(), for callers that already hold the lock."""
+        _, home, cwd = self._state[conn]
+        return cwd == posixpath.normpath(posixpath.join(home, path))
+
+    def chdir(self, conn, path):
+        """Change the working directory of a connection."""
+        with self._lock:
+            state = self._state[conn]
+
+        cwd = posixpath.normpath(posixpath.join(state[1], path))
+        state[2] = None  # In case the command fails.
+        conn.cwd(cwd)
+        state[2] = cwd
+
+    def _pop_idle(self, server, path):
+        """Remove the best idle connection for a server from the pool."""
+        now = time.monotonic()
+        with self._lock:
+            timeout = self.idle_timeout
+            expired = [i for i in self._idle if now - i[0] > timeout]
+            self._idle = [i for i in self._idle if i not in expired]
+            candidates = [i for i in self._idle if i[1] == server]
+            # Prefer a connection that is already in the right directory:
+            candidates.sort(key=lambda i: self._in_dir(i[2], path))
+            if candidates:
+                self._idle.remove(candidates[-1])
+
+        for _, _, conn in expired:
+            self.discard(conn)
+
+        return candidates[-1] if candidates else None
+
+
+class _Segments(list):
+    """The byte ranges of a segmented download.
+
+    Each range is a list of ``[start, end, position]``.
+
+    Parameters
+    ----------
+    out_file : pathlib.Path
+        The final local file.
+    size : int
+        The size of the remote file.
+    n_segments : int
+        The number of ranges to create, if not resuming.
+    pbar : tqdm.tqdm
+        The progress bar for the file.
+    restart : bool, optional
+        Discard the progress of a previous attempt, instead of resuming.
+
+    """
+
+    def __init__(self, out_file, size, n_segments, pbar, restart=False):
+        """Initialize the ranges, resuming from a previous attempt."""
+        self.out_file = out_file
+        self.size = size
+        # Hidden, so that local_files() does not list them:
+        self.part_file = out_file.with_name(f".{out_file.name}.part")
+        self.state_file = out_file.with_name(f".{out_file.name}.part.json")
+        self._pbar = pbar
+        self._lock = threading.Lock()
+
+        try:
+            if restart:
+                raise FileNotFoundError(self.state_file)
+
+            with self.state_file.open() as ref:
+                state = json.load(ref)
+
+            assert state["size"] == size
+            assert self.part_file.stat().st_size == size
+            super().__init__(state["segments"])
+        except (AssertionError, KeyError, OSError, ValueError):
+            bounds = [size * i // n_segments for i in range(n_segments + 1)]
+            super().__init__([s, e, s] for s, e in zip(bounds, bounds[1:]))
+            with self.part_file.open("wb") as ref:
+                ref.truncate(size)
+
+            self.save()
+
+        pbar.update(sum(pos - start for start, _, pos in self))
+
+    def update(self, n_bytes):
+        """Update the progress bar."""
+        with self._lock:
+            self._pbar.update(n_bytes)
+
+    def save(self):
+        """Record the progress of each range."""
+        with self._lock:
+            state = {"size": self.size, "segments": list(self)}
+            with self.state_file.open("w+") as ref:
+                json.dump(state, ref)
+
+    def finish(self):
+        """Verify the part file and move it into place."""
+        incomplete = [s for s in self if s[2] < s[1]]
+        if incomplete or self.part_file.stat().st_size != self.size:
+            raise error_temp(
+                f"Segmented download of {self.out_file} is incomplete."
+            )
+
+        self.part_file.replace(self.out_file)
+        self.state_file.unlink()
+
+
+class _BufferedWriter:
+    """Collect received blocks before writing, hashing, and reporting them.
+
+    Writing, hashing, and updating the progress bar for every block that
+    ftplib receives costs several Python calls per block, which limits the
+    throughput of a single transfer. Instead, blocks are written once
+    ``buffer_size`` bytes have been collected, and the progress bar is
+    updated at most every ``interval`` seconds.
+
+    Parameters
+    ----------
+    fhandle : file object
+        The opened file object where the data will be written.
+    pbar : tqdm.tqdm
+        The progress bar to update.
+    hasher : hashlib hash object, optional
+        A hash to update with the data as it is written.
+    buffer_size : int, optional
+        The number of bytes to collect before writing them.
+    interval : float, optional
+        The minimum number of seconds between progress bar updates.
+    throttle : callable, optional
+        Called with the size of each block as it is received, to limit the
+        rate of the transfer.
+    stall : ppx.stall.StallDetector, optional
+        Updated with the size of each block as it is received, to abort a
+        transfer that has stalled.
+
+    """
+
+    def __init__(
+        self,
+        fhandle,
+        pbar,
+        hasher=None,
+        buffer_size=2**22,
+        interval=0.2,
+        throttle=None,
+        stall=None,
+    ):
+        """Initialize the _BufferedWriter"""
+        self.fhandle = fhandle
+        self.pbar = pbar
+        self.hasher = hasher
+        self.buffer_size = buffer_size
+        self.interval = interval
+        self.throttle = throttle
+        self.stall = stall
+        self.first_block = None
+        self.total = 0
+        self._buffer = bytearray()
+        self._unreported = 0
+        self._reported_at = time.monotonic()
+
+    def __call__(self, data):
+        """Add a block of data."""
+        if self.first_block is None:
+            self.first_block = time.monotonic()
+
+        if self.throttle is not None:
+            self.throttle(len(data))
+
+        if self.stall is not None:
+            self.stall.update(len(data))
+
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self, final=False):
+        """Write the collected data.
+
+        Parameters
+        ----------
+        final : bool, optional
+            Update the progress bar, regardless of when it was last updated.
+
+        """
+        if self._buffer:
+            self.fhandle.write(self._buffer)
+            if self.hasher is not None:
+                self.hasher.update(self._buffer)
+
+            self._unreported += len(self._buffer)
+            self.total += len(self._buffer)
+            self._buffer = bytearray()
+
+        now = time.monotonic()
+        if final or now - self._reported_at >= self.interval:
+            self.pbar.update(self._unreported)
+            self._unreported = 0
+            self._reported_at = now
+
 
 # Functions -------------------------------------------------------------------
-def write_file(data, fhandle, pbar):
-    """Write a file with progress."""
-    fhandle.write(data)
-    pbar.update(len(data))
+# The pool used by every FTPParser:
+connections = ConnectionPool()
+atexit.register(connections.clear)
 
 
-def parse_response(conn):
+def is_cloud(path):
+    """Is a path in cloud storage?
+
+    Parameters
+    ----------
+    path : pathlib.Path or cloudpathlib.CloudPath
+        The path.
+
+    Returns
+    -------
+    bool
+        True for a cloudpathlib.CloudPath.
+
+    """
+    return not isinstance(path, PurePath)
+
+
+def overwrite_errors(path):
+    """The errors raised when refusing to overwrite a newer file.
+
+    Parameters
+    ----------
+    path : pathlib.Path or cloudpathlib.CloudPath
+        The destination directory.
+
+    Returns
+    -------
+    tuple of Exception
+        The errors, which are only raised by cloudpathlib.
+
+    """
+    if not is_cloud(path):
+        return ()
+
+    from cloudpathlib.exceptions import OverwriteNewerCloudError
+
+    return (OverwriteNewerCloudError,)
+
+
+def progress_bar(**kwargs):
+    """Create a progress bar.
+
+    tqdm is imported on first use, to keep importing ppx fast.
+
+    Parameters
+    ----------
+    **kwargs : dict
+        Keyword arguments for :py:class:`tqdm.auto.tqdm`.
+
+    Returns
+    -------
+    tqdm.tqdm
+        The progress bar.
+
+    """
+    from tqdm.auto import tqdm
+
+    return tqdm(**kwargs)
+
+
+def parse_response(conn, path=None):
     """Parse the FTP server response.
 
     Parameters
     ----------
     conn : Connection
         The FTP server connection
+    path : str, optional
+        The directory to list. By default, the current directory is listed.
 
     Returns
     -------
@@ -326,7 +1700,10 @@ def parse_response(conn):
 
     """
     lines = []
-    conn.dir(lines.append)
+    if path is None:
+        conn.dir(lines.append)
+    else:
+        conn.dir(path, lines.append)
 
     files = []
     dirs = []
@@ -340,6 +1717,202 @@ def parse_response(conn):
     return files, dirs
 
 
+def parse_mlsd(conn, path=None):
+    """List a directory with the MLSD command.
+
+    Parameters
+    ----------
+    conn : Connection
+        The FTP server connection
+    path : str, optional
+        The directory to list. By default, the current directory is listed.
+
+    Returns
+    -------
+    list of RemoteEntry
+        The files and directories.
+
+    """
+    entries = []
+    facts = ["type", "size", "modify"]
+    for name, fact in conn.mlsd("" if path is None else path, facts):
+        kind = fact.get("type", "file").lower()
+        if kind in ("cdir", "pdir"):
+            continue
+
+        size = fact.get("size")
+        entries.append(
+            RemoteEntry(
+                name=name,
+                type="file" if kind == "file" else "dir",
+                size=None if size is None else int(size),
+                modify=_from_mlsx(fact.get("modify")),
+            )
+        )
+
+    return entries
+
+
+def parse_mlst(conn, path):
+    """Get the facts about a single file or directory with MLST.
+
+    Parameters
+    ----------
+    conn : Connection
+        The FTP server connection
+    path : str
+        The file or directory.
+
+    Returns
+    -------
+    RemoteEntry
+        The parsed file or directory.
+
+    """
+    resp = conn.sendcmd(f"MLST {path}").splitlines()
+    facts, _, name = resp[1].strip().partition(" ")
+    facts = dict(f.split("=", 1) for f in facts.lower().split(";") if "=" in f)
+
+    size = facts.get("size")
+    return RemoteEntry(
+        name=posixpath.basename(name),
+        type="file" if facts.get("type", "file") == "file" else "dir",
+        size=None if size is None else int(size),
+        modify=_from_mlsx(facts.get("modify")),
+    )
+
+
+def _from_mlsx(modify):
+    """Parse a modification time from an MLSD or MLST fact."""
+    if modify is None:
+        return None
+
+    modify = datetime.strptime(modify[:14], "%Y%m%d%H%M%S")
+    return modify.replace(tzinfo=timezone.utc)
+
+
+def _to_iso(modify):
+    """Serialize an optional datetime."""
+    return None if modify is None else modify.isoformat()
+
+
+def _from_iso(modify):
+    """Deserialize an optional datetime."""
+    return None if modify is None else datetime.fromisoformat(modify)
+
+
+def list_entries(conn, path=None):
+    """List a directory with the LIST command.
+
+    Parameters
+    ----------
+    conn : Connection
+        The FTP server connection
+    path : str, optional
+        The directory to list. By default, the current directory is listed.
+
+    Returns
+    -------
+    list of RemoteEntry
+        The files and directories.
+
+    """
+    lines = []
+    if path is None:
+        conn.dir(lines.append)
+    else:
+        conn.dir(path, lines.append)
+
+    return [parse_entry(line) for line in lines]
+
+
+def parse_entry(line):
+    """Parse one line of the FTP LIST response, keeping the metadata.
+
+    Parameters
+    ----------
+    line : str
+        One line from the FTP response
+
+    Returns
+    -------
+    RemoteEntry
+        The parsed file or directory.
+
+    """
+    match = UNIX.fullmatch(line)
+    is_dir = match[1] == "d" or match[1] == "l"
+    return RemoteEntry(
+        name=match[8],
+        type="dir" if is_dir else "file",
+        size=None if is_dir else int(match[6]),
+        modify=parse_time(match[7]),
+    )
+
+
+def parse_time(date, now=None):
+    """Parse the modification date from a LIST response.
+
+    Dates within the last six months have a time of day instead of a year.
+
+    Parameters
+    ----------
+    date : str
+        The date, such as "Mar  7 12:00" or "Mar  7  2012".
+    now : datetime.datetime, optional
+        The current time, used to infer the year.
+
+    Returns
+    -------
+    datetime.datetime or None
+        The parsed date, in UTC.
+
+    """
+    match = UNIX_TIME.fullmatch(date)
+    if match is None:
+        return None
+
+    now = datetime.now(timezone.utc) if now is None else now
+    month, day, time_or_year = match.groups()
+    try:
+        if ":" in time_or_year:
+            parsed = datetime.strptime(
+                f"{now.year} {month} {day} {time_or_year}", "%Y %b %d %H:%M"
+            ).replace(tzinfo=timezone.utc)
+            if parsed > now:
+                parsed = parsed.replace(year=now.year - 1)
+        else:
+            parsed = datetime.strptime(
+                f"{time_or_year} {month} {day}", "%Y %b %d"
+            ).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+    return parsed
+
+
+def is_current(out_file, entry):
+    """Is a local file at least as new as the remote file?
+
+    Parameters
+    ----------
+    out_file : pathlib.Path or cloudpathlib.CloudPath
+        The local file.
+    entry : RemoteEntry
+        The remote file.
+
+    Returns
+    -------
+    bool
+        False if the local file exists but is older than the remote file.
+
+    """
+    if entry.modify is None or not out_file.exists():
+        return True
+
+    return out_file.stat().st_mtime >= entry.modify.timestamp()
+
+
 def parse_line(line):
     """Parse one line of the FTP response
 
@@ -0,0 +1,293 @@
+"""A persistent cache of HTTP responses.
+
+Response bodies are stored once per unique content, named by their SHA-256
+digest, while a small SQLite index maps each request URL to its body and
+the validators (``ETag`` and ``Last-Modified``) needed to revalidate it
+with a conditional request. When the cache grows beyond its maximum size,
+the least recently used responses are evicted.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE INDEX IF NOT EXISTS responses_digest ON responses (digest);
+"""
+
+# The number of responses to examine at a time when evicting:
+EVICT_BATCH = 64
+
+CachedResponse = namedtuple(
+    "CachedResponse", ["url", "digest", "etag", "last_modified", "headers"]
+)
+CachedResponse.__doc__ = """A response in the cache.
+
+Parameters
+----------
+url : str
+    The full request URL, including its query string.
+digest : str
+    The SHA-256 hex digest of the response body.
+etag : str or None
+    The ``ETag`` header of the response.
+last_modified : str or None
+    The ``Last-Modified`` header of the response.
+headers : dict of str, str
+    The response headers.
+"""
+
+
+class ResponseCache:
+    """A size-bounded, content-addressed cache of HTTP responses.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        The directory in which to store the cache. It is created if it does
+        not exist.
+    max_size : int, optional
+        The maximum total size of the cached response bodies, in bytes.
+
+    """
+
+    def __init__(self, directory, max_size=2**28):
+        """Initialize the ResponseCache"""
+        self.directory = directory
+        self.max_size = max_size
+        self._objects = directory / "objects"
+        self._objects.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(directory / "index.sqlite"),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            # Bodies are shared, so each digest counts once:
+            self._size = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM "
+                "(SELECT MAX(size) AS size FROM responses GROUP BY digest)"
+            ).fetchone()[0]
+
+    def close(self):
+        """Close the index."""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, url):
+        """Look up a response.
+
+        Parameters
+        ----------
+        url : str
+            The full request URL.
+
+        Returns
+        -------
+        CachedResponse or None
+            The cached response, or None if it is not in the cache.
+
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, digest, etag, last_modified, headers "
+                "FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+        if row is None or not (self._objects / row[1]).exists():
+            return None
+
+        return CachedResponse(*row[:4], json.loads(row[4]))
+
+    def validators(self, url):
+        """The headers for a conditional request.
+
+        Parameters
+        ----------
+        url : str
+            The full request URL.
+
+        Returns
+        -------
+        dict of str, str
+            The ``If-None-Match`` and ``If-Modified-Since`` headers for the
+            cached response, if any.
+
+        """
+        cached = self.get(url)
+        headers = {}
+        if cached is not None:
+            if cached.etag is not None:
+                headers["If-None-Match"] = cached.etag
+
+            if cached.last_modified is not None:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        return headers
+
+    def load(self, url):
+        """Rebuild a response from the cache.
+
+        Parameters
+        ----------
+        url : str
+            The full request URL.
+
+        Returns
+        -------
+        requests.Response or None
+            The cached response, or None if it is not in the cache.
+
+        """
+        cached = self.get(url)
+        if cached is None:
+            return None
+
+        res = requests.Response()
+        res.status_code = 200
+        res.url = cached.url
+        res.headers = CaseInsensitiveDict(cached.headers)
+        res._content = (self._objects / cached.digest).read_bytes()
+        res.encoding = requests.utils.get_encoding_from_headers(res.headers)
+        self._touch(url)
+        return res
+
+    def store(self, url, response):
+        """Add a response to the cache.
+
+        Parameters
+        ----------
+        url : str
+            The full request URL.
+        response : requests.Response
+            A successful response.
+
+        """
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        obj = self._objects / digest
+        if not obj.exists():
+            tmp = obj.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(content)
+            tmp.replace(obj)
+
+        headers = dict(response.headers)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT digest, size FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if not self._referenced(digest):
+                self._size += len(content)
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    digest,
+                    len(content),
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    json.dumps(headers),
+                    time.time(),
+                ),
+            )
+            stale = []
+            if old is not None and old[0] != digest:
+                stale += self._release(*old)
+
+            if self._size > self.max_size:
+                stale += self._evict(keep=url)
+
+        for old_digest in stale:
+            (self._objects / old_digest).unlink(missing_ok=True)
+
+    def _touch(self, url):
+        """Mark a response as recently used."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE url = ?",
+                (time.time(), url),
+            )
+
+    def _referenced(self, digest):
+        """Is a body used by any response? Call with the lock held."""
+        row = self._conn.execute(
+            "SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        return row is not None
+
+    def _release(self, digest, size):
+        """Account for a body that may no longer be used.
+
+        Call with the lock held.
+
+        Returns
+        -------
+        list of str
+            The digest, if its body is no longer used and can be deleted.
+
+        """
+        if self._referenced(digest):
+            return []
+
+        self._size -= size
+        return [digest]
+
+    def _evict(self, keep):
+        """Remove the least recently used responses until under max_size.
+
+        Responses are removed in order of their last access, a batch at a
+        time. Call with the lock held.
+
+        Parameters
+        ----------
+        keep : str
+            The URL of a response that is never removed.
+
+        Returns
+        -------
+        list of str
+            The digests of the bodies that are no longer used.
+
+        """
+        stale = []
+        while self._size > self.max_size:
+            rows = self._conn.execute(
+                "SELECT url, digest, size FROM responses WHERE url != ? "
+                "ORDER BY accessed LIMIT ?",
+                (keep, EVICT_BATCH),
+            ).fetchall()
+            if not rows:
+                break
+
+            for url, digest, size in rows:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE url = ?", (url,)
+                )
+                stale += self._release(digest, size)
+                if self._size <= self.max_size:
+                    break
+
+        return stale
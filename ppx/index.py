@@ -0,0 +1,246 @@
+"""An index of remote files for fast membership and glob queries."""
+
+import os
+import re
+from functools import lru_cache
+
+
+class RemoteIndex:
+    """An index of the remote files or directories in a project.
+
+    Building the index is linear in the number of paths, after which
+    membership tests are constant time and glob patterns are matched with a
+    single compiled regular expression over all of the paths. Because
+    relative patterns match from the right, the paths and patterns are
+    reversed, so that literal suffixes like ".mzML" let the expression
+    reject most paths after a few characters.
+
+    Parameters
+    ----------
+    paths : list of str
+        The remote paths, relative to the project.
+
+    """
+
+    def __init__(self, paths):
+        """Initialize the RemoteIndex"""
+        self._paths = list(paths)
+        self._set = frozenset(self._paths)
+        self._blob = "\n" + "\n".join(p[::-1] for p in self._paths) + "\n"
+        self._starts = {}
+        pos = 0
+        for idx, path in enumerate(self._paths):
+            self._starts[pos] = idx
+            pos += len(path) + 1
+
+    def __contains__(self, path):
+        """Is a path in the index?"""
+        return path in self._set
+
+    def __iter__(self):
+        """Iterate over the paths in their original order."""
+        return iter(self._paths)
+
+    def __len__(self):
+        """The number of paths."""
+        return len(self._paths)
+
+    def missing(self, paths):
+        """Find the paths that are not in the index.
+
+        Parameters
+        ----------
+        paths : list of str
+            The paths to look for.
+
+        Returns
+        -------
+        list of str
+            The paths that were not found, in their original order.
+
+        """
+        return [p for p in paths if p not in self._set]
+
+    def match(self, pattern):
+        """Find the paths that match a glob pattern.
+
+        The matching is the same as :py:meth:`pathlib.PurePath.match`: a
+        relative pattern is matched from the right and ``**`` behaves like
+        ``*``.
+
+        Parameters
+        ----------
+        pattern : str
+            The glob pattern.
+
+        Returns
+        -------
+        list of str
+            The matching paths, in their original order.
+
+        """
+        regex = _compile(pattern)
+        if not self._paths:
+            return []
+
+        return [
+            self._paths[self._starts[m.start()]]
+            for m in regex.finditer(self._blob)
+        ]
+
+
+@lru_cache(maxsize=256)
+def _compile(pattern):
+    """Compile a glob pattern into a regular expression.
+
+    The expression matches reversed paths, each preceded and followed by a
+    newline.
+
+    Parameters
+    ----------
+    pattern : str
+        The glob pattern.
+
+    Returns
+    -------
+    re.Pattern
+        The compiled expression.
+
+    """
+    if not pattern:
+        raise ValueError("empty pattern")
+
+    sep = r"[\\/]" if os.name == "nt" else "/"
+    anchored = re.match(sep, pattern) is not None
+    parts = [p for p in re.split(sep, pattern) if p not in ("", ".")]
+    body = "/".join("".join(_translate(p)[::-1]) for p in parts[::-1])
+    suffix = "/" if anchored else "(?:/[^\n]*)?"
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    return re.compile("\n" + body + suffix + "(?=\n)", flags)
+
+
+def _translate(part):
+    """Translate one part of a glob pattern into a regular expression.
+
+    This follows :py:func:`fnmatch.translate`, except that wildcards never
+    match across path separators.
+
+    Parameters
+    ----------
+    part : str
+        A part of the pattern, without separators.
+
+    Returns
+    -------
+    list of str
+        The regular expression, as one token for each character or set.
+
+    """
+    idx, length = 0, len(part)
+    res = []
+    while idx < length:
+        char = part[idx]
+        idx += 1
+        if char == "*":
+            res.append("[^/\n]*")
+        elif char == "?":
+            res.append("[^/\n]")
+        elif char == "[":
+            regex, idx = _translate_set(part, idx)
+            res.append(regex)
+        else:
+            res.append(re.escape(char))
+
+    return res
+
+
+def _translate_set(part, idx):
+    """Translate a character set, such as "[a-z]", in a glob pattern.
+
+    This follows :py:func:`fnmatch.translate`, including its handling of
+    a leading "]", of empty ranges, and of characters that have a special
+    meaning in regular expression sets.
+
+    Parameters
+    ----------
+    part : str
+        A part of the pattern, without separators.
+    idx : int
+        The index just after the opening "[".
+
+    Returns
+    -------
+    regex : str
+        The regular expression.
+    idx : int
+        The index just after the set.
+
+    """
+    end = idx
+    if end < len(part) and part[end] == "!":
+        end += 1
+    if end < len(part) and part[end] == "]":
+        end += 1
+    while end < len(part) and part[end] != "]":
+        end += 1
+
+    if end >= len(part):
+        return "\\[", idx
+
+    stuff = "-".join(
+        re.sub(r"([\\\]\-\[&~|])", r"\\\1", c)
+        for c in _set_chunks(part[idx:end])
+    )
+    if not stuff:
+        # An empty range never matches:
+        return "(?!)", end + 1
+
+    if stuff[0] == "!":
+        return f"[^/\n{stuff[1:]}]", end + 1
+
+    if stuff[0] == "^":
+        stuff = "\\" + stuff
+
+    return f"[{stuff}]", end + 1
+
+
+def _set_chunks(stuff):
+    """Split the contents of a character set at the hyphens of its ranges.
+
+    As in :py:func:`fnmatch.translate`, a hyphen that starts the set is
+    literal, and ranges whose end is before their start are removed.
+
+    Parameters
+    ----------
+    stuff : str
+        The contents of the set, between the brackets.
+
+    Returns
+    -------
+    list of str
+        The parts of the set between the hyphens of ranges.
+
+    """
+    first = 2 if stuff[0] == "!" else 1
+    if "-" not in stuff[first:]:
+        return [stuff]
+
+    chunks, start = [], 0
+    pos = stuff.find("-", first)
+    while pos >= 0:
+        chunks.append(stuff[start:pos])
+        start = pos + 1
+        pos = stuff.find("-", pos + 3)
+
+    if stuff[start:]:
+        chunks.append(stuff[start:])
+    else:
+        chunks[-1] += "-"
+
+    # Remove empty ranges, which are invalid in a regular expression:
+    for k in range(len(chunks) - 1, 0, -1):
+        if chunks[k - 1][-1] > chunks[k][0]:
+            chunks[k - 1] = chunks[k - 1][:-1] + chunks[k][1:]
+            del chunks[k]
+
+    return chunks
@@ -0,0 +1,330 @@
+"""A manifest of the files downloaded for a project.
+
+The manifest is a small SQLite database in the local data directory that
+records every file that has been planned for download, its expected size
+and checksum, how many bytes have been written, and its status. This lets
+an interrupted batch of downloads resume without contacting the remote
+repository for files that are already complete. The manifest also keeps
+the size and duration of recent transfers, from which the throughput of
+future downloads is estimated.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+PENDING = "pending"
+DOWNLOADING = "downloading"
+DONE = "done"
+FAILED = "failed"
+
+ManifestEntry = namedtuple(
+    "ManifestEntry",
+    ["remote", "size", "algorithm", "digest", "completed", "status"],
+)
+ManifestEntry.__doc__ = """The state of a file in a manifest.
+
+Parameters
+----------
+remote : str
+    The remote file, relative to the project.
+size : int or None
+    The expected size of the file in bytes, if known.
+algorithm : str or None
+    The hash algorithm of the expected checksum, if known.
+digest : str or None
+    The expected hex digest of the file, if known.
+completed : int
+    The number of bytes that have been written to the local file.
+status : str
+    One of "pending", "downloading", "done", or "failed".
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    remote TEXT PRIMARY KEY,
+    size INTEGER,
+    algorithm TEXT,
+    digest TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    updated REAL NOT NULL
+)
+"""
+
+TRANSFERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transfers (
+    bytes INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    finished REAL NOT NULL
+)
+"""
+
+
+class Manifest:
+    """A crash-safe record of the files downloaded for a project.
+
+    Every change is committed immediately, so the manifest is consistent
+    even if the process is killed partway through a download. It is safe to
+    use from multiple threads.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The SQLite database file. It is created if it does not exist.
+
+    """
+
+    def __init__(self, path):
+        """Initialize the Manifest"""
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(path),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(SCHEMA)
+            self._conn.execute(TRANSFERS_SCHEMA)
+
+    def __enter__(self):
+        """Use the manifest as a context manager."""
+        return self
+
+    def __exit__(self, *args):
+        """Close the manifest."""
+        self.close()
+
+    def __len__(self):
+        """The number of files in the manifest."""
+        return self._query("SELECT COUNT(*) FROM files")[0][0]
+
+    def __contains__(self, remote):
+        """Is a file in the manifest?"""
+        return self.get(remote) is not None
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, remote):
+        """Get the state of a file.
+
+        Parameters
+        ----------
+        remote : str
+            The remote file.
+
+        Returns
+        -------
+        ManifestEntry or None
+            The state of the file, or None if it is not in the manifest.
+
+        """
+        rows = self._query(
+            "SELECT remote, size, algorithm, digest, completed, status "
+            "FROM files WHERE remote = ?",
+            (remote,),
+        )
+        return ManifestEntry(*rows[0]) if rows else None
+
+    def plan(self, files):
+        """Add files to the manifest, or update their expected state.
+
+        A file whose expected size or checksum has changed is marked as
+        pending again.
+
+        Parameters
+        ----------
+        files : iterable of tuple of (str, int, tuple of (str, str))
+            The remote file, its expected size, and its expected checksum.
+            The size and checksum may be None if they are not known, in
+            which case any previously recorded values are kept.
+
+        """
+        now = time.time()
+        rows = []
+        for remote, size, checksum in files:
+            algorithm, digest = (None, None) if checksum is None else checksum
+            rows.append((remote, size, algorithm, digest, now))
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                """
+                INSERT INTO files (remote, size, algorithm, digest, updated)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (remote) DO UPDATE SET
+                    status = CASE
+                        WHEN (excluded.size IS NOT NULL
+                              AND excluded.size IS NOT files.size)
+                          OR (excluded.digest IS NOT NULL
+                              AND excluded.digest IS NOT files.digest)
+                        THEN 'pending'
+                        ELSE files.status
+                    END,
+                    size = COALESCE(excluded.size, files.size),
+                    algorithm = COALESCE(excluded.algorithm, files.algorithm),
+                    digest = COALESCE(excluded.digest, files.digest),
+                    updated = excluded.updated
+                """,
+                rows,
+            )
+            self._conn.execute("COMMIT")
+
+    def update(self, remote, status, completed=None, size=None):
+        """Update the state of a file.
+
+        Parameters
+        ----------
+        remote : str
+            The remote file.
+        status : str
+            The new status.
+        completed : int, optional
+            The number of bytes written to the local file.
+        size : int, optional
+            The size of the file, if it was learned while downloading.
+
+        """
+        self._query(
+            """
+            UPDATE files SET
+                status = ?,
+                completed = COALESCE(?, completed),
+                size = COALESCE(?, size),
+                updated = ?
+            WHERE remote = ?
+            """,
+            (status, completed, size, time.time(), remote),
+        )
+
+    def done(self, files, local):
+        """Find the files that are already complete.
+
+        A file is complete if the manifest marks it as done and the local
+        file still has the recorded size. Only the local disk is checked.
+
+        Parameters
+        ----------
+        files : list of str
+            The remote files.
+        local : pathlib.Path
+            The local data directory.
+
+        Returns
+        -------
+        set of str
+            The complete files.
+
+        """
+        complete = set()
+        for remote, completed in self._select(
+            "SELECT remote, completed FROM files WHERE status = 'done' "
+            "AND remote IN ({})",
+            files,
+        ):
+            try:
+                if (local / remote).stat().st_size == completed:
+                    complete.add(remote)
+            except FileNotFoundError:
+                pass
+
+        return complete
+
+    def unknown(self, files):
+        """Find the files that are not in the manifest.
+
+        Parameters
+        ----------
+        files : list of str
+            The remote files.
+
+        Returns
+        -------
+        list of str
+            The files that are not in the manifest, in their original order.
+
+        """
+        known = {
+            r
+            for (r,) in self._select(
+                "SELECT remote FROM files WHERE remote IN ({})", files
+            )
+        }
+        return [f for f in files if f not in known]
+
+    def progress(self):
+        """Summarize the state of the files in the manifest.
+
+        Returns
+        -------
+        dict of str, tuple of (int, int)
+            The number of files and the number of bytes written, keyed by
+            status.
+
+        """
+        rows = self._query(
+            "SELECT status, COUNT(*), SUM(completed) FROM files "
+            "GROUP BY status"
+        )
+        return {status: (count, total or 0) for status, count, total in rows}
+
+    def record(self, n_bytes, seconds):
+        """Record a completed transfer.
+
+        Parameters
+        ----------
+        n_bytes : int
+            The number of bytes transferred.
+        seconds : float
+            The duration of the transfer.
+
+        """
+        if n_bytes > 0 and seconds > 0:
+            self._query(
+                "INSERT INTO transfers VALUES (?, ?, ?)",
+                (n_bytes, seconds, time.time()),
+            )
+
+    def throughput(self, recent=20):
+        """The throughput of recent transfers.
+
+        Parameters
+        ----------
+        recent : int, optional
+            The number of recent transfers to consider.
+
+        Returns
+        -------
+        float or None
+            The throughput in bytes per second, or None if no transfers
+            have been recorded.
+
+        """
+        (n_bytes, seconds), *_ = self._query(
+            "SELECT SUM(bytes), SUM(seconds) FROM ("
+            "SELECT bytes, seconds FROM transfers "
+            "ORDER BY finished DESC, rowid DESC LIMIT ?)",
+            (recent,),
+        )
+        return n_bytes / seconds if seconds else None
+
+    def _select(self, sql, files, batch=500):
+        """Run a query with an IN clause in batches."""
+        files = list(files)
+        for idx in range(0, len(files), batch):
+            chunk = files[idx : idx + batch]
+            marks = ", ".join("?" * len(chunk))
+            yield from self._query(sql.format(marks), chunk)
+
+    def _query(self, sql, params=()):
+        """Run a single statement and fetch the result."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
@@ -1,13 +1,14 @@
 """MassIVE datasets."""
 
+import csv
 import logging
 import re
 import socket
 import xml.etree.ElementTree as ET  # noqa: N817
-from pathlib import Path
 
 import requests
 
+from . import client
 from .ftp import FTPParser
 from .project import BaseProject
 
@@ -87,7 +88,9 @@ class MassiveProject(BaseProject):
         if self._url is not None:
             return self._url
 
-        res = requests.get(self._proxy_api + self.id, timeout=self.timeout)
+        res = client.cached_get(
+            self._proxy_api + self.id, timeout=self.timeout
+        )
         for link in res.json()["datasetLink"]:
             if link["accession"] == "MS:1002852":
                 # Fix the incorrect arrival of FTP hostname
@@ -167,7 +170,7 @@ class MassiveProject(BaseProject):
                 self._remote_files = self._parser.files
 
         if glob is not None:
-            files = [f for f in self._remote_files if Path(f).match(glob)]
+            files = self._remote_files_index.match(glob)
         else:
             files = self._remote_files
 
@@ -175,32 +178,40 @@ class MassiveProject(BaseProject):
 
     def remote_files_from_info(self):
         """Retrieves files list from project's files info"""
-        # First line is a CSV header
-        # we are interested in the `filepath` column.
-        header = self.file_info().splitlines()[0].split(",")
+        # The MassIVE ID might be present in a path (not always):
+        sep = self.id + "/"
+        self._remote_files = [
+            path.split(sep, 1)[1] if sep in path else path
+            for path in self._iter_file_info("filepath")
+        ]
 
-        # The column position is not guaranteed to be the next one (usi,
-        # filepath,dataset,collection...),
-        # so we need to detect it
-        pos = header.index("filepath")
+        assert self._remote_files
 
-        info = self.file_info().splitlines()[1:]
+    def remote_sizes(self):
+        """The sizes of the project files in the remote repository.
 
-        result = []
-        sep = self.id + "/"
-        for r in info:
-            parts = r.split(",")
-            path = parts[pos]
-            # the MassiVE ID might be present in a path (not always)
-            # handle it
-            if sep in path:
-                result.append(path.split(sep, 1)[1])
-            else:
-                result.append(path)
-
-        self._remote_files = result
+        The sizes are read from the project's file information, or from
+        the FTP directory listings if it is unavailable.
 
-        assert self._remote_files
+        Returns
+        -------
+        dict of str, int
+            The size of each file in bytes, keyed by remote file. Files
+            whose size is unknown are omitted.
+
+        """
+        sep = self.id + "/"
+        try:
+            return {
+                row["filepath"].split(sep, 1)[-1]: int(
+                    row["size"].replace(",", "")
+                )
+                for row in self._iter_file_info()
+                if row.get("size")
+            }
+        except (OSError, EOFError, KeyError, ValueError):
+            LOGGER.debug("Using the FTP server for file sizes...")
+            return super().remote_sizes()
 
     def file_info(self):
         """Retrieve information about the project files.
@@ -210,25 +221,76 @@ class MassiveProject(BaseProject):
         str
             Information about the files in a CSV format.
 
+        """
+        file_info_path = self.local / ".file_info.csv"
+        if self.fetch or not file_info_path.exists():
+            for _ in self._iter_file_info():
+                pass
+
+        with file_info_path.open("r") as ref:
+            return ref.read()
+
+    def _iter_file_info(self, column=None):
+        """Iterate over the project file information in a single pass.
+
+        The file information is read from the cached CSV file, unless it is
+        missing or ``fetch`` is true. In that case, it is streamed from the
+        MassIVE API and written to the cache as it is parsed.
+
+        Parameters
+        ----------
+        column : str, optional
+            Yield only the values from this column.
+
+        Yields
+        ------
+        dict or str
+            The information for each file, or the value of the column.
+
         """
         file_info_path = self.local / ".file_info.csv"
         if file_info_path.exists() and not self.fetch:
-            with file_info_path.open("r") as ref:
-                return ref.read()
+            with file_info_path.open("r", newline="") as ref:
+                yield from _select(csv.DictReader(ref), column)
+
+            return
 
-        res = requests.get(
+        res = client.get(
             self._api,
             params=self._params,
             timeout=self.timeout,
+            stream=True,
         )
 
-        if res.status_code != 200:
-            raise requests.HTTPError(f"Error {res.status_code}: {res.text}")
+        with res:
+            if res.status_code != 200:
+                raise requests.HTTPError(
+                    f"Error {res.status_code}: {res.text}"
+                )
+
+            res.encoding = res.encoding or "utf-8"
+            tmp_path = self.local / ".file_info.csv.part"
+            with tmp_path.open("w+", newline="") as ref:
+                lines = _tee(res.iter_lines(decode_unicode=True), ref)
+                yield from _select(csv.DictReader(lines), column)
+
+        tmp_path.replace(file_info_path)
+
+
+def _tee(lines, fhandle):
+    """Write lines to a file as they are iterated."""
+    for line in lines:
+        fhandle.write(line + "\n")
+        yield line
 
-        with file_info_path.open("w+", newline="") as ref:
-            ref.write(res.text)
 
-        return res.text
+def _select(rows, column):
+    """Select a column from CSV rows, if one is given."""
+    if column is None:
+        yield from rows
+    else:
+        for row in rows:
+            yield row[column]
 
 
 def list_projects(timeout=10.0):
@@ -250,7 +312,8 @@ def list_projects(timeout=10.0):
     url = "https://datasetcache.gnps2.org/datasette/database.csv"
     params = {"sql": "select distinct dataset from filename", "_size": "max"}
     try:
-        res = requests.get(url, params, timeout=timeout).text.splitlines()[1:]
+        res = client.get(url, params=params, timeout=timeout)
+        res = res.text.splitlines()[1:]
         res.sort()
         return res
 
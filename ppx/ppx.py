@@ -1,11 +1,15 @@
 """The command line entry point for ppx"""
 
+import atexit
 import logging
 import sys
 from argparse import ArgumentParser
 from pathlib import Path
 
-from . import __version__, find_project
+from . import __version__, events, find_project, utils
+from .config import config
+from .throttle import limits
+from .transport import TRANSPORTS
 
 LOGGER = logging.getLogger(__name__)
 
@@ -60,6 +64,14 @@ def get_parser():
         help="The maximum amount of time to wait for a server response.",
     )
 
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of files to download concurrently.",
+    )
+
     parser.add_argument(
         "-f",
         "--force",
@@ -71,6 +83,79 @@ def get_parser():
         ),
     )
 
+    parser.add_argument(
+        "--limit-rate",
+        type=str,
+        action="append",
+        default=[],
+        metavar="[HOST=]RATE",
+        help=(
+            "The maximum transfer rate in bytes per second, such as '10M'. "
+            "Use HOST=RATE to limit the rate of a single server instead of "
+            "the total rate. Can be given more than once."
+        ),
+    )
+
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        help="The maximum number of concurrent transfers from each server.",
+    )
+
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        help=(
+            "How PRIDE files are transferred: 'auto' benchmarks FTP and "
+            "HTTPS and uses the fastest, 'https' prefers HTTPS, and 'ftp' "
+            "uses only FTP. The default is read from PPX_TRANSPORT, or "
+            "'auto'."
+        ),
+    )
+
+    parser.add_argument(
+        "--verify",
+        default=False,
+        action="store_true",
+        help=(
+            "Verify the local copies of the files against the checksums "
+            "provided by the repository, instead of downloading them. Files "
+            "are hashed in parallel."
+        ),
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        default=False,
+        action="store_true",
+        help=(
+            "Report the total size of the files, which are already complete, "
+            "and the estimated time to download the rest, without "
+            "downloading them. The files that would be downloaded are "
+            "written to stdout."
+        ),
+    )
+
+    parser.add_argument(
+        "--events",
+        type=str,
+        metavar="FILE",
+        help=(
+            "Append instrumentation events, such as connection times, "
+            "reconnects, and transfer throughput, to a JSON lines file."
+        ),
+    )
+
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        metavar="FILE",
+        help=(
+            "Write the timings and throughput of each server to a file in "
+            "the OpenMetrics text format on exit."
+        ),
+    )
+
     parser.add_argument(
         "--version",
         action="version",
@@ -89,6 +174,11 @@ def main():
 
     parser = get_parser()
     args = parser.parse_args()
+    set_limits(args.limit_rate, args.max_connections)
+    if args.transport is not None:
+        config.transport = args.transport
+
+    instrument(args.events, args.metrics)
     proj = find_project(args.identifier, args.local, timeout=args.timeout)
     remote_files = proj.remote_files()
 
@@ -96,7 +186,7 @@ def main():
         matches = set()
         passed = []
         for pat in args.files:
-            pat_match = {f for f in remote_files if Path(f).match(pat)}
+            pat_match = set(proj.remote_files(pat))
             passed.append(bool(pat_match))
             matches.update(pat_match)
 
@@ -113,10 +203,25 @@ def main():
     else:
         matches = remote_files
 
+    if args.verify:
+        verify(proj, matches)
+        return
+
+    if args.dry_run:
+        dry_run(proj, matches, args.force)
+        return
+
+    if proj.manifest is not None:
+        done = proj.manifest.done(matches, proj.local)
+        if done:
+            LOGGER.info(
+                "%i of %i files are already complete.", len(done), len(matches)
+            )
+
     LOGGER.info(
         "Downloading %i files from %s...", len(matches), args.identifier
     )
-    downloaded = proj.download(matches)
+    downloaded = proj.download(matches, workers=args.workers)
 
     for local_file in downloaded:
         sys.stdout.write(str(local_file) + "\n")
@@ -124,5 +229,120 @@ def main():
     LOGGER.info("DONE!")
 
 
+def set_limits(rates, max_connections):
+    """Set the rate and connection limits for transfers.
+
+    Parameters
+    ----------
+    rates : list of str
+        The rate limits, each as "RATE" or "HOST=RATE".
+    max_connections : int or None
+        The maximum number of concurrent transfers from each host.
+
+    """
+    for rate in rates:
+        host, _, rate = rate.rpartition("=")
+        limits.set_rate(rate, host=host or None)
+
+    if max_connections is not None:
+        limits.set_connections(max_connections)
+
+
+def instrument(events_file, metrics_file):
+    """Export instrumentation events.
+
+    Parameters
+    ----------
+    events_file : str or None
+        A JSON lines file to which events are appended as they occur.
+    metrics_file : str or None
+        A file to which metrics are written in the OpenMetrics text format
+        when ppx exits.
+
+    """
+    if events_file is not None:
+        exporter = events.subscribe(events.JSONLinesExporter(events_file))
+        atexit.register(exporter.close)
+
+    if metrics_file is not None:
+        collector = events.subscribe(events.MetricsCollector())
+        atexit.register(
+            lambda: Path(metrics_file).write_text(collector.openmetrics())
+        )
+
+
+def dry_run(proj, files, force_=False):
+    """Preview the download of files.
+
+    Parameters
+    ----------
+    proj : BaseProject
+        The project.
+    files : list of str
+        The remote files to download.
+    force_ : bool, optional
+        Plan to download files that already exist.
+
+    """
+    plan = proj.plan(sorted(files), force_=force_)
+    unknown = sum(s is None for s in plan.sizes.values())
+    LOGGER.info(
+        "%i files from %s, totaling %s%s.",
+        len(plan.files),
+        proj.id,
+        utils.format_bytes(plan.total_bytes),
+        f" ({unknown} of unknown size)" if unknown else "",
+    )
+    LOGGER.info("%i files are already complete.", len(plan.complete))
+    remaining = utils.format_bytes(plan.remaining_bytes)
+    if plan.seconds is None:
+        LOGGER.info("%s to download.", remaining)
+    else:
+        LOGGER.info(
+            "%s to download, taking about %s at %s/s.",
+            remaining,
+            utils.format_seconds(plan.seconds),
+            utils.format_bytes(plan.throughput),
+        )
+
+    complete = set(plan.complete)
+    for remote in plan.files:
+        if remote not in complete:
+            sys.stdout.write(str(proj.local / remote) + "\n")
+
+
+def verify(proj, files):
+    """Verify local files against the repository checksums.
+
+    Parameters
+    ----------
+    proj : BaseProject
+        The project.
+    files : list of str
+        The remote files whose local copies should be verified.
+
+    """
+    checksums = proj.checksums()
+    files = [f for f in files if f in checksums]
+    LOGGER.info("Verifying %i files from %s...", len(files), proj.id)
+    results = proj.verify(files)
+    failed = [str(f) for f, ok in results.items() if ok is False]
+    for local_file, ok in results.items():
+        if ok:
+            sys.stdout.write(str(local_file) + "\n")
+
+    missing = sum(ok is None for ok in results.values())
+    if missing:
+        LOGGER.info("Skipped %i files that have not been downloaded.", missing)
+
+    if failed:
+        failed = "\n  ".join(failed)
+        raise ValueError(
+            f"One or more files did not match its checksum:\n  {failed}"
+        )
+
+    LOGGER.info("DONE!")
+
+
 if __name__ == "__main__":
     main()
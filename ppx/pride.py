@@ -2,12 +2,25 @@
 
 import json
 import re
+import threading
+import time
 
 import requests
 
-from . import utils
+from . import client, transport, utils
+from .checksum import parse_checksum
+from .config import config
 from .project import BaseProject
 
+# Successive fixes for the FTP addresses reported by PRIDE (Issue #18):
+URL_FIXES = [("/data/", "-"), ("pride.", "")]
+
+# The order in which to try the number of fixes, with the last that worked
+# first. Projects may be resolved from several threads, so the order is
+# read and updated under a lock:
+_URL_FIX_ORDER = list(range(len(URL_FIXES) + 1))
+_URL_FIX_LOCK = threading.Lock()
+
 
 class PrideProject(BaseProject):
     """Retrieve information about a PRIDE project.
@@ -38,6 +51,8 @@ class PrideProject(BaseProject):
     data_processing_protocol : str
     sample_processing_protocol : str
     metadata : dict
+    files_metadata : dict
+    files_details : list of dict
     fetch : bool
     timeout : float
 
@@ -53,6 +68,8 @@ class PrideProject(BaseProject):
         super().__init__(pride_id, local, fetch, timeout)
         self._rest_url = self.rest + self.id
         self._files_rest_url = self.files_rest + self.id
+        self._files_all_url = self.rest + self.id + "/files/all"
+        self._files_details = None
 
     def _validate_id(self, identifier):
         """Validate a PRIDE identifier.
@@ -76,51 +93,107 @@ class PrideProject(BaseProject):
 
     @property
     def url(self):
-        """The FTP address associated with this project."""
+        """The FTP address associated with this project.
+
+        The resolved address is cached in the local data directory for
+        ``PPX_URL_TTL`` seconds, so that it need not be resolved again. If
+        ``fetch`` is true, the cached address is ignored and replaced.
+        """
         if self._url is None:
-            url = self.files_metadata["ftp"]
+            self._url = self._read_url()
 
-            # For whatever reason, this is added now mistakenly to some URLs...
-            url = url.replace("/generated", "")
+        if self._url is None:
+            self._url = self._resolve_url()
+            with (self.local / ".pride-url").open("w+") as ref:
+                json.dump({"url": self._url, "resolved": time.time()}, ref)
 
-            # Fix PRIDE URLs (Issue #18)
-            fixes = [("", ""), ("/data/", "-"), ("pride.", "")]
-            for fix in fixes:
-                url = url.replace(*fix)
-                try:
-                    self._url = utils.test_url(url)
-                except requests.HTTPError as err:
-                    last_error = err
-                    continue
+        return self._url
 
-                return self._url
+    def _read_url(self):
+        """Read the cached FTP address, if it has not expired.
 
-            raise last_error
+        Returns
+        -------
+        str or None
+            The cached FTP address, or None if ``fetch`` is true.
 
-        return self._url
+        """
+        url_file = self.local / ".pride-url"
+        if self.fetch or not url_file.exists():
+            return None
 
-    @property
-    def metadata(self):
-        """The project metadata as a nested dictionary."""
-        if self._metadata is None:
-            metadata_file = self.local / ".pride-metadata"
-            # Try to update metadata first:
+        with url_file.open() as ref:
+            cached = json.load(ref)
+
+        if time.time() - cached["resolved"] > config.url_ttl:
+            return None
+
+        return cached["url"]
+
+    def _resolve_url(self):
+        """Find a working FTP address for the project.
+
+        PRIDE reports addresses that do not always work, so variants of the
+        address are tried. The variant that works is tried first for later
+        projects.
+
+        Returns
+        -------
+        str
+            The working FTP address.
+
+        """
+        url = self.files_metadata["ftp"]
+
+        # For whatever reason, this is added now mistakenly to some URLs...
+        url = url.replace("/generated", "")
+
+        # Fix PRIDE URLs (Issue #18)
+        candidates = [url]
+        for fix in URL_FIXES:
+            candidates.append(candidates[-1].replace(*fix))
+
+        with _URL_FIX_LOCK:
+            order = list(_URL_FIX_ORDER)
+
+        tried = set()
+        for idx in order:
+            if candidates[idx] in tried:
+                continue
+
+            tried.add(candidates[idx])
             try:
-                # Only fetch file if it doesn't exist and self.fetch is true:
-                if metadata_file.exists():
-                    assert self.fetch
+                url = utils.test_url(candidates[idx])
+            except requests.HTTPError as err:
+                last_error = err
+                continue
 
-                # Fetch the data from the remote repository
-                self._metadata = get(self._rest_url)
-                with metadata_file.open("w+") as ref:
-                    json.dump(self._metadata, ref)
+            with _URL_FIX_LOCK:
+                _URL_FIX_ORDER.remove(idx)
+                _URL_FIX_ORDER.insert(0, idx)
 
-            except (AssertionError, requests.ConnectionError) as err:
-                if not metadata_file.exists():
-                    raise err
+            return url
 
-                with metadata_file.open() as ref:
-                    self._metadata = json.load(ref)
+        raise last_error
+
+    def _mirrors(self):
+        """The HTTPS endpoint that serves the same files as the FTP address.
+
+        Returns
+        -------
+        ppx.transport.Mirrors or None
+            The mirrors, unless PPX_TRANSPORT is "ftp".
+
+        """
+        return transport.mirrors_for(self.url)
+
+    @property
+    def metadata(self):
+        """The project metadata as a nested dictionary."""
+        if self._metadata is None:
+            self._metadata = self._cached_get(
+                ".pride-metadata", self._rest_url
+            )
 
         return self._metadata
 
@@ -128,26 +201,112 @@ class PrideProject(BaseProject):
     def files_metadata(self):
         """The files metadata as a nested dictionary."""
         if self._files_metadata is None:
-            files_metadata_file = self.local / ".pride-files-metadata"
-            # Try to update files metadata first:
-            try:
-                # Only fetch file if it doesn't exist and self.fetch is true:
-                if files_metadata_file.exists():
-                    assert self.fetch
+            self._files_metadata = self._cached_get(
+                ".pride-files-metadata", self._files_rest_url
+            )
+
+        return self._files_metadata
 
-                # Fetch the data from the remote repository
-                self._files_metadata = get(self._files_rest_url)
-                with files_metadata_file.open("w+") as ref:
-                    json.dump(self._files_metadata, ref)
+    @property
+    def files_details(self):
+        """The details of each project file, as a list of dictionaries.
 
-            except (AssertionError, requests.ConnectionError) as err:
-                if not files_metadata_file.exists():
-                    raise err
+        These include the file name, size, checksum, and download locations.
+        """
+        if self._files_details is None:
+            self._files_details = self._cached_get(
+                ".pride-files", self._files_all_url
+            )
 
-                with files_metadata_file.open() as ref:
-                    self._files_metadata = json.load(ref)
+        return self._files_details
 
-        return self._files_metadata
+    def checksums(self):
+        """The checksums that PRIDE provides for the project files.
+
+        Returns
+        -------
+        dict of str, tuple of (str, str)
+            The hash algorithm and hex digest, keyed by remote file.
+
+        """
+        checksums = {}
+        for remote, details in self._remote_details():
+            checksum = parse_checksum(details.get("checksum"))
+            if checksum is not None:
+                checksums[remote] = checksum
+
+        return checksums
+
+    def remote_sizes(self):
+        """The sizes that PRIDE provides for the project files.
+
+        Returns
+        -------
+        dict of str, int
+            The size of each file in bytes, keyed by remote file. Files
+            whose size is unknown are omitted.
+
+        """
+        return {
+            remote: details["fileSizeBytes"]
+            for remote, details in self._remote_details()
+            if details.get("fileSizeBytes") is not None
+        }
+
+    def _remote_details(self):
+        """Pair the details of each file with its remote path.
+
+        Yields
+        ------
+        tuple of (str, dict)
+            The remote file, relative to the project, and its details.
+
+        """
+        sep = self.id + "/"
+        for details in self.files_details:
+            for loc in details.get("publicFileLocations", []):
+                if sep in loc["value"]:
+                    yield loc["value"].split(sep, 1)[1], details
+                    break
+
+    def _cached_get(self, cache_name, url):
+        """Get JSON from PRIDE, using a file in the local directory as a cache.
+
+        The remote repository is only queried if the cache file does not
+        exist or ``fetch`` is true.
+
+        Parameters
+        ----------
+        cache_name : str
+            The name of the cache file.
+        url : str
+            The REST URL to query.
+
+        Returns
+        -------
+        dict or list
+            The parsed JSON.
+
+        """
+        cache_file = self.local / cache_name
+        try:
+            # Only fetch file if it doesn't exist and self.fetch is true:
+            if cache_file.exists():
+                assert self.fetch
+
+            # Fetch the data from the remote repository
+            data = get(url)
+            with cache_file.open("w+") as ref:
+                json.dump(data, ref)
+
+        except (AssertionError, requests.ConnectionError) as err:
+            if not cache_file.exists():
+                raise err
+
+            with cache_file.open() as ref:
+                data = json.load(ref)
+
+        return data
 
     @property
     def title(self):
@@ -177,7 +336,7 @@ class PrideProject(BaseProject):
 
 def get(url, **kwargs):
     """Perform a GET command at the specified url."""
-    res = requests.get(url, **kwargs)
+    res = client.cached_get(url, **kwargs)
     if res.status_code != 200:
         raise requests.HTTPError(f"Error {res.status_code}: {res.text}")
 
@@ -201,7 +360,7 @@ def list_projects(timeout=10.0):
 
     """
     url = "https://www.ebi.ac.uk/pride/ws/archive/v3/projects/all"
-    res = requests.get(url, timeout=timeout)
+    res = client.get(url, timeout=timeout)
     if res.status_code != 200:
         raise requests.HTTPError(f"Error {res.status_code}: {res.text})")
 
@@ -1,13 +1,49 @@
 """A base dataset class"""
 
 from abc import ABC, abstractmethod
+from collections import namedtuple
 from pathlib import Path
 
-from cloudpathlib import AnyPath
-
-from . import utils
-from .config import config
+from . import checksum, utils
+from .config import any_path, config
 from .ftp import FTPParser
+from .index import RemoteIndex
+from .manifest import Manifest
+from .throttle import limits
+
+Plan = namedtuple(
+    "Plan",
+    [
+        "files",
+        "sizes",
+        "complete",
+        "total_bytes",
+        "remaining_bytes",
+        "throughput",
+        "seconds",
+    ],
+)
+Plan.__doc__ = """A preview of a download.
+
+Parameters
+----------
+files : list of str
+    The remote files to download.
+sizes : dict of str, int or None
+    The size of each file in bytes, or None if it is unknown.
+complete : list of str
+    The files that are already complete locally.
+total_bytes : int
+    The total size of the files with a known size.
+remaining_bytes : int
+    The total size of the files that are not yet complete.
+throughput : float or None
+    The expected throughput in bytes per second, measured from previous
+    downloads and limited by ``ppx.throttle.limits``, if known.
+seconds : float or None
+    The estimated time to download the remaining files, if the throughput
+    is known.
+"""
 
 
 class BaseProject(ABC):
@@ -49,16 +85,47 @@ class BaseProject(ABC):
     def timeout(self, wait):
         """Set the timeout for requests"""
         self._timeout = wait
-        self._parser_state = None  # Reset the connection for new timeout.
+        if getattr(self, "_parser_state", None) is not None:
+            # Connections use the new timeout when they are next acquired:
+            self._parser_state.timeout = wait
 
     @property
     def _parser(self):
         """The FTPParser"""
         if self._parser_state is None:
-            self._parser_state = FTPParser(self.url, timeout=self._timeout)
+            self._parser_state = FTPParser(
+                self.url,
+                timeout=self._timeout,
+                cache_file=self.local / ".remote_listing.json",
+                cache_ttl=config.listing_ttl,
+                mirrors=self._mirrors(),
+            )
 
         return self._parser_state
 
+    def _mirrors(self):
+        """The endpoints that serve the project files, besides FTP.
+
+        Returns
+        -------
+        ppx.transport.Mirrors or None
+            The mirrors, or None if the files are only served over FTP.
+
+        """
+        return None
+
+    @property
+    def manifest(self):
+        """The manifest of downloaded files for this project.
+
+        This is a SQLite database in the local data directory, so it is
+        None when the local data directory is in cloud storage.
+        """
+        if self._manifest is None and isinstance(self.local, Path):
+            self._manifest = Manifest(self.local / ".ppx-manifest.sqlite")
+
+        return self._manifest
+
     @property
     def _remote_files(self):
         """The cached remote files"""
@@ -69,6 +136,15 @@ class BaseProject(ABC):
         """Cache the remote files if not None"""
         cache_file = self.local / ".remote_files"
         self._cached_remote_files = cache(files, cache_file, self.fetch)
+        self._files_index = None
+
+    @property
+    def _remote_files_index(self):
+        """The RemoteIndex of the cached remote files"""
+        if self._files_index is None:
+            self._files_index = RemoteIndex(self._remote_files)
+
+        return self._files_index
 
     @property
     def _remote_dirs(self):
@@ -80,6 +156,15 @@ class BaseProject(ABC):
         """Cache the remote files if not None"""
         cache_file = self.local / ".remote_dirs"
         self._cached_remote_dirs = cache(dirs, cache_file, self.fetch)
+        self._dirs_index = None
+
+    @property
+    def _remote_dirs_index(self):
+        """The RemoteIndex of the cached remote directories"""
+        if self._dirs_index is None:
+            self._dirs_index = RemoteIndex(self._remote_dirs)
+
+        return self._dirs_index
 
     @property
     def fetch(self):
@@ -110,9 +195,10 @@ class BaseProject(ABC):
 
             self._local = config.path / self.id
         else:
-            self._local = AnyPath(path)
+            self._local = any_path(path)
 
         self._local.mkdir(exist_ok=True)
+        self._manifest = None
 
     @property
     def url(self):
@@ -143,7 +229,7 @@ class BaseProject(ABC):
             self._remote_dirs = self._parser.dirs
 
         if glob is not None:
-            dirs = [d for d in self._remote_dirs if Path(d).match(glob)]
+            dirs = self._remote_dirs_index.match(glob)
         else:
             dirs = self._remote_dirs
 
@@ -168,7 +254,7 @@ class BaseProject(ABC):
             self._remote_files = self._parser.files
 
         if glob is not None:
-            files = [f for f in self._remote_files if Path(f).match(glob)]
+            files = self._remote_files_index.match(glob)
         else:
             files = self._remote_files
 
@@ -208,7 +294,147 @@ class BaseProject(ABC):
         """
         return [f for f in utils.glob(self.local, glob) if f.is_file()]
 
-    def download(self, files, force_=False, silent=False):
+    def checksums(self):
+        """The checksums that the repository provides for the project files.
+
+        Returns
+        -------
+        dict of str, tuple of (str, str)
+            The hash algorithm and hex digest, keyed by remote file.
+
+        """
+        return {}
+
+    def remote_sizes(self):
+        """The sizes of the project files in the remote repository.
+
+        By default, the sizes are read from the FTP directory listings.
+
+        Returns
+        -------
+        dict of str, int
+            The size of each file in bytes, keyed by remote file. Files
+            whose size is unknown are omitted.
+
+        """
+        self.remote_files()
+        return {
+            name: entry.size
+            for name, entry in self._parser.entries.items()
+            if entry.type == "file" and entry.size is not None
+        }
+
+    def verify(self, files=None, workers=None):
+        """Verify local files against the repository checksums.
+
+        The files are hashed in parallel. Files without a checksum from the
+        repository are skipped.
+
+        Parameters
+        ----------
+        files : str or list of str, optional
+            The remote files whose local copies should be verified. By
+            default, all local files with a checksum are verified.
+        workers : int, optional
+            The number of files to hash concurrently. By default, the number
+            of CPUs.
+
+        Returns
+        -------
+        dict of Path, bool or None
+            Whether each local file matched its checksum, or None if the
+            file has not been downloaded.
+
+        """
+        checksums = self.checksums()
+        if files is None:
+            files = [f for f in checksums if (self.local / f).exists()]
+
+        expected = {
+            self.local / f: checksums[f]
+            for f in utils.listify(files)
+            if f in checksums
+        }
+
+        return checksum.verify_files(expected, workers=workers)
+
+    def plan(self, files=None, force_=False):
+        """Preview a download, without transferring any files.
+
+        The sizes of the files are gathered in bulk from the repository
+        metadata, and compared with the local files to find those that
+        are already complete.
+
+        Parameters
+        ----------
+        files : str or list of str, optional
+            The remote files to download. By default, all of the remote
+            files are included.
+        force_ : bool, optional
+            Plan to download the files, even if they already exist.
+
+        Returns
+        -------
+        Plan
+            The files, their sizes, and the estimated time to download them.
+
+        """
+        if files is None:
+            files = self.remote_files()
+        else:
+            files = utils.listify(files)
+            self._check_remote(files)
+
+        known = self.remote_sizes()
+        sizes = {f: known.get(f) for f in files}
+        complete = set() if force_ else self._complete(sizes)
+        remaining = sum(s or 0 for f, s in sizes.items() if f not in complete)
+        rates = [limits.rate()]
+        if self.manifest is not None:
+            rates.append(self.manifest.throughput())
+
+        throughput = min((r for r in rates if r), default=None)
+        return Plan(
+            files=files,
+            sizes=sizes,
+            complete=[f for f in files if f in complete],
+            total_bytes=sum(s or 0 for s in sizes.values()),
+            remaining_bytes=remaining,
+            throughput=throughput,
+            seconds=None if throughput is None else remaining / throughput,
+        )
+
+    def _complete(self, sizes):
+        """Find the files that are already complete locally.
+
+        Parameters
+        ----------
+        sizes : dict of str, int or None
+            The expected size of each remote file.
+
+        Returns
+        -------
+        set of str
+            The complete files.
+
+        """
+        complete = set()
+        if self.manifest is not None:
+            complete = self.manifest.done(list(sizes), self.local)
+
+        for remote, size in sizes.items():
+            if remote in complete or size is None:
+                continue
+
+            local_file = self.local / remote
+            if local_file.exists() and local_file.stat().st_size == size:
+                complete.add(remote)
+
+        return complete
+
+    def download(
+        self, files, force_=False, silent=False, workers=1, verify=False
+    ):
         """Download files from the remote repository.
 
         These files are downloaded to this project's local data directory
@@ -224,27 +450,98 @@ class BaseProject(ABC):
             Force the files to be downloaded, even if they already exist.
         silent : bool, optional
             Hide download progress bars?
+        workers : int, optional
+            The number of files to download concurrently. Each uses its own
+            connection to the remote repository.
+        verify : bool, optional
+            Verify the files against the checksums provided by the
+            repository, hashing them as they are downloaded. A file that
+            does not match is downloaded again once, then a ValueError is
+            raised.
 
         Returns
         -------
         list of Path objects
             The paths of the downloaded files.
 
+        Notes
+        -----
+        The state of each file is recorded in the project's
+        :py:attr:`manifest`. Files that the manifest records as complete,
+        and which are still present locally, are skipped without contacting
+        the remote repository.
+
         """
         files = utils.listify(files)
-        in_remote = [f in self.remote_files() for f in files]
-        if not all(in_remote):
-            missing = [f for i, f in zip(in_remote, files) if not i]
+        manifest = self.manifest
+        done = set()
+        if manifest is not None and not force_:
+            done = manifest.done(files, self.local)
 
-            raise FileNotFoundError(
-                "The following files were not found in the remote repository: "
-                f"{', '.join(missing)}"
+        todo = [f for f in files if f not in done]
+        if todo:
+            self._download(todo, manifest, force_, silent, workers, verify)
+
+        return [self.local / f for f in files]
+
+    def _download(self, files, manifest, force_, silent, workers, verify):
+        """Download files that are not already complete.
+
+        Files that are not in the manifest are first checked against the
+        remote files.
+
+        Parameters
+        ----------
+        files : list of str
+            The files to download.
+        manifest : Manifest or None
+            The manifest in which to record their state.
+        force_ : bool
+            Force the files to be downloaded, even if they already exist.
+        silent : bool
+            Hide download progress bars?
+        workers : int
+            The number of files to download concurrently.
+        verify : bool
+            Verify the files against the repository checksums?
+
+        """
+        unknown = files if manifest is None else manifest.unknown(files)
+        if unknown:
+            self._check_remote(unknown)
+
+        checksums = self.checksums() if verify else {}
+        if manifest is not None:
+            entries = self._parser._entries
+            manifest.plan(
+                (
+                    f,
+                    getattr(entries.get(f), "size", None),
+                    checksums.get(f),
+                )
+                for f in files
             )
 
-        return self._parser.download(
-            files, self.local, force_=force_, silent=silent
+        self._parser.download(
+            files,
+            self.local,
+            force_=force_,
+            silent=silent,
+            workers=workers,
+            checksums=checksums,
+            manifest=manifest,
         )
 
+    def _check_remote(self, files):
+        """Raise an error if any files are not in the remote repository."""
+        self.remote_files()
+        missing = self._remote_files_index.missing(files)
+        if missing:
+            raise FileNotFoundError(
+                "The following files were not found in the remote "
+                f"repository: {', '.join(missing)}"
+            )
+
 
 def cache(files, cache_file, fetch):
     """Save and retrieve the file or directory lists.
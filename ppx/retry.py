@@ -0,0 +1,234 @@
+"""Decide when failed FTP operations are retried.
+
+A :py:class:`RetryPolicy` separates transient errors, such as a dropped
+connection or a "421 Too many users" reply, from permanent errors, such as
+"550 No such file" or a full local disk. Permanent errors are raised
+immediately. Transient
+errors are retried after a random delay drawn from an exponentially
+increasing window ("full jitter"), so that many workers recovering from
+the same outage do not retry in lockstep.
+
+All FTP operations also share a :py:class:`CircuitBreaker`, available as
+``ppx.retry.breaker``. After too many consecutive transient failures from a
+host, its circuit opens and operations on the host fail immediately with a
+:py:class:`CircuitOpenError`, rather than each spending its own retries.
+Once the cooldown has passed, operations are attempted again, and the first
+success closes the circuit.
+
+The backoff, threshold, and cooldown are read from the PPX_FTP_BACKOFF,
+PPX_CIRCUIT_THRESHOLD, and PPX_CIRCUIT_COOLDOWN environment variables.
+"""
+
+import errno
+import ftplib
+import logging
+import random
+import socket
+import threading
+import time
+
+from . import events
+from .config import config
+
+LOGGER = logging.getLogger(__name__)
+
+# Permanent FTP replies that are commonly sent for transient conditions,
+# such as too many connections from one host:
+TRANSIENT_CODES = ("530",)
+
+# Errors from the network or the server, rather than the local filesystem:
+NETWORK_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    EOFError,
+    socket.gaierror,
+    socket.herror,
+    ftplib.error_temp,
+    ftplib.error_reply,
+    ftplib.error_proto,
+)
+
+# The errno values of other OSErrors that are raised by the network:
+NETWORK_ERRNOS = {
+    errno.ENETDOWN,
+    errno.ENETUNREACH,
+    errno.ENETRESET,
+    errno.EHOSTDOWN,
+    errno.EHOSTUNREACH,
+    errno.ENOTCONN,
+}
+
+
+class CircuitOpenError(ftplib.error_temp):
+    """Raised when a host has failed too many times in a row."""
+
+
+class RetryPolicy:
+    """When, and after how long, a failed FTP operation is retried.
+
+    Parameters
+    ----------
+    attempts : int, optional
+        The maximum number of times to attempt an operation.
+    backoff : float, optional
+        The backoff factor, in seconds. The delay before the nth retry is
+        drawn uniformly between zero and ``backoff * 2 ** (n - 1)``.
+    max_backoff : float, optional
+        The maximum delay between attempts, in seconds.
+    transient_codes : tuple of str, optional
+        The permanent (5xx) reply codes to treat as transient.
+
+    """
+
+    def __init__(
+        self,
+        attempts=10,
+        backoff=0.5,
+        max_backoff=30.0,
+        transient_codes=TRANSIENT_CODES,
+    ):
+        """Initialize the RetryPolicy"""
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.transient_codes = tuple(transient_codes)
+
+    def is_transient(self, error):
+        """Could an operation succeed if it is retried after this error?
+
+        Parameters
+        ----------
+        error : Exception
+            The error raised by the operation.
+
+        Returns
+        -------
+        bool
+            False for permanent FTP replies, local errors such as a full
+            disk, and errors that are not FTP or connection errors.
+
+        """
+        if isinstance(error, ftplib.error_perm):
+            return str(error)[:3] in self.transient_codes
+
+        if isinstance(error, NETWORK_ERRORS):
+            return True
+
+        return isinstance(error, OSError) and error.errno in NETWORK_ERRNOS
+
+    def delay(self, retry):
+        """The number of seconds to wait before a retry.
+
+        Parameters
+        ----------
+        retry : int
+            The number of the retry, starting from 1.
+
+        Returns
+        -------
+        float
+            The delay in seconds.
+
+        """
+        window = min(self.max_backoff, self.backoff * 2 ** (retry - 1))
+        return random.uniform(0, window)
+
+
+class CircuitBreaker:
+    """Stop contacting hosts that fail repeatedly.
+
+    Parameters
+    ----------
+    threshold : int or None, optional
+        The number of consecutive transient failures after which a host's
+        circuit opens. None or 0 disables the breaker.
+    cooldown : float, optional
+        The number of seconds that a circuit stays open.
+
+    """
+
+    def __init__(self, threshold=20, cooldown=60.0):
+        """Initialize the CircuitBreaker"""
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}  # host -> consecutive failures
+        self._opened = {}  # host -> time.monotonic() when opened
+        self._lock = threading.Lock()
+
+    def check(self, host):
+        """Raise an error if the circuit for a host is open.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the host has failed too many times in a row, and the cooldown
+            has not yet passed.
+
+        """
+        with self._lock:
+            opened = self._opened.get(host)
+            failures = self._failures.get(host, 0)
+
+        if opened is None:
+            return
+
+        remaining = opened + self.cooldown - time.monotonic()
+        if remaining > 0:
+            raise CircuitOpenError(
+                f"{host} failed {failures} times in a row; it will not be "
+                f"contacted again for {remaining:.0f} seconds."
+            )
+
+    def success(self, host):
+        """Record a successful operation, closing the circuit for a host.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+
+        """
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened.pop(host, None)
+
+    def failure(self, host):
+        """Record a transient failure, opening the circuit if necessary.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+
+        """
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if not self.threshold or failures < self.threshold:
+                return
+
+            # A failure after the cooldown opens the circuit again:
+            self._opened[host] = time.monotonic()
+
+        LOGGER.warning(
+            "%s failed %i times in a row; pausing for %.0f seconds.",
+            host,
+            failures,
+            self.cooldown,
+        )
+        events.emit("circuit_open", host=host, failures=failures)
+
+    def reset(self):
+        """Close every circuit."""
+        with self._lock:
+            self._failures.clear()
+            self._opened.clear()
+
+
+# The circuit breaker shared by every FTP operation:
+breaker = CircuitBreaker(config.circuit_threshold, config.circuit_cooldown)
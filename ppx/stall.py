@@ -0,0 +1,300 @@
+"""Detect stalled transfers and adapt timeouts to each host.
+
+A transfer that trickles data never triggers a socket timeout, so each FTP
+transfer is watched by a :py:class:`StallDetector`. If less than a minimum
+rate is received over a sliding window, the transfer is aborted with a
+:py:class:`StallError` and resumed from the data already received.
+
+The round-trip times and throughput observed for each host are kept in
+``ppx.stall.stats``, a :py:class:`Stats` object. They are used to choose
+the timeout for new data connections, so that an unresponsive connection to
+a fast, nearby server is abandoned sooner than one to a slow server, and to
+raise the minimum rate for hosts that are usually fast. The timeout of an
+``FTPParser`` is the upper bound. The statistics are available to callers
+with :py:meth:`Stats.get`.
+
+The minimum rate and the window are read from the PPX_STALL_RATE and
+PPX_STALL_WINDOW environment variables.
+"""
+
+import ftplib
+import threading
+import time
+from collections import deque, namedtuple
+
+from .throttle import limits
+
+HostStats = namedtuple(
+    "HostStats", ["rtt", "rtt_var", "throughput", "transfers", "stalls"]
+)
+HostStats.__doc__ = """The statistics observed for a host.
+
+Parameters
+----------
+rtt : float or None
+    The smoothed round-trip time, in seconds.
+rtt_var : float or None
+    The variation of the round-trip time, in seconds.
+throughput : float or None
+    The smoothed throughput of transfers, in bytes per second.
+transfers : int
+    The number of transfers that were measured.
+stalls : int
+    The number of transfers that stalled.
+"""
+
+
+_UNKNOWN = HostStats(None, None, None, 0, 0)
+
+
+class StallError(ftplib.error_temp):
+    """Raised when a transfer is slower than the minimum rate."""
+
+
+class StallDetector:
+    """Detect a transfer whose throughput falls below a minimum rate.
+
+    The rate is measured over a sliding window, once the transfer has been
+    running for at least that long.
+
+    Parameters
+    ----------
+    min_rate : float
+        The minimum rate, in bytes per second.
+    window : float, optional
+        The length of the window, in seconds.
+
+    """
+
+    def __init__(self, min_rate, window=30.0):
+        """Initialize the StallDetector"""
+        self.min_rate = min_rate
+        self.window = window
+        self.total = 0
+        self._resolution = window / 64
+        self._start = time.monotonic()
+        self._samples = deque([(self._start, 0)])  # (time, total bytes)
+
+    def update(self, n_bytes):
+        """Record received data and check the rate.
+
+        Parameters
+        ----------
+        n_bytes : int
+            The number of bytes received.
+
+        Raises
+        ------
+        StallError
+            If the rate over the window is below the minimum.
+
+        """
+        now = time.monotonic()
+        self.total += n_bytes
+        last = self._samples[-1][0]
+        if len(self._samples) > 1 and now - last < self._resolution:
+            self._samples[-1] = (last, self.total)
+        else:
+            self._samples.append((now, self.total))
+
+        # Keep one sample from before the start of the window:
+        cutoff = now - self.window
+        while len(self._samples) > 1 and self._samples[1][0] <= cutoff:
+            self._samples.popleft()
+
+        since, received = self._samples[0]
+        if now - self._start < self.window or since > cutoff:
+            return
+
+        rate = (self.total - received) / (now - since)
+        if rate < self.min_rate:
+            raise StallError(
+                f"Transfer stalled at {rate:.0f} bytes/s, below the minimum "
+                f"of {self.min_rate:.0f} bytes/s."
+            )
+
+
+class Stats:
+    """The round-trip times and throughput observed for each host.
+
+    Round-trip times are smoothed as in TCP (RFC 6298), and throughput with
+    an exponentially weighted moving average.
+
+    Parameters
+    ----------
+    min_timeout : float, optional
+        The shortest timeout to use for a data connection, in seconds.
+    stall_fraction : float, optional
+        The fraction of a host's typical throughput below which a transfer
+        is considered stalled, if that is more than the minimum rate.
+    alpha : float, optional
+        The weight of each new round-trip time and throughput.
+    beta : float, optional
+        The weight of each new round-trip time variation.
+
+    """
+
+    def __init__(
+        self, min_timeout=5.0, stall_fraction=0.01, alpha=0.125, beta=0.25
+    ):
+        """Initialize the Stats"""
+        self.min_timeout = min_timeout
+        self.stall_fraction = stall_fraction
+        self.alpha = alpha
+        self.beta = beta
+        self._hosts = {}  # host -> HostStats
+        self._lock = threading.Lock()
+
+    def get(self, host):
+        """The statistics for a host.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+
+        Returns
+        -------
+        HostStats
+            The statistics.
+
+        """
+        with self._lock:
+            return self._hosts.get(host, _UNKNOWN)
+
+    def hosts(self):
+        """The statistics for every host.
+
+        Returns
+        -------
+        dict of str, HostStats
+            The statistics, keyed by host.
+
+        """
+        with self._lock:
+            return dict(self._hosts)
+
+    def observe_rtt(self, host, seconds):
+        """Record a round-trip time.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+        seconds : float
+            The time for a request to the host to be answered.
+
+        """
+        with self._lock:
+            cur = self._hosts.get(host, _UNKNOWN)
+            if cur.rtt is None:
+                rtt, rtt_var = seconds, seconds / 2
+            else:
+                error = abs(cur.rtt - seconds)
+                rtt_var = (1 - self.beta) * cur.rtt_var + self.beta * error
+                rtt = (1 - self.alpha) * cur.rtt + self.alpha * seconds
+
+            self._hosts[host] = cur._replace(rtt=rtt, rtt_var=rtt_var)
+
+    def observe_transfer(self, host, n_bytes, seconds):
+        """Record the throughput of a transfer.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+        n_bytes : int
+            The number of bytes transferred.
+        seconds : float
+            The duration of the transfer.
+
+        """
+        if seconds <= 0:
+            return
+
+        rate = n_bytes / seconds
+        with self._lock:
+            cur = self._hosts.get(host, _UNKNOWN)
+            if cur.throughput is not None:
+                rate = (1 - self.alpha) * cur.throughput + self.alpha * rate
+
+            self._hosts[host] = cur._replace(
+                throughput=rate, transfers=cur.transfers + 1
+            )
+
+    def observe_stall(self, host):
+        """Record a stalled transfer.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+
+        """
+        with self._lock:
+            cur = self._hosts.get(host, _UNKNOWN)
+            self._hosts[host] = cur._replace(stalls=cur.stalls + 1)
+
+    def timeout(self, host, maximum):
+        """The timeout for a new data connection to a host.
+
+        The timeout allows four retransmission timeouts (RFC 6298), but is
+        at least ``min_timeout`` seconds.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+        maximum : float or None
+            The longest timeout to use, in seconds.
+
+        Returns
+        -------
+        float or None
+            The timeout in seconds.
+
+        """
+        cur = self.get(host)
+        if cur.rtt is None:
+            return maximum
+
+        timeout = max(self.min_timeout, 4 * (cur.rtt + 4 * cur.rtt_var))
+        return timeout if maximum is None else min(timeout, maximum)
+
+    def min_rate(self, host, min_rate):
+        """The rate below which a transfer from a host has stalled.
+
+        This is a fraction of the host's typical throughput, if that is more
+        than ``min_rate``, but less than half of any rate limit.
+
+        Parameters
+        ----------
+        host : str
+            The host.
+        min_rate : float
+            The minimum rate, in bytes per second.
+
+        Returns
+        -------
+        float
+            The rate in bytes per second.
+
+        """
+        throughput = self.get(host).throughput
+        if throughput is not None:
+            min_rate = max(min_rate, self.stall_fraction * throughput)
+
+        for limit in (limits.rate(), limits.rate(host)):
+            if limit is not None:
+                min_rate = min(min_rate, limit / 2)
+
+        return min_rate
+
+    def clear(self):
+        """Forget every host."""
+        with self._lock:
+            self._hosts.clear()
+
+
+# The statistics shared by every FTP transfer:
+stats = Stats()
@@ -0,0 +1,243 @@
+"""Limit the bandwidth and concurrency of transfers.
+
+All of the FTP and HTTP transfers in a process share a single set of
+:py:class:`Limits`, available as ``ppx.throttle.limits``. A global rate
+limit applies to the total bandwidth of every transfer, while per-host rate
+limits apply to the transfers from a single server. The number of
+concurrent transfers from each host can also be capped. Rates are enforced
+with token buckets, so short bursts are allowed while the average rate is
+kept below the limit.
+
+The initial limits are read from the PPX_LIMIT_RATE and PPX_MAX_CONNECTIONS
+environment variables.
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from .config import config
+
+# The multipliers for rate suffixes, as used by wget and curl:
+UNITS = {"": 1, "k": 2**10, "m": 2**20, "g": 2**30}
+
+RATE = re.compile(r"^\s*(\d+(?:\.\d*)?)\s*([kmg]?)(?:i?b)?(?:/s)?\s*$", re.I)
+
+
+class TokenBucket:
+    """A thread-safe token bucket.
+
+    Each byte transferred consumes a token, and tokens are added at a
+    constant rate up to the size of the bucket. A transfer that consumes
+    more tokens than are available waits until the deficit is refilled, and
+    later transfers wait behind it.
+
+    Parameters
+    ----------
+    rate : float
+        The number of tokens added per second.
+    burst : float, optional
+        The maximum number of tokens in the bucket. The default is one
+        second's worth.
+
+    """
+
+    def __init__(self, rate, burst=None):
+        """Initialize the TokenBucket"""
+        self.rate = float(rate)
+        self.burst = self.rate if burst is None else float(burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, tokens):
+        """Take tokens from the bucket, waiting until they are available.
+
+        Parameters
+        ----------
+        tokens : int
+            The number of tokens to take.
+
+        Returns
+        -------
+        float
+            The number of seconds spent waiting.
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._tokens -= tokens
+            self._updated = now
+            wait = max(0.0, -self._tokens / self.rate)
+
+        if wait:
+            time.sleep(wait)
+
+        return wait
+
+
+class Limits:
+    """The rate and connection limits for transfers.
+
+    Hosts are identified by their hostname, such as
+    ``"ftp.pride.ebi.ac.uk"``. Limits set without a host apply to all
+    transfers.
+    """
+
+    def __init__(self):
+        """Initialize the Limits"""
+        self._buckets = {}  # host -> TokenBucket
+        self._connections = {}  # host -> int
+        self._semaphores = {}  # host -> (int, BoundedSemaphore)
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate, host=None):
+        """Limit the bandwidth of transfers.
+
+        Parameters
+        ----------
+        rate : int, float, str, or None
+            The maximum rate in bytes per second. Strings may use the suffixes
+            "k", "M", and "G", such as ``"10M"``. None or 0 removes the
+            limit.
+        host : str, optional
+            The host to limit. By default, the total rate of all transfers
+            is limited.
+
+        """
+        rate = parse_rate(rate)
+        with self._lock:
+            if rate:
+                self._buckets[host] = TokenBucket(rate)
+            else:
+                self._buckets.pop(host, None)
+
+    def set_connections(self, connections, host=None):
+        """Limit the number of concurrent transfers from a host.
+
+        Parameters
+        ----------
+        connections : int or None
+            The maximum number of concurrent transfers. None or 0 removes the
+            limit.
+        host : str, optional
+            The host to limit. By default, the limit applies separately to
+            each host without a limit of its own.
+
+        """
+        with self._lock:
+            if connections:
+                self._connections[host] = int(connections)
+            else:
+                self._connections.pop(host, None)
+
+    def clear(self):
+        """Remove all limits."""
+        with self._lock:
+            self._buckets.clear()
+            self._connections.clear()
+
+    def rate(self, host=None):
+        """The rate limit for a host.
+
+        Parameters
+        ----------
+        host : str, optional
+            The host. By default, the limit on the total rate is returned.
+
+        Returns
+        -------
+        float or None
+            The maximum rate in bytes per second, if limited.
+
+        """
+        bucket = self._buckets.get(host)
+        return None if bucket is None else bucket.rate
+
+    def throttle(self, host, n_bytes):
+        """Wait until a number of bytes may be transferred.
+
+        Parameters
+        ----------
+        host : str
+            The host of the transfer.
+        n_bytes : int
+            The number of bytes transferred.
+
+        """
+        if not self._buckets:
+            return
+
+        for key in (None, host):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.consume(n_bytes)
+
+    def connection(self, host):
+        """Reserve one of the transfers allowed for a host.
+
+        Parameters
+        ----------
+        host : str
+            The host of the transfer.
+
+        Returns
+        -------
+        context manager
+            Holds the reservation until it exits, waiting for one to be
+            available first.
+
+        """
+        with self._lock:
+            limit = self._connections.get(host, self._connections.get(None))
+            if limit is None:
+                return nullcontext()
+
+            current = self._semaphores.get(host)
+            if current is None or current[0] != limit:
+                current = (limit, threading.BoundedSemaphore(limit))
+                self._semaphores[host] = current
+
+        return _hold(current[1])
+
+
+@contextmanager
+def _hold(semaphore):
+    """Hold a semaphore."""
+    with semaphore:
+        yield
+
+
+def parse_rate(rate):
+    """Parse a transfer rate.
+
+    Parameters
+    ----------
+    rate : int, float, str, or None
+        The rate in bytes per second. Strings may use the suffixes "k", "M",
+        and "G" for kibibytes, mebibytes, and gibibytes, such as ``"10M"``
+        or ``"1.5 GiB/s"``.
+
+    Returns
+    -------
+    float or None
+        The rate in bytes per second.
+
+    """
+    if rate is None or isinstance(rate, (int, float)):
+        return rate
+
+    match = RATE.match(rate)
+    if match is None:
+        raise ValueError(f"Unable to parse the transfer rate '{rate}'.")
+
+    return float(match.group(1)) * UNITS[match.group(2).lower()]
+
+
+# The limits used by every transfer:
+limits = Limits()
+limits.set_rate(config.limit_rate)
+limits.set_connections(config.max_connections)
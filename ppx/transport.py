@@ -0,0 +1,530 @@
+"""Choose between endpoints that serve the same files over FTP and HTTPS.
+
+PRIDE serves each project over both FTP and HTTPS, and which is faster
+depends on the network. A :py:class:`Mirrors` object holds the endpoints for
+a project: the FTP address used by an ``FTPParser`` and one or more HTTP(S)
+addresses with the same directory layout. Before the first transfer, each
+endpoint is benchmarked by downloading the start of the file. Files are
+then transferred from the endpoint with the highest throughput, and the
+throughput of every transfer updates its endpoint's estimate, so that an
+endpoint that slows down is abandoned for the next file.
+
+If a transfer fails, it resumes from the data already received over the
+next endpoint, and the endpoint that failed is not preferred again until a
+cooldown has passed. HTTP transfers use range requests to resume.
+
+Which endpoints are used is read from the PPX_TRANSPORT environment
+variable: "auto" benchmarks them, "https" prefers HTTPS, and "ftp" uses
+only FTP.
+"""
+
+import ftplib
+import logging
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+import requests
+import urllib3
+
+from . import events
+from .client import Session
+from .config import config
+from .ftp import MIN_MEASURED
+from .stall import stats
+
+LOGGER = logging.getLogger(__name__)
+
+# The transports that can be selected with PPX_TRANSPORT:
+TRANSPORTS = ("auto", "ftp", "https")
+
+
+class FTPEndpoint:
+    """Transfer files with an FTPParser.
+
+    Parameters
+    ----------
+    url : str
+        The FTP address of the files, which must be the address of the
+        ``FTPParser`` that is used.
+
+    """
+
+    def __init__(self, url):
+        """Initialize the FTPEndpoint"""
+        self.url = url
+
+    def probe(self, parser, fname, n_bytes):
+        """Download the start of a file.
+
+        Parameters
+        ----------
+        parser : ppx.ftp.FTPParser
+            The parser for this endpoint.
+        fname : str
+            The remote file name.
+        n_bytes : int
+            The maximum number of bytes to download.
+
+        Returns
+        -------
+        int
+            The number of bytes received.
+
+        """
+        parser.connect()
+        received = 0
+        try:
+            parser.connection.voidcmd("TYPE I")
+            with parser.connection.transfercmd(f"RETR {fname}") as sock:
+                while received < n_bytes:
+                    data = sock.recv(min(parser.blocksize, n_bytes - received))
+                    if not data:
+                        break
+
+                    received += len(data)
+        finally:
+            # The server may still be sending, so the session can't be reused.
+            parser._drop()
+
+        return received
+
+    def transfer(self, parser, fname, fhandle, pbar, hasher=None):
+        """Transfer a file, resuming after the data already in the file.
+
+        Parameters
+        ----------
+        parser : ppx.ftp.FTPParser
+            The parser for this endpoint.
+        fname : str
+            The remote file name.
+        fhandle : file object
+            The opened file object where the data will be written.
+        pbar : tqdm.tqdm
+            The progress bar to update.
+        hasher : hashlib hash object, optional
+            A hash to update with the data as it is written.
+
+        """
+        parser._with_reconnects(
+            parser._transfer_file,
+            fname=fname,
+            fhandle=fhandle,
+            pbar=pbar,
+            hasher=hasher,
+        )
+
+
+class HTTPEndpoint:
+    """Transfer files with HTTP range requests.
+
+    Failed requests are not retried here; the transfer is resumed over
+    another endpoint instead.
+
+    Parameters
+    ----------
+    url : str
+        The HTTP(S) address of the files.
+
+    """
+
+    def __init__(self, url):
+        """Initialize the HTTPEndpoint"""
+        self.url = url.rstrip("/")
+        self.host = urlsplit(url).hostname
+        self._session = None
+
+    @property
+    def session(self):
+        """The HTTP session, without retries."""
+        if self._session is None:
+            self._session = Session(
+                pool_size=config.http_pool_size,
+                retries=0,
+                timeout=config.http_timeout,
+            )
+
+        return self._session
+
+    def _get(self, parser, fname, start, end=None):
+        """Request a byte range of a file.
+
+        Parameters
+        ----------
+        parser : ppx.ftp.FTPParser
+            The parser for the FTP endpoint, whose timeout is used.
+        fname : str
+            The remote file name.
+        start : int
+            The first byte.
+        end : int, optional
+            The last byte. By default, the rest of the file is requested.
+
+        Returns
+        -------
+        requests.Response
+            The streaming response.
+
+        """
+        url = f"{self.url}/{quote(fname)}"
+        # Compressed data would not line up with the byte offsets:
+        headers = {"Accept-Encoding": "identity"}
+        byte_range = start or end is not None
+        if byte_range:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+
+        res = self.session.get(
+            url,
+            headers=headers,
+            stream=True,
+            timeout=stats.timeout(self.host, parser.timeout),
+        )
+        if res.status_code == 200 and byte_range:
+            res.close()
+            raise ftplib.error_temp(f"{self.url} ignored a range request.")
+
+        if res.status_code not in (200, 206):
+            res.close()
+            raise requests.HTTPError(
+                f"Error {res.status_code}: {url}", response=res
+            )
+
+        return res
+
+    def probe(self, parser, fname, n_bytes):
+        """Download the start of a file.
+
+        Parameters
+        ----------
+        parser : ppx.ftp.FTPParser
+            The parser for the FTP endpoint, whose timeout is used.
+        fname : str
+            The remote file name.
+        n_bytes : int
+            The maximum number of bytes to download.
+
+        Returns
+        -------
+        int
+            The number of bytes received.
+
+        """
+        with self._get(parser, fname, 0, n_bytes - 1) as res:
+            return len(res.content)
+
+    def transfer(self, parser, fname, fhandle, pbar, hasher=None):
+        """Transfer a file, resuming after the data already in the file.
+
+        Parameters
+        ----------
+        parser : ppx.ftp.FTPParser
+            The parser for the FTP endpoint, whose settings are used.
+        fname : str
+            The remote file name.
+        fhandle : file object
+            The opened file object where the data will be written.
+        pbar : tqdm.tqdm
+            The progress bar to update.
+        hasher : hashlib hash object, optional
+            A hash to update with the data as it is written.
+
+        """
+        write = parser._writer(fhandle, pbar, hasher)
+        started = time.monotonic()
+        try:
+            with self._get(parser, fname, fhandle.tell()) as res:
+                for data in _blocks(res, parser.blocksize):
+                    write(data)
+        finally:
+            write.flush(final=True)
+            parser._record_transfer(
+                fname, started, write.first_block, write.total
+            )
+
+        pbar.close()
+
+
+class Mirrors:
+    """Endpoints that serve the same files, ranked by their throughput.
+
+    Mirrors are shared by an ``FTPParser`` and its clones, so they are
+    thread-safe.
+
+    Parameters
+    ----------
+    ftp_url : str
+        The FTP address of the files, which is served by the ``FTPParser``.
+    http_urls : list of str, optional
+        HTTP(S) addresses that serve the same files. Endpoints whose
+        throughput is unknown are preferred in this order, before FTP.
+    probe_size : int, optional
+        The number of bytes downloaded from each endpoint to benchmark it
+        before the first transfer, which should be at least
+        ``ppx.ftp.MIN_MEASURED``. 0 disables the benchmark.
+    cooldown : float, optional
+        The number of seconds for which an endpoint that failed is only
+        used if every other endpoint fails.
+    alpha : float, optional
+        The weight of each new transfer in an endpoint's throughput.
+
+    """
+
+    def __init__(
+        self, ftp_url, http_urls=(), probe_size=2**20, cooldown=60.0, alpha=0.3
+    ):
+        """Initialize the Mirrors"""
+        self.endpoints = [HTTPEndpoint(u) for u in http_urls]
+        self.endpoints.append(FTPEndpoint(ftp_url))
+        self.probe_size = probe_size
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self._throughput = {}  # url -> bytes per second
+        self._failed = {}  # url -> time.monotonic() when it failed
+        self._probed = not probe_size
+        self._current = None
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+
+    def throughput(self):
+        """The estimated throughput of each endpoint.
+
+        Returns
+        -------
+        dict of str, float or None
+            The bytes per second, keyed by the endpoint address, or None if
+            it is unknown.
+
+        """
+        with self._lock:
+            return {e.url: self._throughput.get(e.url) for e in self.endpoints}
+
+    def ranked(self):
+        """The endpoints, from the first to try to the last.
+
+        Returns
+        -------
+        list of FTPEndpoint or HTTPEndpoint
+            The endpoints that have not failed recently, fastest first,
+            followed by those that have.
+
+        """
+        now = time.monotonic()
+        with self._lock:
+            failed = {
+                url
+                for url, when in self._failed.items()
+                if now - when < self.cooldown
+            }
+            return sorted(
+                self.endpoints,
+                key=lambda e: (
+                    e.url in failed,
+                    -(self._throughput.get(e.url) or 0.0),
+                ),
+            )
+
+    def record(self, endpoint, n_bytes, seconds):
+        """Update the throughput of an endpoint.
+
+        Parameters
+        ----------
+        endpoint : FTPEndpoint or HTTPEndpoint
+            The endpoint.
+        n_bytes : int
+            The number of bytes transferred.
+        seconds : float
+            The duration of the transfer, including connecting.
+
+        """
+        if seconds <= 0:
+            return
+
+        rate = n_bytes / seconds
+        with self._lock:
+            previous = self._throughput.get(endpoint.url)
+            if previous is not None:
+                rate = (1 - self.alpha) * previous + self.alpha * rate
+
+            self._throughput[endpoint.url] = rate
+            self._failed.pop(endpoint.url, None)
+
+    def failure(self, endpoint, error):
+        """Stop preferring an endpoint until the cooldown has passed.
+
+        Parameters
+        ----------
+        endpoint : FTPEndpoint or HTTPEndpoint
+            The endpoint.
+        error : Exception
+            The error that it raised.
+
+        """
+        LOGGER.warning("%s failed: %s", endpoint.url, error)
+        with self._lock:
+            self._failed[endpoint.url] = time.monotonic()
+
+    def probe(self, parser, fname):
+        """Benchmark every endpoint by downloading the start of a file.
+
+        Samples smaller than ``ppx.ftp.MIN_MEASURED`` bytes are not
+        recorded, and the endpoints are benchmarked again with the next
+        file.
+
+        Parameters
+        ----------
+        parser : ppx.ftp.FTPParser
+            The parser for the FTP endpoint.
+        fname : str
+            The remote file to download.
+
+        """
+        short = False
+        for endpoint in self.endpoints:
+            started = time.monotonic()
+            n_bytes, error = 0, None
+            try:
+                n_bytes = endpoint.probe(parser, fname, self.probe_size)
+            except ftplib.all_errors as err:
+                error = err
+                self.failure(endpoint, err)
+            else:
+                # The time to fetch a small file is mostly latency:
+                if n_bytes >= MIN_MEASURED:
+                    seconds = time.monotonic() - started
+                    self.record(endpoint, n_bytes, seconds)
+                else:
+                    short = True
+
+            events.emit(
+                "probe",
+                url=endpoint.url,
+                file=fname,
+                n_bytes=n_bytes,
+                seconds=time.monotonic() - started,
+                error=None if error is None else repr(error),
+            )
+
+        # Try again with a larger file:
+        self._probed = not short
+
+    def transfer(self, parser, fname, fhandle, pbar, hasher=None, size=None):
+        """Transfer a file from the fastest endpoint, failing over if needed.
+
+        The endpoints are benchmarked before the first transfer of a file
+        that is large enough to measure their throughput. If an endpoint
+        fails, the transfer resumes over the next one.
+
+        Parameters
+        ----------
+        parser : ppx.ftp.FTPParser
+            The parser for the FTP endpoint.
+        fname : str
+            The remote file name.
+        fhandle : file object
+            The opened file object where the data will be written.
+        pbar : tqdm.tqdm
+            The progress bar to update.
+        hasher : hashlib hash object, optional
+            A hash to update with the data as it is written.
+        size : int, optional
+            The size of the remote file in bytes, if it is known.
+
+        """
+        measurable = size is None or size >= MIN_MEASURED
+        if not self._probed and measurable:
+            with self._probe_lock:
+                if not self._probed:
+                    self.probe(parser, fname)
+
+        for endpoint in self.ranked():
+            self._select(endpoint)
+            start, started = fhandle.tell(), time.monotonic()
+            try:
+                endpoint.transfer(parser, fname, fhandle, pbar, hasher)
+            except ftplib.all_errors as err:
+                last_err = err
+                self.failure(endpoint, err)
+                continue
+
+            n_bytes = fhandle.tell() - start
+            if n_bytes >= MIN_MEASURED:
+                self.record(endpoint, n_bytes, time.monotonic() - started)
+
+            return
+
+        raise last_err
+
+    def _select(self, endpoint):
+        """Log when the endpoint in use changes."""
+        with self._lock:
+            previous, self._current = self._current, endpoint.url
+
+        if previous is not None and previous != endpoint.url:
+            LOGGER.info("Switching from %s to %s.", previous, endpoint.url)
+            events.emit("failover", url=endpoint.url, previous=previous)
+
+
+def _blocks(res, blocksize):
+    """Yield the data of a streaming response as soon as it arrives.
+
+    Unlike ``iter_content()``, a partial block is not lost if the connection
+    is closed, so the transfer can resume after it.
+
+    Parameters
+    ----------
+    res : requests.Response
+        The streaming response.
+    blocksize : int
+        The maximum number of bytes to yield at once.
+
+    Yields
+    ------
+    bytes
+        The data.
+
+    """
+    if not hasattr(res.raw, "read1"):
+        # urllib3 < 2 only returns complete blocks:
+        yield from res.iter_content(blocksize)
+        return
+
+    try:
+        while data := res.raw.read1(blocksize, decode_content=True):
+            yield data
+    except urllib3.exceptions.HTTPError as err:
+        raise requests.ConnectionError(err) from err
+
+
+def mirrors_for(url, transport=None):
+    """Find the HTTPS mirror of an FTP address.
+
+    The HTTPS address has the same host and path as the FTP address, as
+    for PRIDE.
+
+    Parameters
+    ----------
+    url : str
+        The FTP address.
+    transport : {"auto", "ftp", "https"}, optional
+        Benchmark FTP and HTTPS, prefer HTTPS, or only use FTP. By default,
+        this is read from the PPX_TRANSPORT environment variable.
+
+    Returns
+    -------
+    Mirrors or None
+        The mirrors, or None if only FTP should be used. Addresses with an
+        explicit port have no HTTPS mirror.
+
+    """
+    transport = (config.transport if transport is None else transport).lower()
+    if transport not in TRANSPORTS:
+        raise ValueError(
+            f"Unknown transport {transport!r}; use one of {TRANSPORTS}."
+        )
+
+    if transport == "ftp" or urlsplit(url).port is not None:
+        return None
+
+    https_url = url.replace("ftp://", "https://", 1)
+    probe_size = 0 if transport == "https" else 2**20
+    return Mirrors(url, [https_url], probe_size=probe_size)
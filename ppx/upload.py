@@ -0,0 +1,523 @@
+"""Stream downloads directly into cloud storage.
+
+Writing to a :py:class:`cloudpathlib.CloudPath` normally stages the whole
+file in a local cache and uploads it only once the file is closed. A
+:py:class:`CloudSink` instead splits the data into parts as it is written
+and uploads each part in parallel, so that only a few parts are held in
+memory at once. The parts are combined with the native multipart API of
+each provider: multipart uploads on S3, uncommitted blocks on Azure, and
+object composition on Google Cloud Storage. Other clients, such as the
+local mock clients of cloudpathlib, store each part as a hidden object next
+to the final file.
+
+Uploaded parts outlive a failed download, so a new sink for the same file
+resumes after the last complete part.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+LOGGER = logging.getLogger(__name__)
+
+# The maximum number of parts in an S3 multipart upload:
+MAX_PARTS = 10_000
+
+
+class CloudSink:
+    """A writable file object that uploads to cloud storage in parts.
+
+    At most ``workers`` parts are uploaded at once; writing blocks while
+    they are in flight, so memory use is bounded by about
+    ``(workers + 1) * part_size`` bytes.
+
+    Parameters
+    ----------
+    path : cloudpathlib.CloudPath
+        The file to create.
+    size : int, optional
+        The expected size of the file, in bytes. If provided, the file is
+        only created when exactly this many bytes have been written, and
+        its size in the cloud is verified afterwards.
+    part_size : int, optional
+        The size of each part, in bytes. It is increased if the file would
+        otherwise need more than 10,000 parts.
+    workers : int, optional
+        The number of parts to upload concurrently.
+    restart : bool, optional
+        Discard any parts uploaded previously, instead of resuming.
+
+    """
+
+    def __init__(
+        self, path, size=None, part_size=2**25, workers=4, restart=False
+    ):
+        """Initialize the CloudSink"""
+        self.path = path
+        self.size = size
+        self.part_size = part_size
+        if size is not None:
+            self.part_size = max(part_size, -(-size // MAX_PARTS))
+
+        self._parts = _parts_for(path)
+        if restart:
+            self._parts.abort()
+
+        # Resume after the last contiguous part of the expected size:
+        uploaded = self._parts.list()
+        self._tags = {}
+        number = 1
+        while uploaded.get(number, (None,))[0] == self.part_size:
+            self._tags[number] = uploaded[number][1]
+            number += 1
+
+        # Parts beyond the end of the file are from a different file:
+        if size is not None and (number - 1) * self.part_size > size:
+            LOGGER.warning(
+                "The uploaded parts of %s exceed its size; restarting.", path
+            )
+            self._parts.abort()
+            self._tags, number = {}, 1
+
+        self._next = number
+        self._pos = (number - 1) * self.part_size
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers)
+        self._futures = []
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self.closed = False
+        if self._pos:
+            LOGGER.info("Resuming upload of %s at byte %i", path, self._pos)
+
+    def __enter__(self):
+        """Use the sink as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Complete the upload, unless an error occurred."""
+        if exc_type is None:
+            self.close()
+        else:
+            # Keep the parts that finished, so the upload can be resumed:
+            self._finish_parts(raise_errors=False)
+            self.closed = True
+
+    def tell(self):
+        """The number of bytes written, including any resumed parts."""
+        return self._pos
+
+    def write(self, data):
+        """Write data, uploading each part as it is filled.
+
+        Parameters
+        ----------
+        data : bytes
+            The data to write.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+
+        """
+        self._buffer.extend(data)
+        self._pos += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._submit(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+        return len(data)
+
+    def close(self):
+        """Upload the final part and create the file.
+
+        Raises
+        ------
+        EOFError
+            Fewer bytes were written than expected. The uploaded parts are
+            kept, so that the upload can be resumed.
+        OSError
+            The size of the created file is not the expected size.
+
+        """
+        if self.closed:
+            return
+
+        if self.size is not None and self._pos != self.size:
+            self._finish_parts(raise_errors=False)
+            self.closed = True
+            raise EOFError(
+                f"Only {self._pos} of {self.size} bytes were written to "
+                f"{self.path}."
+            )
+
+        if self._buffer or not self._tags:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+
+        self._finish_parts()
+        self._parts.complete(sorted(self._tags.items()))
+        self.closed = True
+        if self.size is not None and self.path.stat().st_size != self.size:
+            raise OSError(
+                f"{self.path} is {self.path.stat().st_size} bytes, but "
+                f"{self.size} bytes were expected."
+            )
+
+    def abort(self):
+        """Stop the upload and discard its parts."""
+        self._finish_parts(raise_errors=False)
+        self._parts.abort()
+        self.closed = True
+
+    def _submit(self, data):
+        """Upload the next part in the background."""
+        self._raise_failed()
+        self._slots.acquire()
+        number = self._next
+        self._next += 1
+        future = self._pool.submit(self._upload, number, data)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _upload(self, number, data):
+        """Upload one part and record its tag."""
+        tag = self._parts.upload(number, data)
+        with self._lock:
+            self._tags[number] = tag
+
+    def _finish_parts(self, raise_errors=True):
+        """Wait for the parts in flight and stop the workers."""
+        wait(self._futures)
+        self._pool.shutdown()
+        if raise_errors:
+            self._raise_failed()
+
+    def _raise_failed(self):
+        """Raise the error from the first part that failed, if any."""
+        for future in self._futures:
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+
+
+class _ObjectParts:
+    """Upload parts as objects in a hidden directory next to the final file.
+
+    Each file has its own directory of parts, so that finding the parts of
+    one file does not list the parts of every other file.
+
+    Parameters
+    ----------
+    path : cloudpathlib.CloudPath
+        The file to create.
+
+    """
+
+    def __init__(self, path):
+        """Initialize the _ObjectParts"""
+        self.path = path
+        self.parts_dir = path.with_name(f".{path.name}.parts")
+
+    def part(self, number):
+        """The object in which a part is stored."""
+        return self.parts_dir / f"{number:05d}"
+
+    def list(self):
+        """The uploaded parts.
+
+        Returns
+        -------
+        dict of int, tuple of (int, str)
+            The size and tag of each part, by part number.
+
+        """
+        if not self.parts_dir.exists():
+            return {}
+
+        return {
+            int(obj.name): (obj.stat().st_size, obj.name)
+            for obj in self.parts_dir.iterdir()
+            if obj.name.isdigit()
+        }
+
+    def upload(self, number, data):
+        """Upload a part, returning its tag."""
+        part = self.part(number)
+        part.write_bytes(data)
+        return part.name
+
+    def complete(self, parts):
+        """Combine the parts into the final file.
+
+        Parameters
+        ----------
+        parts : list of tuple of (int, str)
+            The number and tag of each part, in order.
+
+        """
+        self._combine([self.part(number) for number, _ in parts])
+        self.abort()
+
+    def abort(self):
+        """Remove the uploaded parts."""
+        for number in self.list():
+            self.part(number).unlink(missing_ok=True)
+
+        # Only storage with real directories keeps an empty one:
+        if self.parts_dir.exists():
+            self.parts_dir.rmdir()
+
+    def _combine(self, parts):
+        """Copy the parts into the final file, one at a time."""
+        with self.path.open("wb", force_overwrite_to_cloud=True) as out:
+            for part in parts:
+                out.write(part.read_bytes())
+
+
+class _GSParts(_ObjectParts):
+    """Upload parts as objects and compose them on Google Cloud Storage.
+
+    Parts are uploaded with the google client directly, because writing
+    through a CloudPath stages the data in the local file cache of
+    cloudpathlib.
+    """
+
+    # The maximum number of objects in one compose request:
+    max_sources = 32
+
+    def __init__(self, path):
+        """Initialize the _GSParts"""
+        super().__init__(path)
+        self.bucket = path.client.client.bucket(path.bucket)
+
+    def upload(self, number, data):
+        """Upload a part, returning its tag."""
+        part = self.part(number)
+        self.bucket.blob(part.blob).upload_from_string(data)
+        return part.name
+
+    def _combine(self, parts):
+        """Compose the parts into the final file on the server."""
+        bucket = self.bucket
+        blob = bucket.blob(self.path.blob)
+        sources = [bucket.blob(p.blob) for p in parts]
+        blob.compose(sources[: self.max_sources])
+        step = self.max_sources - 1
+        for idx in range(self.max_sources, len(sources), step):
+            blob.compose([blob] + sources[idx : idx + step])
+
+
+class _S3Parts:
+    """Upload parts with an S3 multipart upload.
+
+    An unfinished multipart upload for the same key is resumed.
+
+    Parameters
+    ----------
+    path : cloudpathlib.S3Path
+        The file to create.
+
+    """
+
+    def __init__(self, path):
+        """Initialize the _S3Parts"""
+        self.path = path
+        self.client = path.client.client
+        self.kwargs = {"Bucket": path.bucket, "Key": path.key}
+        self._upload_id = None
+        self._lock = threading.Lock()
+
+    @property
+    def upload_id(self):
+        """The ID of the multipart upload, starting one if needed."""
+        with self._lock:
+            if self._upload_id is None:
+                self._upload_id = self._find_upload()
+
+            if self._upload_id is None:
+                res = self.client.create_multipart_upload(**self.kwargs)
+                self._upload_id = res["UploadId"]
+
+            return self._upload_id
+
+    def list(self):
+        """The uploaded parts.
+
+        Returns
+        -------
+        dict of int, tuple of (int, str)
+            The size and ETag of each part, by part number.
+
+        """
+        self._upload_id = self._find_upload()
+        if self._upload_id is None:
+            return {}
+
+        parts = {}
+        paginator = self.client.get_paginator("list_parts")
+        pages = paginator.paginate(**self.kwargs, UploadId=self._upload_id)
+        for page in pages:
+            for part in page.get("Parts", []):
+                parts[part["PartNumber"]] = (part["Size"], part["ETag"])
+
+        return parts
+
+    def upload(self, number, data):
+        """Upload a part, returning its ETag."""
+        res = self.client.upload_part(
+            **self.kwargs,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        return res["ETag"]
+
+    def complete(self, parts):
+        """Complete the multipart upload.
+
+        Parameters
+        ----------
+        parts : list of tuple of (int, str)
+            The number and ETag of each part, in order.
+
+        """
+        self.client.complete_multipart_upload(
+            **self.kwargs,
+            UploadId=self.upload_id,
+            MultipartUpload={
+                "Parts": [{"PartNumber": n, "ETag": t} for n, t in parts]
+            },
+        )
+        self._upload_id = None
+
+    def abort(self):
+        """Abort any unfinished multipart uploads for the file."""
+        upload_id = self._find_upload()
+        while upload_id is not None:
+            self.client.abort_multipart_upload(
+                **self.kwargs, UploadId=upload_id
+            )
+            upload_id = self._find_upload()
+
+        self._upload_id = None
+
+    def _find_upload(self):
+        """The ID of the latest unfinished upload for the file, if any."""
+        res = self.client.list_multipart_uploads(
+            Bucket=self.kwargs["Bucket"],
+            Prefix=self.kwargs["Key"],
+        )
+        uploads = [
+            u for u in res.get("Uploads", []) if u["Key"] == self.kwargs["Key"]
+        ]
+        if not uploads:
+            return None
+
+        return max(uploads, key=lambda u: u["Initiated"])["UploadId"]
+
+
+class _AzureParts:
+    """Upload parts as uncommitted blocks of an Azure block blob.
+
+    Uncommitted blocks are kept by Azure for a week, so an unfinished
+    upload can be resumed until then.
+
+    Parameters
+    ----------
+    path : cloudpathlib.AzureBlobPath
+        The file to create.
+
+    """
+
+    def __init__(self, path):
+        """Initialize the _AzureParts"""
+        self.path = path
+        self.blob = path.client.service_client.get_blob_client(
+            container=path.container,
+            blob=path.blob,
+        )
+        self._restart = False
+
+    def list(self):
+        """The uploaded parts.
+
+        Returns
+        -------
+        dict of int, tuple of (int, str)
+            The size and block ID of each part, by part number.
+
+        """
+        from azure.core.exceptions import ResourceNotFoundError
+
+        if self._restart:
+            return {}
+
+        # A blob with only uncommitted blocks does not exist yet:
+        try:
+            _, uncommitted = self.blob.get_block_list(
+                block_list_type="uncommitted"
+            )
+        except ResourceNotFoundError:
+            return {}
+
+        return {
+            int(block.id): (block.size, block.id)
+            for block in uncommitted
+            if block.id.isdigit()
+        }
+
+    def upload(self, number, data):
+        """Upload a part, returning its block ID."""
+        block_id = f"{number:06d}"
+        self.blob.stage_block(block_id, data)
+        return block_id
+
+    def complete(self, parts):
+        """Commit the blocks as the content of the blob.
+
+        Parameters
+        ----------
+        parts : list of tuple of (int, str)
+            The number and block ID of each part, in order.
+
+        """
+        from azure.storage.blob import BlobBlock
+
+        self.blob.commit_block_list([BlobBlock(t) for _, t in parts])
+
+    def abort(self):
+        """Ignore the blocks that were uploaded previously.
+
+        Azure discards uncommitted blocks that are not part of the block
+        list when the blob is committed.
+        """
+        self._restart = True
+
+
+def _parts_for(path):
+    """Choose how to upload the parts of a file.
+
+    Parameters
+    ----------
+    path : cloudpathlib.CloudPath
+        The file to create.
+
+    Returns
+    -------
+    object
+        The part uploader for the cloud provider.
+
+    """
+    from cloudpathlib import AzureBlobPath, GSPath, S3Path
+
+    if isinstance(path, S3Path):
+        return _S3Parts(path)
+
+    if isinstance(path, AzureBlobPath):
+        return _AzureParts(path)
+
+    if isinstance(path, GSPath):
+        return _GSParts(path)
+
+    return _ObjectParts(path)
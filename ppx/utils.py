@@ -2,6 +2,8 @@
 
 import requests
 
+from . import client
+
 
 def listify(obj):
     """Turn an object into a list, but don't split strings"""
@@ -32,7 +34,7 @@ def test_url(url):
     if http_url[-1] != "/":
         http_url += "/"
 
-    res = requests.head(http_url)
+    res = client.head(http_url)
     if res.status_code != 200:
         raise requests.HTTPError(f"Unable to connect to URL: {url}")
 
@@ -57,3 +59,51 @@ def glob(path, pattern=None):
     """
     pattern = "**/[!.]*" if pattern is None else pattern
     return sorted(path.glob(pattern))
+
+
+def format_bytes(n_bytes):
+    """Format a number of bytes for humans.
+
+    Parameters
+    ----------
+    n_bytes : float
+        The number of bytes.
+
+    Returns
+    -------
+    str
+        The size with binary units, such as "1.5 GiB".
+
+    """
+    for unit in ["B", "KiB", "MiB", "GiB", "TiB"]:
+        if abs(n_bytes) < 1024 or unit == "TiB":
+            break
+
+        n_bytes /= 1024
+
+    return f"{n_bytes:.0f} {unit}" if unit == "B" else f"{n_bytes:.1f} {unit}"
+
+
+def format_seconds(seconds):
+    """Format a duration for humans.
+
+    Parameters
+    ----------
+    seconds : float
+        The duration in seconds.
+
+    Returns
+    -------
+    str
+        The duration, such as "1h 02m 03s".
+
+    """
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+
+    return f"{seconds}s"
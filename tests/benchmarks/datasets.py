@@ -0,0 +1,164 @@
+"""Synthetic datasets shaped like PRIDE and MassIVE projects.
+
+Three projects are created in the FTP root, each stressing a different part
+of ppx:
+
+- A MassIVE project with a deep directory tree, like the "peak" directory
+  of a reanalysis.
+- A PRIDE project with many small files in a flat directory.
+- A MassIVE project with a few very large raw files. These are sparse, so
+  they take no space on the server's disk, but they are written in full by
+  the client.
+
+Datasets are only written once; building an existing dataset again only
+creates the files that are missing.
+"""
+
+import os
+import random
+from collections import namedtuple
+from pathlib import Path
+
+Scale = namedtuple(
+    "Scale",
+    [
+        "depth",
+        "breadth",
+        "leaf_files",
+        "small_files",
+        "small_size",
+        "large_files",
+        "large_size",
+        "projects",
+        "latency",
+    ],
+)
+Scale.__doc__ = """The size of the synthetic datasets.
+
+Parameters
+----------
+depth : int
+    The depth of the deep directory tree.
+breadth : int
+    The number of subdirectories of each directory in the deep tree.
+leaf_files : int
+    The number of files in each leaf directory of the deep tree.
+small_files : int
+    The number of files in the project with many small files.
+small_size : int
+    The size of each small file, in bytes.
+large_files : int
+    The number of large files.
+large_size : int
+    The size of each large file, in bytes.
+projects : int
+    The number of identifiers to resolve with ProteomeXchange.
+latency : float
+    The seconds that the slow FTP server waits before each response.
+"""
+
+SCALES = {
+    "tiny": Scale(2, 3, 2, 200, 1_000, 2, 2**20, 10, 0.001),
+    "quick": Scale(3, 5, 2, 5_000, 4_000, 2, 2**28, 100, 0.002),
+    "full": Scale(4, 8, 3, 100_000, 4_000, 3, 2**31, 1_000, 0.005),
+}
+
+Dataset = namedtuple("Dataset", ["id", "repo", "path", "files"])
+Dataset.__doc__ = """A synthetic project.
+
+Parameters
+----------
+id : str
+    The project identifier.
+repo : {"PRIDE", "MassIVE"}
+    The repository that hosts the project.
+path : str
+    The path of the project on the FTP server.
+files : dict of str, int
+    The size of each file, keyed by its path within the project.
+"""
+
+DEEP = "MSV000900001"
+MANY = "PXD900002"
+LARGE = "MSV000900003"
+
+
+def build(root, scale):
+    """Write the synthetic datasets.
+
+    Parameters
+    ----------
+    root : str or pathlib.Path
+        The directory served by the FTP server.
+    scale : Scale
+        The size of the datasets.
+
+    Returns
+    -------
+    dict of str, Dataset
+        The datasets, keyed by project identifier.
+
+    """
+    root = Path(root)
+    datasets = [
+        Dataset(DEEP, "MassIVE", f"MSV/{DEEP}", deep_tree(scale)),
+        Dataset(
+            MANY,
+            "PRIDE",
+            f"pride/data/archive/2026/01/{MANY}",
+            {
+                f"spectra_{i:06d}.mgf": scale.small_size
+                for i in range(scale.small_files)
+            },
+        ),
+        Dataset(
+            LARGE,
+            "MassIVE",
+            f"MSV/{LARGE}",
+            {
+                f"raw/run_{i:02d}.raw": scale.large_size
+                for i in range(scale.large_files)
+            },
+        ),
+    ]
+
+    content = random.Random(1).randbytes(max(scale.small_size, 1_000))
+    for dataset in datasets:
+        for fname, size in dataset.files.items():
+            path = root / dataset.path / fname
+            if path.exists() and path.stat().st_size == size:
+                continue
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if size > len(content):
+                with path.open("wb") as ref:
+                    ref.truncate(size)
+            else:
+                path.write_bytes(content[:size])
+
+    return {d.id: d for d in datasets}
+
+
+def deep_tree(scale):
+    """The files in the deep directory tree.
+
+    Parameters
+    ----------
+    scale : Scale
+        The size of the datasets.
+
+    Returns
+    -------
+    dict of str, int
+        The size of each file, keyed by its path.
+
+    """
+    dirs = ["peak"]
+    for level in range(scale.depth):
+        dirs = [f"{d}/{level}_{i}" for d in dirs for i in range(scale.breadth)]
+
+    return {
+        f"{d}/{os.path.basename(d)}_{i}.mzML": scale.small_size
+        for d in dirs
+        for i in range(scale.leaf_files)
+    }
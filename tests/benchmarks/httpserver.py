@@ -0,0 +1,231 @@
+"""A local stand-in for the PRIDE, MassIVE, and ProteomeXchange APIs.
+
+Only the endpoints that ppx uses are implemented, and their responses
+describe the synthetic datasets. Any ProteomeXchange identifier that is not
+one of the datasets can also be resolved: even identifiers are reported to
+be in PRIDE and odd identifiers in MassIVE.
+"""
+
+import csv
+import io
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SQL_ID = re.compile(r'dataset = "(\w+)"')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handle a single HTTP request."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        time.sleep(self.server.latency)
+        if self.server.failures:
+            self.send(self.server.failures.pop(0), b"")
+            return
+
+        url = urlparse(self.path)
+        routes = [
+            (r"/pride/projects/files-path/(\w+)$", self.pride_files_path),
+            (r"/pride/projects/(\w+)/files/all$", self.pride_files),
+            (r"/pride/projects/(\w+)$", self.pride_project),
+            (r"/massive/proxi/(\w+)$", self.massive_proxi),
+            (r"/massive/datasette.csv$", self.massive_file_info),
+            (r"/proteomexchange$", self.proteomexchange),
+        ]
+        for pattern, route in routes:
+            match = re.match(pattern, url.path)
+            if match is None:
+                continue
+
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            body = route(*match.groups(), **query)
+            if body is None:
+                break
+
+            ctype = "text/csv" if url.path.endswith(".csv") else None
+            self.send(200, body, ctype or "application/json")
+            return
+
+        self.send(404, b"Not found")
+
+    def send(self, status, body, ctype="text/plain"):
+        """Send a response."""
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+    # Routes ------------------------------------------------------------------
+    def dataset(self, identifier, repo):
+        """A synthetic dataset, if it is in the repository."""
+        dataset = self.server.datasets.get(identifier)
+        if dataset is None or dataset.repo != repo:
+            return None
+
+        return dataset
+
+    def pride_project(self, identifier):
+        return _json(
+            {
+                "accession": identifier,
+                "title": f"Synthetic project {identifier}",
+                "projectDescription": "A benchmark dataset.",
+                "sampleProcessingProtocol": "None.",
+                "dataProcessingProtocol": "None.",
+                "doi": f"10.6019/{identifier}",
+            }
+        )
+
+    def pride_files_path(self, identifier):
+        dataset = self.dataset(identifier, "PRIDE")
+        if dataset is None:
+            return None
+
+        return _json({"ftp": self.server.ftp_url + dataset.path})
+
+    def pride_files(self, identifier):
+        dataset = self.dataset(identifier, "PRIDE")
+        if dataset is None:
+            return None
+
+        base = "ftp://ftp.pride.ebi.ac.uk/" + dataset.path
+        return _json(
+            [
+                {
+                    "projectAccessions": [identifier],
+                    "fileName": fname.rsplit("/", 1)[-1],
+                    "fileSizeBytes": size,
+                    "publicFileLocations": [
+                        {
+                            "name": "FTP Protocol",
+                            "value": f"{base}/{fname}",
+                        }
+                    ],
+                }
+                for fname, size in dataset.files.items()
+            ]
+        )
+
+    def massive_proxi(self, identifier):
+        dataset = self.dataset(identifier, "MassIVE")
+        if dataset is None:
+            return None
+
+        url = self.server.ftp_url + dataset.path
+        link = {"accession": "MS:1002852", "value": url}
+        return _json({"identifier": identifier, "datasetLink": [link]})
+
+    def massive_file_info(self, sql="", **_):
+        match = SQL_ID.search(sql)
+        dataset = match and self.dataset(match.group(1), "MassIVE")
+        if not dataset:
+            return None
+
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(["usi", "filepath", "dataset", "collection", "size"])
+        for fname, size in dataset.files.items():
+            usi = f"mzspec:{dataset.id}:{fname}"
+            path = f"f.{dataset.id}/{fname}"
+            collection = fname.split("/", 1)[0]
+            writer.writerow([usi, path, dataset.id, collection, f"{size:,}"])
+
+        return out.getvalue().encode()
+
+    def proteomexchange(self, **query):
+        identifier = query.get("ID", "").upper()
+        dataset = self.server.datasets.get(identifier)
+        if dataset is None:
+            repo = "PRIDE" if int(identifier[3:] or 0) % 2 == 0 else "MassIVE"
+        else:
+            repo = dataset.repo
+
+        if repo == "PRIDE":
+            ids = []
+            links = [
+                {
+                    "name": "Dataset FTP location",
+                    "value": f"ftp://ftp.pride.ebi.ac.uk/{identifier}",
+                }
+            ]
+        else:
+            msv = f"MSV{identifier[3:].rjust(9, '0')}"
+            ids = [{"accession": "MS:1002487", "value": msv}]
+            links = []
+
+        return _json(
+            {
+                "accession": identifier,
+                "identifiers": ids,
+                "fullDatasetLinks": links,
+            }
+        )
+
+
+def _json(data):
+    """Encode JSON."""
+    return json.dumps(data).encode()
+
+
+class MetadataServer(ThreadingHTTPServer):
+    """Serve the repository APIs for the synthetic datasets on 127.0.0.1.
+
+    Parameters
+    ----------
+    datasets : dict of str, Dataset
+        The synthetic datasets, keyed by project identifier.
+    ftp_url : str
+        The URL of the FTP server that serves the datasets.
+    latency : float, optional
+        Seconds to wait before responding to each request.
+
+    Attributes
+    ----------
+    requests : list of str
+        The path of every request that the server has received.
+    failures : list of int
+        Status codes to respond with before responding normally.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, datasets, ftp_url, latency=0.0):
+        """Initialize the server"""
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.datasets = datasets
+        self.ftp_url = ftp_url
+        self.latency = latency
+        self.requests = []
+        self.failures = []
+        self._thread = None
+
+    @property
+    def url(self):
+        """The URL for the root of the server."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shutdown the server."""
+        self.shutdown()
+        self.server_close()
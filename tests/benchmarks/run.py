@@ -0,0 +1,601 @@
+"""Run the offline benchmarks.
+
+The benchmarks serve synthetic datasets from local FTP servers and a local
+stand-in for the repository APIs, so they need no internet access and
+measure only ppx. Each benchmark is repeated, and the results are appended
+to a JSON lines file along with the git commit, so that they can be
+compared across commits::
+
+    python -m tests.benchmarks.run --scale quick
+    python -m tests.benchmarks.run --scale quick --compare
+
+The "full" scale includes a project with 100,000 small files and several
+2 GiB files, so it needs several GiB of free disk space. Use ``--data`` to
+keep the synthetic datasets between runs.
+"""
+
+import json
+import logging
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import ppx
+from ppx import client
+from ppx.config import config
+from ppx.factory import PXDFactory, find_projects
+from ppx.ftp import FTPParser
+from ppx.massive import MassiveProject
+from ppx.pride import PrideProject
+
+from ..ftpserver import LocalFTPServer
+from . import datasets
+from .datasets import DEEP, LARGE, MANY, SCALES
+from .httpserver import MetadataServer
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """Register a benchmark.
+
+    A benchmark is called with the :py:class:`Environment` to prepare
+    anything that should not be timed. It returns a function that does the
+    timed work and returns counts of what was done, such as the number of
+    ``files`` and ``bytes``.
+    """
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+class Environment:
+    """The local servers and datasets for the benchmarks.
+
+    While the environment is active, ppx uses the local servers instead of
+    the PRIDE, MassIVE, and ProteomeXchange APIs.
+
+    Parameters
+    ----------
+    root : pathlib.Path
+        The directory for the datasets and downloads.
+    scale : datasets.Scale
+        The size of the datasets.
+
+    """
+
+    def __init__(self, root, scale):
+        """Initialize the Environment"""
+        self.root = Path(root)
+        self.scale = scale
+        self.datasets = datasets.build(self.root / "ftp", scale)
+        self.ftp = LocalFTPServer(self.root / "ftp")
+        self.slow_ftp = LocalFTPServer(
+            self.root / "ftp", latency=scale.latency
+        )
+        self.http = MetadataServer(self.datasets, self.ftp.url)
+        self._patches = []
+        self._runs = 0
+
+    def __enter__(self):
+        """Start the servers and point ppx to them."""
+        for server in (self.ftp, self.slow_ftp, self.http):
+            server.start()
+
+        patches = {
+            (PrideProject, "rest"): f"{self.http.url}/pride/projects/",
+            (PrideProject, "files_rest"): (
+                f"{self.http.url}/pride/projects/files-path/"
+            ),
+            (PXDFactory, "rest"): f"{self.http.url}/proteomexchange",
+            (MassiveProject, "_api"): f"{self.http.url}/massive/datasette.csv",
+            (MassiveProject, "_proxy_api"): f"{self.http.url}/massive/proxi/",
+            (config, "_path"): None,
+            (config, "_http_cache_dir"): None,
+        }
+        for (obj, attr), value in patches.items():
+            self._patches.append((obj, attr, getattr(obj, attr)))
+            setattr(obj, attr, value)
+
+        return self
+
+    def __exit__(self, *args):
+        """Restore ppx and stop the servers."""
+        for obj, attr, value in reversed(self._patches):
+            setattr(obj, attr, value)
+
+        self._patches.clear()
+        ppx.ftp.connections.clear()
+        client.reset()
+        for server in (self.ftp, self.slow_ftp, self.http):
+            server.stop()
+
+    def fresh(self):
+        """Start again with an empty ppx data directory and HTTP cache.
+
+        Returns
+        -------
+        pathlib.Path
+            The new ppx data directory.
+
+        """
+        work = self.root / "work"
+        shutil.rmtree(work, ignore_errors=True)
+        self._runs += 1
+        path = work / str(self._runs)
+        path.mkdir(parents=True)
+        config.path = path
+        config.http_cache_dir = path / ".http-cache"
+        ppx.ftp.connections.clear()
+        client.reset()
+        return path
+
+    def url(self, identifier, slow=False):
+        """The FTP URL of a dataset.
+
+        Parameters
+        ----------
+        identifier : str
+            The project identifier.
+        slow : bool, optional
+            Use the FTP server that adds latency to each response?
+
+        Returns
+        -------
+        str
+            The URL.
+
+        """
+        server = self.slow_ftp if slow else self.ftp
+        return server.url + self.datasets[identifier].path
+
+    def pin_url(self, proj):
+        """Skip the resolution of a PRIDE project's FTP address.
+
+        PRIDE addresses are tested over HTTP, which the local FTP servers
+        cannot answer, so the address is written to the project's cache.
+
+        Parameters
+        ----------
+        proj : PrideProject
+            The project.
+
+        """
+        cached = {"url": self.url(proj.id), "resolved": time.time()}
+        with (proj.local / ".pride-url").open("w+") as ref:
+            json.dump(cached, ref)
+
+    def size(self, identifier):
+        """The total size of a dataset, in bytes."""
+        return sum(self.datasets[identifier].files.values())
+
+
+# Listing ---------------------------------------------------------------------
+@benchmark
+def list_deep_tree(env):
+    """List a deep directory tree."""
+    env.fresh()
+    parser = FTPParser(env.url(DEEP))
+    return lambda: {"files": len(parser.files)}
+
+
+@benchmark
+def list_many_files(env):
+    """List a directory with many files."""
+    env.fresh()
+    parser = FTPParser(env.url(MANY))
+    return lambda: {"files": len(parser.files)}
+
+
+@benchmark
+def list_slow_server(env):
+    """List a deep directory tree from a server with latency."""
+    env.fresh()
+    parser = FTPParser(env.url(DEEP, slow=True))
+    return lambda: {"files": len(parser.files)}
+
+
+@benchmark
+def list_cached(env):
+    """List a deep directory tree from a cached listing."""
+    cache_file = env.fresh() / "listing.json"
+    kwargs = {"cache_file": cache_file, "cache_ttl": 3600}
+    assert FTPParser(env.url(DEEP), **kwargs).files
+    parser = FTPParser(env.url(DEEP), **kwargs)
+    return lambda: {"files": len(parser.files)}
+
+
+# Metadata --------------------------------------------------------------------
+@benchmark
+def pride_metadata(env):
+    """Retrieve the metadata and file details of a PRIDE project."""
+    proj = PrideProject(MANY, local=env.fresh() / MANY)
+
+    def run():
+        assert proj.title
+        return {"files": len(proj.remote_sizes())}
+
+    return run
+
+
+@benchmark
+def massive_file_info(env):
+    """Retrieve the file information of a MassIVE project."""
+    proj = MassiveProject(DEEP, local=env.fresh() / DEEP)
+    return lambda: {"files": len(proj.remote_files())}
+
+
+@benchmark
+def resolve_projects(env):
+    """Resolve many ProteomeXchange identifiers concurrently."""
+    env.fresh()
+    ids = [f"PXD{800_000 + i}" for i in range(env.scale.projects)]
+
+    def run():
+        projects = dict(find_projects(ids))
+        errors = [p for p in projects.values() if isinstance(p, Exception)]
+        assert not errors, errors[0]
+        return {"projects": len(projects)}
+
+    return run
+
+
+# Downloads -------------------------------------------------------------------
+def _download(env, identifier, slow=False, **kwargs):
+    """Prepare the download of every file in a dataset."""
+    dest = env.fresh() / identifier
+    parser = FTPParser(env.url(identifier, slow), **kwargs)
+    files = list(env.datasets[identifier].files)
+
+    def run():
+        parser.download(files, dest, silent=True)
+        return {"files": len(files), "bytes": env.size(identifier)}
+
+    return run
+
+
+@benchmark
+def download_large(env):
+    """Download a few large files."""
+    return _download(env, LARGE, segment_threshold=2 * env.scale.large_size)
+
+
+@benchmark
+def download_segmented(env):
+    """Download a few large files in segments."""
+    return _download(env, LARGE, segment_threshold=1)
+
+
+@benchmark
+def download_with_drops(env):
+    """Download large files from a server with latency that drops one."""
+    env.slow_ftp.drop_after = env.scale.large_size // 2
+    return _download(env, LARGE, slow=True)
+
+
+@benchmark
+def project_many_files(env):
+    """Download many small files of a PRIDE project concurrently."""
+    proj = PrideProject(MANY, local=env.fresh() / MANY)
+    env.pin_url(proj)
+    files = list(env.datasets[MANY].files)
+
+    def run():
+        proj.download(files, silent=True, workers=8)
+        return {"files": len(files), "bytes": env.size(MANY)}
+
+    return run
+
+
+@benchmark
+def cli_deep_tree(env):
+    """Resolve and download a MassIVE project with the command line."""
+    from ppx.ppx import main
+
+    local = env.fresh() / DEEP
+    # PXD900001 is resolved by ProteomeXchange to the deep MassIVE project:
+    argv = ["ppx", "-l", str(local), "-w", "4", "PXD900001"]
+
+    def run():
+        with (
+            patch.object(sys, "argv", argv),
+            redirect_stdout(StringIO()) as out,
+            redirect_stderr(StringIO()),
+        ):
+            main()
+
+        n_files = len(out.getvalue().splitlines())
+        assert n_files == len(env.datasets[DEEP].files)
+        return {"files": n_files, "bytes": env.size(DEEP)}
+
+    return run
+
+
+# Running ---------------------------------------------------------------------
+def run(env, names, repeats=3):
+    """Run benchmarks.
+
+    Parameters
+    ----------
+    env : Environment
+        The active benchmark environment.
+    names : list of str
+        The benchmarks to run.
+    repeats : int, optional
+        The number of times to run each benchmark.
+
+    Returns
+    -------
+    dict of str, dict
+        The fastest and median ``seconds`` of each benchmark, its counts,
+        and the rate of each count per second.
+
+    """
+    results = {}
+    for name in names:
+        seconds = []
+        for _ in range(repeats):
+            work = BENCHMARKS[name](env)
+            start = time.perf_counter()
+            counts = work()
+            seconds.append(time.perf_counter() - start)
+
+        best = min(seconds)
+        results[name] = {
+            "seconds": best,
+            "median": statistics.median(seconds),
+            **counts,
+            **{f"{k}_per_s": v / best for k, v in counts.items()},
+        }
+
+    return results
+
+
+def record(path, scale, results):
+    """Append results to a JSON lines file.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The file.
+    scale : str
+        The name of the scale of the datasets.
+    results : dict of str, dict
+        The results of each benchmark.
+
+    Returns
+    -------
+    dict
+        The record that was written.
+
+    """
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    entry = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status),
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "results": results,
+    }
+    with Path(path).open("a") as ref:
+        ref.write(json.dumps(entry) + "\n")
+
+    return entry
+
+
+def baseline(path, scale, commit=None):
+    """Find previous results to compare against.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The JSON lines file of previous results.
+    scale : str
+        The name of the scale of the datasets.
+    commit : str, optional
+        The commit, or a prefix of it, to use. By default the most recent
+        results are used.
+
+    Returns
+    -------
+    dict or None
+        The record of the previous results, if any.
+
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    found = None
+    with path.open() as ref:
+        for line in ref:
+            entry = json.loads(line)
+            if entry["scale"] != scale:
+                continue
+
+            if commit is None or (entry["commit"] or "").startswith(commit):
+                found = entry
+
+    return found
+
+
+def compare(previous, results, max_slowdown=None):
+    """Compare results against previous results.
+
+    Parameters
+    ----------
+    previous : dict
+        The record of the previous results.
+    results : dict of str, dict
+        The current results of each benchmark.
+    max_slowdown : float, optional
+        The ratio of the current to the previous time above which a
+        benchmark is considered to have regressed.
+
+    Returns
+    -------
+    lines : list of str
+        A table of the previous and current times.
+    regressed : list of str
+        The benchmarks that regressed.
+
+    """
+    commit = (previous["commit"] or "unknown")[:10]
+    lines = [f"{'benchmark':<24} {commit:>12} {'current':>12} {'ratio':>8}"]
+    regressed = []
+    for name, result in results.items():
+        old = previous["results"].get(name)
+        if old is None:
+            lines.append(f"{name:<24} {'-':>12} {result['seconds']:>11.3f}s")
+            continue
+
+        ratio = result["seconds"] / old["seconds"]
+        flag = ""
+        if max_slowdown is not None and ratio > max_slowdown:
+            regressed.append(name)
+            flag = "  slower"
+
+        lines.append(
+            f"{name:<24} {old['seconds']:>11.3f}s {result['seconds']:>11.3f}s"
+            f" {ratio:>7.2f}x{flag}"
+        )
+
+    return lines, regressed
+
+
+def _git(*args):
+    """Run a git command in the repository, returning its output."""
+    try:
+        res = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return res.stdout.strip()
+
+
+def get_parser():
+    """Parse the command line arguments"""
+    parser = ArgumentParser(description="Run the offline ppx benchmarks.")
+    parser.add_argument(
+        "-s",
+        "--scale",
+        choices=list(SCALES),
+        default="quick",
+        help="The size of the synthetic datasets.",
+    )
+    parser.add_argument(
+        "-k",
+        "--select",
+        action="append",
+        default=[],
+        help="Only run the benchmarks whose names contain this text.",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeats",
+        type=int,
+        default=3,
+        help="The number of times to run each benchmark.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="benchmarks.jsonl",
+        help="The JSON lines file to which results are appended.",
+    )
+    parser.add_argument(
+        "--data",
+        help="A directory in which to keep the synthetic datasets.",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Compare the results to the previous results in the output.",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="The commit whose results to compare to.",
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        help="Exit with an error if a benchmark is this many times slower.",
+    )
+    return parser
+
+
+def main(argv=None):
+    """Run the benchmarks.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The command line arguments.
+
+    Returns
+    -------
+    int
+        The exit status: 1 if a benchmark regressed, otherwise 0.
+
+    """
+    args = get_parser().parse_args(argv)
+    names = [
+        n
+        for n in BENCHMARKS
+        if not args.select or any(s in n for s in args.select)
+    ]
+    previous = None
+    if args.compare or args.baseline or args.max_slowdown:
+        previous = baseline(args.output, args.scale, args.baseline)
+
+    root = args.data or tempfile.mkdtemp(prefix="ppx-benchmarks-")
+    logging.disable(logging.WARNING)
+    try:
+        with Environment(root, SCALES[args.scale]) as env:
+            results = run(env, names, args.repeats)
+    finally:
+        logging.disable(logging.NOTSET)
+        if args.data is None:
+            shutil.rmtree(root, ignore_errors=True)
+        else:
+            shutil.rmtree(Path(root) / "work", ignore_errors=True)
+
+    record(args.output, args.scale, results)
+    for name, result in results.items():
+        rate = ""
+        if "bytes_per_s" in result:
+            rate = f"  {result['bytes_per_s'] / 2**20:.1f} MiB/s"
+        elif "files_per_s" in result:
+            rate = f"  {result['files_per_s']:.0f} files/s"
+        elif "projects_per_s" in result:
+            rate = f"  {result['projects_per_s']:.0f} projects/s"
+
+        sys.stdout.write(f"{name:<24} {result['seconds']:>8.3f}s{rate}\n")
+
+    if previous is None:
+        return 0
+
+    lines, regressed = compare(previous, results, args.max_slowdown)
+    sys.stdout.write("\n" + "\n".join(lines) + "\n")
+    return int(bool(regressed))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
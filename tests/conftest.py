@@ -9,8 +9,13 @@ We need:
 """
 
 import ftplib
+import hashlib
 import json
+import random
 import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 import requests
@@ -23,6 +28,8 @@ from cloudpathlib.local import (
 
 import ppx
 
+from .ftpserver import LocalFTPServer
+
 
 # Set the PPX_DATA_DIRECTORY --------------------------------------------------
 @pytest.fixture(autouse=True)
@@ -32,6 +39,140 @@ def ppx_data_dir(monkeypatch, tmp_path):
     ppx.set_data_dir()
 
 
+# Don't wait between HTTP retries -------------------------------------------
+@pytest.fixture(autouse=True)
+def http_client(monkeypatch):
+    """Use a fresh HTTP session without retry backoff for each test."""
+    monkeypatch.setattr(ppx.config.config, "http_backoff", 0)
+    ppx.client.reset()
+    yield
+    ppx.client.reset()
+
+
+# Don't wait between FTP retries --------------------------------------------
+@pytest.fixture(autouse=True)
+def ftp_retries(monkeypatch):
+    """Retry FTP operations without backoff, and reset the shared state."""
+    monkeypatch.setattr(ppx.config.config, "ftp_backoff", 0)
+    yield
+    ppx.retry.breaker.reset()
+    ppx.stall.stats.clear()
+
+
+# Local HTTP server -----------------------------------------------------------
+@pytest.fixture
+def http_server():
+    """An HTTP server that serves pages with ETags.
+
+    Set ``failures`` to a list of status codes to return before succeeding,
+    and ``pages`` to a dict of the body to return for each path.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.server.requests.append(self.path)
+            if self.server.failures:
+                status = self.server.failures.pop(0)
+                self.send_response(status)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            body = self.server.pages.get(self.path, b'{"ok": true}')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    server.failures = []
+    server.pages = {}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,))
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def file_server(ftp_server):
+    """Serve the files of the local FTP server over HTTP.
+
+    Range requests are supported unless ``ranges`` is False. Set
+    ``throttle`` to sleep between chunks of ``chunk_size`` bytes, and
+    ``drop_after`` to close the connection after that many bytes. The
+    ``requests`` and the ``encodings`` they accept are recorded.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.server.requests.append((self.path, self.headers["Range"]))
+            self.server.encodings.add(self.headers["Accept-Encoding"])
+            path = self.server.root / self.path.lstrip("/")
+            if not path.is_file():
+                self.send_error(404)
+                return
+
+            data = path.read_bytes()
+            start, end = 0, len(data) - 1
+            byte_range = self.headers.get("Range")
+            if byte_range is not None and self.server.ranges:
+                first, _, last = byte_range.split("=")[1].partition("-")
+                start, end = int(first), min(end, int(last or end))
+                self.send_response(206)
+                self.send_header(
+                    "Content-Range", f"bytes {start}-{end}/{len(data)}"
+                )
+            else:
+                self.send_response(200)
+
+            body = data[start : end + 1]
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            chunk_size = self.server.chunk_size
+            for pos in range(0, len(body), chunk_size):
+                drop_after = self.server.drop_after
+                if drop_after is not None and pos >= drop_after:
+                    self.server.drop_after = None
+                    return
+
+                self.wfile.write(body[pos : pos + chunk_size])
+                time.sleep(self.server.throttle)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.root = ftp_server.root
+    server.requests = []
+    server.encodings = set()
+    server.ranges = True
+    server.throttle = 0
+    server.chunk_size = 2**16
+    server.drop_after = None
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,))
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 # Mock cloud resources --------------------------------------------------------
 @pytest.fixture
 def cloud_bucket(monkeypatch):
@@ -50,19 +191,33 @@ def cloud_bucket(monkeypatch):
     LocalS3Client.reset_default_storage_dir()
 
 
-# PRIDE projects/files-path/<accession> endpoint ------------------------------
-class MockPrideFilesPathResponse:
-    """A mock of the PRIDE files path REST response"""
+# Mock HTTP responses --------------------------------------------------------
+class MockJSONResponse:
+    """A mock of a JSON response read from a local file."""
 
     status_code = 200
+    url = "https://www.ebi.ac.uk/pride/ws/archive/v3/projects"
+    headers = {"Content-Type": "application/json"}
+    data_file = None
 
-    @staticmethod
-    def json():
-        with open("tests/data/pride_files_path_response.json") as ref:
+    def json(self):
+        with open(self.data_file) as ref:
             out = json.load(ref)
 
         return out
 
+    @property
+    def content(self):
+        with open(self.data_file, "rb") as ref:
+            return ref.read()
+
+
+# PRIDE projects/files-path/<accession> endpoint ------------------------------
+class MockPrideFilesPathResponse(MockJSONResponse):
+    """A mock of the PRIDE files path REST response"""
+
+    data_file = "tests/data/pride_files_path_response.json"
+
 
 @pytest.fixture
 def mock_pride_files_path_response(monkeypatch):
@@ -71,21 +226,14 @@ def mock_pride_files_path_response(monkeypatch):
     def mock_get(*args, **kwargs):
         return MockPrideFilesPathResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
 
 
 # PRIDE projects/<accession>/files/all endpoint -------------------------------
-class MockPrideFilesResponse:
+class MockPrideFilesResponse(MockJSONResponse):
     """A mock of the PRIDE files REST response"""
 
-    status_code = 200
-
-    @staticmethod
-    def json():
-        with open("tests/data/pride_files_response.json") as ref:
-            out = json.load(ref)
-
-        return out
+    data_file = "tests/data/pride_files_response.json"
 
 
 @pytest.fixture
@@ -95,21 +243,14 @@ def mock_pride_files_response(monkeypatch):
     def mock_get(*args, **kwargs):
         return MockPrideFilesResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
 
 
 # PRIDE projects/<accession> endpoint -----------------------------------------
-class MockPrideProjectResponse:
+class MockPrideProjectResponse(MockJSONResponse):
     """A mock of the PRIDE projects REST response"""
 
-    status_code = 200
-
-    @staticmethod
-    def json():
-        with open("tests/data/pride_project_response.json") as ref:
-            out = json.load(ref)
-
-        return out
+    data_file = "tests/data/pride_project_response.json"
 
 
 @pytest.fixture
@@ -119,7 +260,7 @@ def mock_pride_project_response(monkeypatch):
     def mock_get(*args, **kwargs):
         return MockPrideProjectResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
 
 
 # MassIVE FTP server ----------------------------------------------------------
@@ -147,6 +288,35 @@ def mock_massive_ftp_response(monkeypatch):
     monkeypatch.setattr(ftplib.FTP, "dir", mock_dir)
 
 
+# Local FTP server ------------------------------------------------------------
+@pytest.fixture
+def ftp_server(tmp_path_factory):
+    """Serve a small mock project from a local FTP server.
+
+    The project is available at ``ftp_server.url + "data/PXD000001"``.
+    """
+    root = tmp_path_factory.mktemp("ftp")
+    proj = root / "data" / "PXD000001"
+    rng = random.Random(42)
+    files = {
+        "big.raw": 300_000,
+        "small.mzML": 5_000,
+        "README.txt": 100,
+        "sub/result.txt": 2_000,
+        "sub/deeper/peaks.mgf": 10_000,
+    }
+
+    for fname, size in files.items():
+        path = proj / fname
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(rng.randbytes(size))
+
+    server = LocalFTPServer(root).start()
+    yield server
+    ppx.ftp.connections.clear()
+    server.stop()
+
+
 # Mock up local files ---------------------------------------------------------
 @pytest.fixture
 def local_files(tmp_path):
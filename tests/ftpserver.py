@@ -0,0 +1,323 @@
+"""A minimal FTP server for testing ppx without internet access.
+
+This implements just enough of RFC 959 (and the MLSD/MLST/SIZE/MDTM/REST
+extensions) for ftplib, and thus ppx, to talk to it. Files are served
+read-only from a local directory.
+"""
+
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Handle a single FTP control connection."""
+
+    def setup(self):
+        super().setup()
+        self.cwd = PurePosixPath("/")
+        self.rest = 0
+        self.pasv = None
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.sessions += 1
+        self.reply("220 ppx test server ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+
+            line = line.decode().rstrip("\r\n")
+            cmd, _, arg = line.partition(" ")
+            cmd = cmd.upper()
+            self.server.commands.append(cmd)
+            time.sleep(self.server.latency)
+            method = getattr(self, f"ftp_{cmd.lower()}", None)
+            if self.server.failures.get(cmd, 0) > 0:
+                self.server.failures[cmd] -= 1
+                self.reply("421 Service not available, closing connection")
+                break
+
+            if method is None:
+                self.reply(f"502 {cmd} not implemented")
+                continue
+
+            if method(arg) is False:
+                break
+
+    def finish(self):
+        if self.pasv is not None:
+            self.pasv.close()
+
+        super().finish()
+
+    # Helpers -----------------------------------------------------------------
+    def resolve(self, arg):
+        """Resolve a client path to a path on the local disk."""
+        path = PurePosixPath(arg) if arg.startswith("/") else self.cwd / arg
+        parts = []
+        for part in path.parts[1:]:
+            if part == "..":
+                if parts:
+                    parts.pop()
+            elif part not in ("", "."):
+                parts.append(part)
+
+        return PurePosixPath("/", *parts), self.server.root.joinpath(*parts)
+
+    def data_connection(self):
+        """Accept the pending passive data connection."""
+        conn, _ = self.pasv.accept()
+        self.pasv.close()
+        self.pasv = None
+        return conn
+
+    @staticmethod
+    def modify(path):
+        """The modification time of a file as a datetime."""
+        return datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
+
+    def list_line(self, path):
+        kind = "d" if path.is_dir() else "-"
+        size = 0 if path.is_dir() else path.stat().st_size
+        date = self.modify(path).strftime("%b %d %H:%M")
+        return f"{kind}rw-r--r--  1 ftp  ftp {size:>12} {date} {path.name}"
+
+    def fact_line(self, path, name=None):
+        kind = "dir" if path.is_dir() else "file"
+        facts = [f"type={kind}"]
+        if not path.is_dir():
+            facts.append(f"size={path.stat().st_size}")
+
+        facts.append(f"modify={self.modify(path):%Y%m%d%H%M%S}")
+        return ";".join(facts) + "; " + (path.name if name is None else name)
+
+    def send_lines(self, lines):
+        conn = self.data_connection()
+        with conn:
+            conn.sendall("".join(f"{x}\r\n" for x in lines).encode())
+
+        self.reply("226 Transfer complete")
+
+    # Commands ----------------------------------------------------------------
+    def ftp_user(self, arg):
+        self.reply("331 Password required")
+
+    def ftp_pass(self, arg):
+        self.reply("230 Logged in")
+
+    def ftp_type(self, arg):
+        self.reply(f"200 Type set to {arg}")
+
+    def ftp_noop(self, arg):
+        self.reply("200 NOOP ok")
+
+    def ftp_feat(self, arg):
+        self.wfile.write(b"211-Features:\r\n")
+        for feat in self.server.features:
+            self.wfile.write(f" {feat}\r\n".encode())
+
+        self.reply("211 End")
+
+    def ftp_opts(self, arg):
+        self.reply("200 OK")
+
+    def ftp_pwd(self, arg):
+        self.reply(f'257 "{self.cwd}"')
+
+    def ftp_cwd(self, arg):
+        virtual, local = self.resolve(arg)
+        if not local.is_dir():
+            self.reply(f"550 {arg}: No such directory")
+            return
+
+        self.cwd = virtual
+        self.reply("250 OK")
+
+    def ftp_cdup(self, arg):
+        self.ftp_cwd("..")
+
+    def ftp_pasv(self, arg):
+        if self.pasv is not None:
+            self.pasv.close()
+
+        self.pasv = socket.create_server(("127.0.0.1", 0))
+        port = self.pasv.getsockname()[1]
+        addr = f"127,0,0,1,{port >> 8},{port & 255}"
+        self.reply(f"227 Entering Passive Mode ({addr})")
+
+    def ftp_size(self, arg):
+        _, local = self.resolve(arg)
+        if not local.is_file():
+            self.reply(f"550 {arg}: No such file")
+            return
+
+        self.reply(f"213 {local.stat().st_size}")
+
+    def ftp_mdtm(self, arg):
+        _, local = self.resolve(arg)
+        if not local.exists():
+            self.reply(f"550 {arg}: No such file")
+            return
+
+        self.reply(f"213 {self.modify(local):%Y%m%d%H%M%S}")
+
+    def ftp_rest(self, arg):
+        self.rest = int(arg)
+        self.reply(f"350 Restarting at {self.rest}")
+
+    def ftp_retr(self, arg):
+        _, local = self.resolve(arg)
+        if not local.is_file():
+            self.reply(f"550 {arg}: No such file")
+            return
+
+        offset, self.rest = self.rest, 0
+        self.reply("150 Opening BINARY mode data connection")
+        conn = self.data_connection()
+        sent = 0
+        try:
+            with conn, local.open("rb") as ref:
+                ref.seek(offset)
+                while chunk := ref.read(self.server.chunk_size):
+                    conn.sendall(chunk)
+                    sent += len(chunk)
+                    if (
+                        self.server.drop_after is not None
+                        and sent >= self.server.drop_after
+                    ):
+                        self.server.drop_after = None
+                        self.reply("426 Connection closed; transfer aborted")
+                        return
+
+                    if self.server.throttle:
+                        time.sleep(self.server.throttle)
+
+        except OSError:
+            self.reply("426 Connection closed; transfer aborted")
+            return
+
+        self.reply("226 Transfer complete")
+
+    def ftp_abor(self, arg):
+        self.reply("226 Abort successful")
+
+    def ftp_list(self, arg):
+        arg = " ".join(a for a in arg.split() if not a.startswith("-"))
+        _, local = self.resolve(arg)
+        if not local.exists():
+            self.reply(f"550 {arg}: No such directory")
+            return
+
+        self.reply("150 Here comes the directory listing")
+        paths = sorted(local.iterdir()) if local.is_dir() else [local]
+        self.send_lines([self.list_line(p) for p in paths])
+
+    def ftp_mlsd(self, arg):
+        if "MLST" not in " ".join(self.server.features):
+            self.reply("500 MLSD not understood")
+            return
+
+        _, local = self.resolve(arg)
+        if not local.is_dir():
+            self.reply(f"550 {arg}: No such directory")
+            return
+
+        self.reply("150 Here comes the directory listing")
+        self.send_lines([self.fact_line(p) for p in sorted(local.iterdir())])
+
+    def ftp_mlst(self, arg):
+        if "MLST" not in " ".join(self.server.features):
+            self.reply("500 MLST not understood")
+            return
+
+        virtual, local = self.resolve(arg)
+        if not local.exists():
+            self.reply(f"550 {arg}: No such file")
+            return
+
+        self.wfile.write(b"250-Listing\r\n")
+        fact = self.fact_line(local, str(virtual))
+        self.wfile.write(f" {fact}\r\n".encode())
+        self.reply("250 End")
+
+    def ftp_quit(self, arg):
+        self.reply("221 Goodbye")
+        return False
+
+
+class LocalFTPServer(socketserver.ThreadingTCPServer):
+    """An FTP server that serves a local directory on 127.0.0.1.
+
+    Parameters
+    ----------
+    root : pathlib.Path
+        The directory to serve.
+    mlst : bool, optional
+        Advertise and support the MLSD and MLST commands?
+    latency : float, optional
+        Seconds to wait before responding to each command.
+
+    Attributes
+    ----------
+    commands : list of str
+        Every command that the server has received.
+    sessions : int
+        The number of control connections that have been opened.
+    drop_after : int or None
+        Abort the next transfer after sending this many bytes.
+    failures : dict of str, int
+        The number of times to fail each command, by closing the connection.
+    throttle : float
+        Seconds to sleep between each chunk that is sent.
+
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, root, mlst=True, latency=0.0):
+        """Initialize the server"""
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.root = Path(root)
+        self.latency = latency
+        self.features = ["SIZE", "MDTM", "REST STREAM"]
+        if mlst:
+            self.features.append("MLST type*;size*;modify*;")
+
+        self.commands = []
+        self.sessions = 0
+        self.drop_after = None
+        self.failures = {}
+        self.throttle = 0.0
+        self.chunk_size = 65536
+        self._thread = None
+
+    @property
+    def netloc(self):
+        """The host and port of the server."""
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def url(self):
+        """The FTP URL for the root of the server."""
+        return f"ftp://{self.netloc}/"
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shutdown the server."""
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,80 @@
+"""Test the asyncio interface"""
+
+import asyncio
+import threading
+import time
+
+import ppx.aio
+
+
+def test_find_project(tmp_path):
+    """Test that projects are found and wrapped."""
+    proj = asyncio.run(ppx.aio.find_project("pxd000001", repo="pride"))
+    assert isinstance(proj, ppx.aio.AsyncProject)
+    assert isinstance(proj.project, ppx.PrideProject)
+    assert proj.id == "PXD000001"
+    assert proj.local == tmp_path / "PXD000001"
+
+
+def test_download(ftp_server, tmp_path):
+    """Test that several projects are listed and downloaded together."""
+
+    async def run():
+        projects = []
+        for name in ["a", "b"]:
+            proj = await ppx.aio.find_project(
+                "PXD000001", local=tmp_path / name, repo="pride"
+            )
+            proj.project._url = ftp_server.url + "data/PXD000001"
+            projects.append(proj)
+
+        files = await asyncio.gather(
+            *[p.remote_files("*.txt") for p in projects]
+        )
+        out = await asyncio.gather(
+            *[p.download(f) for p, f in zip(projects, files)]
+        )
+        return files, out
+
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    files, out = asyncio.run(run())
+    assert files == [["README.txt", "sub/result.txt"]] * 2
+    assert out[1] == [tmp_path / "b" / f for f in files[1]]
+    assert all(f.exists() for f in out[0] + out[1])
+
+
+def test_workers():
+    """Test that calls run in a dedicated pool of the requested size."""
+
+    class Project:
+        id = "PXD000001"
+        running = 0
+        most = 0
+        threads = set()
+        lock = threading.Lock()
+
+        def remote_files(self, glob=None):
+            with self.lock:
+                Project.running += 1
+                Project.most = max(Project.most, Project.running)
+                Project.threads.add(threading.current_thread().name)
+
+            time.sleep(0.05)
+            with self.lock:
+                Project.running -= 1
+
+            return []
+
+    async def run():
+        projects = [ppx.aio.AsyncProject(Project()) for _ in range(6)]
+        await asyncio.gather(*[p.remote_files() for p in projects])
+
+    ppx.aio.set_workers(2)
+    try:
+        asyncio.run(run())
+    finally:
+        ppx.aio.set_workers()
+
+    assert Project.most == 2
+    assert all(t.startswith("ppx-aio") for t in Project.threads)
@@ -0,0 +1,36 @@
+"""Test that the offline benchmarks run"""
+
+import json
+
+import ppx
+from ppx.config import config
+
+from ..benchmarks import run
+
+
+def test_benchmarks(monkeypatch, tmp_path, capsys):
+    """Test running the benchmarks at the smallest scale."""
+    # The command line needs a version, even if ppx is not installed:
+    monkeypatch.setattr(ppx, "__version__", "0", raising=False)
+    data_dir = config.path
+    output = tmp_path / "results.jsonl"
+    data = str(tmp_path / "data")
+    args = ["-s", "tiny", "-r", "1", "-o", str(output), "--data", data]
+    assert run.main(args) == 0
+    assert config.path == data_dir
+
+    (entry,) = [json.loads(line) for line in output.read_text().splitlines()]
+    assert entry["scale"] == "tiny"
+    assert set(entry["results"]) == set(run.BENCHMARKS)
+    results = entry["results"]
+    assert results["list_deep_tree"]["files"] == 18
+    assert results["resolve_projects"]["projects"] == 10
+    assert results["download_with_drops"]["bytes"] == 2 * 2**20
+    assert results["cli_deep_tree"]["files"] == 18
+
+    # Compare a second run to the first:
+    capsys.readouterr()
+    args += ["-k", "list_many", "--compare", "--max-slowdown", "1e-9"]
+    assert run.main(args) == 1
+    assert "slower" in capsys.readouterr().out
+    assert len(output.read_text().splitlines()) == 2
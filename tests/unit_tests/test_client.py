@@ -0,0 +1,42 @@
+"""Test the shared HTTP client"""
+
+import pytest
+import requests
+
+from ppx import client
+
+
+def test_retry(http_server):
+    """Test that 429 and 5xx responses are retried over one connection."""
+    url = http_server.url + "/x"
+    http_server.failures = [429, 503, 500]
+    res = client.get(url)
+    assert res.json() == {"ok": True}
+    assert len(http_server.requests) == 4
+
+    # Retries are exhausted:
+    http_server.failures = [503] * 10
+    with client.Session(retries=2, backoff=0) as session:
+        assert session.get(url).status_code == 503
+
+    assert client.session() is client.session()
+
+
+def test_timeout(monkeypatch):
+    """Test that a default timeout is applied."""
+    sent = {}
+
+    def mock_send(self, request, **kwargs):
+        sent.update(kwargs)
+        raise requests.ConnectionError
+
+    monkeypatch.setattr(requests.Session, "send", mock_send)
+    session = client.Session(timeout=3.0)
+    with pytest.raises(requests.ConnectionError):
+        session.head("http://127.0.0.1:1/")
+
+    assert sent["timeout"] == 3.0
+    with pytest.raises(requests.ConnectionError):
+        session.get("http://127.0.0.1:1/", timeout=1.0)
+
+    assert sent["timeout"] == 1.0
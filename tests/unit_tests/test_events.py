@@ -0,0 +1,107 @@
+"""Test the instrumentation events"""
+
+import json
+
+import pytest
+
+from ppx import client, events
+from ppx.ftp import FTPParser
+
+
+@pytest.fixture
+def received():
+    """Collect the events emitted during a test."""
+    out = []
+    events.subscribe(out.append)
+    yield out
+    events.unsubscribe(out.append)
+
+
+def test_ftp_events(ftp_server, received, tmp_path):
+    """Test that FTP downloads emit timing events."""
+    ftp_server.failures["RETR"] = 1
+    parser = FTPParser(ftp_server.url + "data/PXD000001", timeout=5)
+    parser.download(["big.raw", "README.txt"], tmp_path, silent=True)
+    names = {e.name for e in received}
+    assert names == {
+        "connect",
+        "login",
+        "reconnect",
+        "first_byte",
+        "transfer",
+        "file",
+    }
+    assert all(e.fields["host"] == "127.0.0.1" for e in received)
+
+    reconnect = [e for e in received if e.name == "reconnect"]
+    assert len(reconnect) == 1
+    assert reconnect[0].fields["attempt"] == 1
+
+    transfers = [e for e in received if e.name == "transfer"]
+    assert sum(e.fields["n_bytes"] for e in transfers) == 300_100
+    files = {e.fields["file"]: e.fields for e in received if e.name == "file"}
+    assert files["big.raw"]["status"] == "done"
+    assert files["README.txt"]["seconds"] > 0
+
+
+def test_failing_subscriber(ftp_server, received, tmp_path, caplog):
+    """Test that an error in a subscriber does not stop a download."""
+
+    def fail(event):
+        raise ValueError("Broken subscriber")
+
+    events.subscribe(fail)
+    try:
+        parser = FTPParser(ftp_server.url + "data/PXD000001", timeout=5)
+        parser.download("README.txt", tmp_path, silent=True)
+    finally:
+        events.unsubscribe(fail)
+
+    assert (tmp_path / "README.txt").stat().st_size == 100
+    assert "file" in {e.name for e in received}
+    assert "Broken subscriber" in caplog.text
+
+
+def test_http_events(http_server, received):
+    """Test that HTTP requests emit timing events."""
+    http_server.failures = [503]
+    res = client.get(http_server.url + "/a")
+    assert res.status_code == 200
+    (event,) = received
+    assert event.name == "http_request"
+    assert event.fields["host"] == "127.0.0.1"
+    assert event.fields["status"] == 200
+    assert event.fields["n_bytes"] == len(res.content)
+    assert event.fields["retries"] == 1
+
+
+def test_exporters(tmp_path):
+    """Test the JSON lines and OpenMetrics exporters."""
+    exporter = events.subscribe(events.JSONLinesExporter(tmp_path / "e.jsonl"))
+    collector = events.subscribe(events.MetricsCollector())
+    try:
+        events.emit("transfer", host="a.org", n_bytes=100, seconds=2.0)
+        events.emit("transfer", host="a.org", n_bytes=300, seconds=2.0)
+        events.emit("reconnect", host="b.org", attempt=1, error="EOFError()")
+    finally:
+        events.unsubscribe(exporter)
+        events.unsubscribe(collector)
+        exporter.close()
+
+    events.emit("transfer", host="a.org", n_bytes=100, seconds=1.0)
+    lines = (tmp_path / "e.jsonl").read_text().splitlines()
+    assert [json.loads(line)["event"] for line in lines] == [
+        "transfer",
+        "transfer",
+        "reconnect",
+    ]
+    assert json.loads(lines[2])["error"] == "EOFError()"
+
+    assert collector.throughput() == {"a.org": 100.0}
+    metrics = collector.openmetrics().splitlines()
+    assert 'ppx_transfer_total{host="a.org"} 2' in metrics
+    assert 'ppx_transfer_seconds_sum{host="a.org"} 4.0' in metrics
+    assert 'ppx_transfer_bytes_total{host="a.org"} 400' in metrics
+    assert 'ppx_reconnect_total{host="b.org"} 1' in metrics
+    assert "# TYPE ppx_reconnect_seconds summary" not in metrics
+    assert metrics[-1] == "# EOF"
@@ -1,6 +1,10 @@
 """Test finding projects"""
 
+import json
+import time
+
 import pytest
+import requests
 from requests.exceptions import ConnectTimeout, ReadTimeout
 
 import ppx
@@ -66,3 +70,63 @@ def test_timeout():
     """Try a value that is too small."""
     with pytest.raises((ConnectTimeout, ReadTimeout)):
         ppx.find_project(PXID, timeout=0.0000000000001)
+
+
+def test_find_projects(monkeypatch, tmp_path):
+    """Test resolving many projects at once."""
+    calls, validators = [], []
+
+    class MockResponse:
+        status_code = 200
+        url = "http://proteomecentral.proteomexchange.org/cgi/GetDataset"
+        headers = {"ETag": '"px"'}
+
+        def __init__(self, pxid):
+            self.pxid = pxid
+
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode()
+
+        def json(self):
+            return {
+                "identifiers": [
+                    {"accession": "MS:1001919", "value": self.pxid},
+                    {"accession": "MS:1002487", "value": MSVID},
+                ],
+                "fullDatasetLinks": [],
+            }
+
+    def mock_get(self, url, params, headers, **kwargs):
+        calls.append(params["ID"])
+        validators.append(headers)
+        time.sleep(0.01)
+        return MockResponse(params["ID"])
+
+    monkeypatch.setattr(requests.Session, "get", mock_get)
+    ids = [MSVPXD, MSVID, "PXD1", MSVPXD.lower()]
+    found = dict(ppx.find_projects(ids, workers=3))
+    assert set(found) == {MSVPXD, MSVID, "PXD1", MSVPXD.lower()}
+    assert isinstance(found[MSVPXD], ppx.MassiveProject)
+    assert found[MSVPXD].id == MSVID
+    assert found[MSVPXD].local == tmp_path / MSVID
+    assert isinstance(found[MSVID], ppx.MassiveProject)
+    assert isinstance(found["PXD1"], ValueError)
+    assert found[MSVPXD.lower()] is found[MSVPXD]
+    assert calls == [MSVPXD]
+    assert validators == [{}]
+
+    # Revalidated from the HTTP response cache:
+    found = dict(ppx.find_projects([MSVPXD], local=tmp_path / "x"))
+    assert found[MSVPXD].id == MSVID
+    assert found[MSVPXD].local == tmp_path / "x" / MSVPXD
+    assert validators[1] == {"If-None-Match": '"px"'}
+    assert not (tmp_path / ".proteomexchange").exists()
+
+    # Queued lookups are cancelled when the caller stops early:
+    calls.clear()
+    ids = [f"PXD{i:06d}" for i in range(10)]
+    found = ppx.find_projects(ids, workers=1, fetch=True)
+    next(found)
+    found.close()
+    assert len(calls) <= 2
@@ -0,0 +1,387 @@
+"""Test the FTPParser against a local FTP server"""
+
+import hashlib
+import io
+import json
+import os
+import socket
+from datetime import datetime, timezone
+
+import pytest
+
+import ppx
+from ppx.checksum import hash_file, parse_checksum, verify_files
+from ppx.ftp import (
+    ConnectionPool,
+    FTPParser,
+    _BufferedWriter,
+    _Segments,
+    connections,
+    parse_time,
+    progress_bar,
+)
+
+PROJ = "data/PXD000001"
+
+
+@pytest.fixture
+def parser(ftp_server):
+    """An FTPParser for the mock project."""
+    return FTPParser(ftp_server.url + PROJ, timeout=5)
+
+
+@pytest.fixture
+def remote(ftp_server):
+    """The local directory being served for the mock project."""
+    return ftp_server.root / PROJ
+
+
+def test_listing(ftp_server, parser):
+    """Test that files and directories are found."""
+    assert parser.files == [
+        "README.txt",
+        "big.raw",
+        "small.mzML",
+        "sub/deeper/peaks.mgf",
+        "sub/result.txt",
+    ]
+    assert parser.dirs == ["sub", "sub/deeper"]
+    assert ftp_server.commands.count("MLSD") == 3
+    assert ftp_server.commands.count("CWD") == ftp_server.sessions
+
+
+def test_listing_depth(ftp_server):
+    """Test that the maximum depth is respected."""
+    parser = FTPParser(ftp_server.url + "data", max_depth=1, timeout=5)
+    assert parser.dirs == ["PXD000001", "PXD000001/sub"]
+    assert "PXD000001/sub/result.txt" not in parser.files
+    assert ftp_server.commands.count("MLSD") == 2
+
+
+def test_listing_retry(ftp_server, parser):
+    """Test that a failed directory listing is retried on its own."""
+    ftp_server.failures["MLSD"] = 1
+    assert len(parser.files) == 5
+    assert ftp_server.commands.count("MLSD") == 4
+
+
+@pytest.mark.parametrize("mlst", [True, False])
+def test_entries(ftp_server, parser, remote, mlst):
+    """Test that sizes and times are parsed with and without MLSD."""
+    if not mlst:
+        ftp_server.features.pop()
+
+    entry = parser.entries["sub/result.txt"]
+    assert entry.name == "result.txt"
+    assert entry.type == "file"
+    assert entry.size == 2_000
+    mtime = (remote / "sub" / "result.txt").stat().st_mtime
+    assert abs(entry.modify.timestamp() - mtime) < 60
+    assert parser.entries["sub"].type == "dir"
+    assert ("LIST" in ftp_server.commands) != mlst
+
+
+def test_parse_time():
+    """Test parsing dates from LIST responses."""
+    now = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    assert parse_time("Feb  7 12:00", now) == now.replace(
+        month=2, day=7, hour=12
+    )
+    assert parse_time("Jun 10 12:00", now).year == 2023
+    assert parse_time("Mar  7  2012", now) == datetime(
+        2012, 3, 7, tzinfo=timezone.utc
+    )
+    assert parse_time("yesterday", now) is None
+
+
+def test_skip_current(ftp_server, parser, tmp_path):
+    """Test that complete files are skipped without a server round-trip."""
+    parser.download(parser.files, tmp_path, silent=True)
+    sessions, commands = ftp_server.sessions, len(ftp_server.commands)
+    parser.download(parser.files, tmp_path, silent=True)
+    assert ftp_server.sessions == sessions
+    assert len(ftp_server.commands) == commands
+    assert "SIZE" not in ftp_server.commands
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_download(parser, remote, tmp_path, workers):
+    """Test downloading files, with and without concurrency."""
+    files = parser.files
+    out = parser.download(files, tmp_path, silent=True, workers=workers)
+    assert out == [tmp_path / f for f in files]
+    for fname, local in zip(files, out):
+        assert local.read_bytes() == (remote / fname).read_bytes()
+
+
+def test_duplicates(ftp_server, parser, remote, tmp_path):
+    """Test that a file listed twice is downloaded once."""
+    ftp_server.chunk_size = 65536
+    ftp_server.throttle = 0.01
+    files = ["big.raw", "big.raw", "small.mzML"]
+    out = parser.download(files, tmp_path, silent=True, workers=3)
+    assert out == [tmp_path / f for f in files]
+    expected = (remote / "big.raw").read_bytes()
+    assert (tmp_path / "big.raw").read_bytes() == expected
+    assert ftp_server.commands.count("RETR") == 2
+
+
+def test_resume(ftp_server, parser, remote, tmp_path):
+    """Test that a partial file is resumed rather than restarted."""
+    expected = (remote / "big.raw").read_bytes()
+    (tmp_path / "big.raw").write_bytes(expected[:1000])
+    files = ["big.raw", "small.mzML"]
+    parser.download(files, tmp_path, silent=True, workers=2)
+    assert (tmp_path / "big.raw").read_bytes() == expected
+    assert "REST" in ftp_server.commands
+
+
+def test_larger_local(ftp_server, parser, remote, tmp_path):
+    """Test that a local file larger than the remote is downloaded again."""
+    (tmp_path / "README.txt").write_bytes(b"x" * 5_000)
+    parser.download("README.txt", tmp_path, silent=True)
+    expected = (remote / "README.txt").read_bytes()
+    assert (tmp_path / "README.txt").read_bytes() == expected
+    assert ftp_server.commands.count("RETR") == 1
+
+
+def test_ccms_peak(ftp_server, parser, tmp_path):
+    """Test that ccms_peak files are downloaded from the z01 directory."""
+    remote = ftp_server.root / "z01" / "PXD000001" / "ccms_peak"
+    remote.mkdir(parents=True)
+    (remote / "a.mzML").write_bytes(b"x" * 1000)
+    (tmp_path / "ccms_peak").mkdir()
+    (tmp_path / "ccms_peak" / "a.mzML").write_bytes(b"x" * 100)
+    parser.download("ccms_peak/a.mzML", tmp_path, silent=True)
+    assert (tmp_path / "ccms_peak" / "a.mzML").read_bytes() == b"x" * 1000
+    assert ftp_server.commands.count("RETR") == 1
+
+
+@pytest.fixture
+def segmented(ftp_server):
+    """An FTPParser that downloads files >100 kB in three segments."""
+    return FTPParser(
+        ftp_server.url + PROJ,
+        timeout=5,
+        segments=3,
+        segment_threshold=100_000,
+    )
+
+
+def test_segmented_download(ftp_server, segmented, remote, tmp_path):
+    """Test downloading a large file as multiple byte ranges."""
+    out = segmented.download(["big.raw", "small.mzML"], tmp_path, silent=True)
+    assert out[0].read_bytes() == (remote / "big.raw").read_bytes()
+    assert out[1].read_bytes() == (remote / "small.mzML").read_bytes()
+    assert ftp_server.commands.count("REST") >= 2
+    assert not (tmp_path / ".big.raw.part").exists()
+    assert not (tmp_path / ".big.raw.part.json").exists()
+
+
+def test_segmented_reconnect(ftp_server, segmented, remote, tmp_path):
+    """Test that an interrupted segment is resumed from where it stopped."""
+    ftp_server.drop_after = 20_000
+    segmented.download("big.raw", tmp_path, silent=True)
+    expected = (remote / "big.raw").read_bytes()
+    assert (tmp_path / "big.raw").read_bytes() == expected
+
+
+def test_segmented_resume(ftp_server, segmented, remote, tmp_path):
+    """Test that a segmented download resumes from its saved state."""
+    expected = (remote / "big.raw").read_bytes()
+    part = bytearray(len(expected))
+    part[:100_000] = expected[:100_000]
+    (tmp_path / ".big.raw.part").write_bytes(part)
+    state = {
+        "size": len(expected),
+        "segments": [[0, 100_000, 100_000], [100_000, len(expected), 100_000]],
+    }
+    (tmp_path / ".big.raw.part.json").write_text(json.dumps(state))
+
+    segmented.download("big.raw", tmp_path, silent=True)
+    assert (tmp_path / "big.raw").read_bytes() == expected
+    assert ftp_server.commands.count("RETR") == 1
+
+
+def test_segmented_force(ftp_server, segmented, remote, tmp_path):
+    """Test that forcing a download discards a saved state."""
+    expected = (remote / "big.raw").read_bytes()
+    (tmp_path / ".big.raw.part").write_bytes(b"x" * len(expected))
+    state = {
+        "size": len(expected),
+        "segments": [[0, 100_000, 100_000], [100_000, len(expected), 100_000]],
+    }
+    (tmp_path / ".big.raw.part.json").write_text(json.dumps(state))
+    segmented.download("big.raw", tmp_path, silent=True, force_=True)
+    assert (tmp_path / "big.raw").read_bytes() == expected
+    assert ftp_server.commands.count("RETR") == 3
+
+
+def test_part_files_hidden(tmp_path):
+    """Test that the part files of a segmented download are hidden."""
+    pbar = progress_bar(total=1_000, disable=True)
+    segments = _Segments(tmp_path / "big.raw", 1_000, 2, pbar)
+    assert segments.part_file.exists()
+    assert segments.state_file.exists()
+    proj = ppx.PrideProject("PXD000001", local=tmp_path)
+    assert proj.local_files() == []
+
+
+def test_pool_reuse(ftp_server, parser, tmp_path):
+    """Test that sessions are reused across files and projects."""
+    files = ["README.txt", "small.mzML", "sub/result.txt"]
+    parser.download(files, tmp_path, silent=True)
+    assert ftp_server.sessions == 1
+
+    other = FTPParser(ftp_server.url + PROJ + "/sub", timeout=5)
+    other.download("result.txt", tmp_path / "other", silent=True)
+    assert other.files == ["deeper/peaks.mgf", "result.txt"]
+    assert ftp_server.sessions == 1
+    assert len(connections) == 1
+
+
+def test_pool_health_check(ftp_server):
+    """Test that idle connections are checked and expired."""
+    host = ftp_server.netloc
+    pool = ConnectionPool(max_size=1, idle_timeout=60, check_after=0)
+    conn1 = pool.acquire(host, PROJ)
+    conn2 = pool.acquire(host, PROJ)
+    pool.release(conn1)
+    pool.release(conn2)
+    assert len(pool) == 1
+
+    assert pool.acquire(host, PROJ) is conn2
+    assert ftp_server.commands.count("NOOP") == 1
+
+    conn2.sock.shutdown(socket.SHUT_RDWR)  # Broken connections are replaced.
+    pool.release(conn2)
+    conn3 = pool.acquire(host, PROJ)
+    assert conn3 is not conn2
+    assert ftp_server.sessions == 3
+
+    pool.idle_timeout = 0
+    pool.release(conn3)
+    pool.acquire(host, PROJ)
+    assert ftp_server.sessions == 4
+    pool.clear()
+
+
+def test_pool_directory(ftp_server):
+    """Test that an idle connection in the right directory is preferred."""
+    host = ftp_server.netloc
+    pool = ConnectionPool()
+    in_proj = pool.acquire(host, PROJ)
+    in_sub = pool.acquire(host, PROJ + "/sub")
+    pool.release(in_proj)
+    pool.release(in_sub)
+    cwd = ftp_server.commands.count("CWD")
+
+    assert pool.acquire(host, PROJ) is in_proj
+    assert pool.acquire(host, PROJ + "/sub") is in_sub
+    assert ftp_server.commands.count("CWD") == cwd
+    pool.release(in_proj)
+    pool.release(in_sub)
+    pool.clear()
+
+
+def test_listing_cache(ftp_server, remote, tmp_path):
+    """Test that only changed directories are listed again."""
+    cache_file = tmp_path / "listing.json"
+    url = ftp_server.url + PROJ
+    parser = FTPParser(url, timeout=5, cache_file=cache_file)
+    files = parser.files
+    assert ftp_server.commands.count("MLSD") == 3
+
+    # Nothing has changed:
+    parser = FTPParser(url, timeout=5, cache_file=cache_file)
+    assert parser.files == files
+    assert parser.entries["sub/result.txt"].size == 2_000
+    assert ftp_server.commands.count("MLSD") == 3
+
+    # Add a file to a subdirectory:
+    (remote / "sub" / "new.txt").write_text("new")
+    os.utime(remote / "sub", (0, 0))
+    parser = FTPParser(url, timeout=5, cache_file=cache_file)
+    assert "sub/new.txt" in parser.files
+    assert ftp_server.commands.count("MLSD") == 4
+
+    # Within the TTL the server is not contacted:
+    (remote / "another.txt").write_text("another")
+    os.utime(remote, (0, 0))
+    commands = len(ftp_server.commands)
+    parser = FTPParser(url, timeout=5, cache_file=cache_file, cache_ttl=60)
+    assert "another.txt" not in parser.files
+    assert len(ftp_server.commands) == commands
+
+
+def test_checksum(ftp_server, parser, remote, tmp_path):
+    """Test that downloads are verified against their checksums."""
+    expected = (remote / "small.mzML").read_bytes()
+    digest = hash_file(remote / "small.mzML")
+    checksums = {"small.mzML": ("sha1", digest)}
+    parser.download("small.mzML", tmp_path, silent=True, checksums=checksums)
+    assert (tmp_path / "small.mzML").read_bytes() == expected
+
+    # A corrupt file is downloaded again:
+    (tmp_path / "small.mzML").write_bytes(b"x" * len(expected))
+    parser.download(
+        "small.mzML", tmp_path, silent=True, checksums=checksums, force_=True
+    )
+    assert (tmp_path / "small.mzML").read_bytes() == expected
+
+    bad = {"small.mzML": ("sha1", "0" * 40)}
+    with pytest.raises(ValueError):
+        parser.download("small.mzML", tmp_path, silent=True, checksums=bad)
+
+    # The complete local file is hashed before it is downloaded again:
+    assert ftp_server.commands.count("RETR") == 3
+
+
+def test_verify_files(remote):
+    """Test that local files are verified in parallel."""
+    checksums = {
+        remote / "big.raw": ("sha1", hash_file(remote / "big.raw")),
+        remote / "README.txt": ("md5", "0" * 32),
+        remote / "missing.txt": ("sha1", "0" * 40),
+    }
+    assert verify_files(checksums, workers=2) == {
+        remote / "big.raw": True,
+        remote / "README.txt": False,
+        remote / "missing.txt": None,
+    }
+    assert parse_checksum("A" * 40) == ("sha1", "a" * 40)
+    assert parse_checksum("abc") is None
+
+
+def test_buffered_writer():
+    """Test that blocks are coalesced and progress is rate-limited."""
+
+    class Progress:
+        updates = []
+
+        def update(self, n_bytes):
+            self.updates.append(n_bytes)
+
+    out = io.BytesIO()
+    pbar = Progress()
+    hasher = hashlib.sha1()
+    write = _BufferedWriter(out, pbar, hasher, buffer_size=250, interval=60)
+    blocks = [bytes([i]) * 100 for i in range(10)]
+    for block in blocks:
+        write(block)
+
+    assert len(out.getvalue()) == 900
+    assert pbar.updates == []
+    write.flush(final=True)
+    assert out.getvalue() == b"".join(blocks)
+    assert hasher.hexdigest() == hashlib.sha1(b"".join(blocks)).hexdigest()
+    assert pbar.updates == [1_000]
+
+
+def test_blocksize(ftp_server, remote, tmp_path):
+    """Test transfers with small blocks and buffers."""
+    parser = FTPParser(
+        ftp_server.url + PROJ, timeout=5, blocksize=100, buffer_size=1_000
+    )
+    out = parser.download(["big.raw"], tmp_path, silent=True)
+    assert out[0].read_bytes() == (remote / "big.raw").read_bytes()
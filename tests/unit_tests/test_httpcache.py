@@ -0,0 +1,104 @@
+"""Test the HTTP response cache"""
+
+import pytest
+import requests
+
+from ppx import client
+from ppx.config import config
+from ppx.httpcache import ResponseCache
+
+
+def test_revalidate(http_server):
+    """Test that cached responses are revalidated with conditional requests."""
+    url = http_server.url + "/meta"
+    http_server.pages["/meta"] = b'{"version": 1}'
+    assert client.cached_get(url).json() == {"version": 1}
+
+    # Unchanged:
+    res = client.cached_get(url)
+    assert res.status_code == 200
+    assert res.json() == {"version": 1}
+    assert len(http_server.requests) == 2
+
+    # Changed:
+    http_server.pages["/meta"] = b'{"version": 2}'
+    assert client.cached_get(url).json() == {"version": 2}
+
+    # Query strings are part of the key:
+    assert client.cached_get(url, params={"a": 1}).json() == {"ok": True}
+    assert http_server.requests[-1] == "/meta?a=1"
+
+
+def test_offline(http_server, monkeypatch):
+    """Test that only cached responses are served when offline."""
+    url = http_server.url + "/meta"
+    client.cached_get(url)
+    monkeypatch.setattr(config, "offline", True)
+    assert client.cached_get(url).json() == {"ok": True}
+    assert len(http_server.requests) == 1
+
+    with pytest.raises(requests.ConnectionError, match="offline"):
+        client.cached_get(http_server.url + "/other")
+
+    with pytest.raises(requests.ConnectionError, match="offline"):
+        client.get(url)
+
+
+def test_unreachable(http_server):
+    """Test that the cache is used when the server is unreachable."""
+    url = http_server.url + "/meta"
+    client.cached_get(url)
+    http_server.shutdown()
+    http_server.server_close()
+    assert client.cached_get(url, timeout=1).json() == {"ok": True}
+
+
+def test_eviction(tmp_path):
+    """Test that the least recently used responses are evicted."""
+
+    class Response:
+        headers = {"ETag": '"x"'}
+
+        def __init__(self, content):
+            self.content = content
+
+    cache = ResponseCache(tmp_path / "cache", max_size=250)
+    cache.store("a", Response(b"a" * 100))
+    cache.store("b", Response(b"b" * 100))
+    cache.store("c", Response(b"b" * 100))  # Same content as "b".
+    assert len(list((tmp_path / "cache" / "objects").iterdir())) == 2
+
+    cache.load("a")
+    cache.store("d", Response(b"d" * 100))
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is None
+    assert cache.get("d").etag == '"x"'
+    assert len(list((tmp_path / "cache" / "objects").iterdir())) == 2
+    assert cache.validators("d") == {"If-None-Match": '"x"'}
+    cache.close()
+
+
+def test_running_size(tmp_path):
+    """Test that the cache size is tracked across stores and reopening."""
+
+    class Response:
+        headers = {}
+
+        def __init__(self, content):
+            self.content = content
+
+    cache = ResponseCache(tmp_path / "cache", max_size=1_000)
+    for idx in range(50):
+        cache.store(str(idx), Response(bytes([idx]) * 100))
+
+    cache.store("49", Response(b"z" * 50))  # Replaces the body of "49".
+    assert cache._size == 950
+    assert cache.get("39") is None
+    assert cache.get("40") is not None
+    assert len(list((tmp_path / "cache" / "objects").iterdir())) == 10
+    cache.close()
+
+    cache = ResponseCache(tmp_path / "cache", max_size=1_000)
+    assert cache._size == 950
+    cache.close()
@@ -0,0 +1,61 @@
+"""Test that importing ppx is fast"""
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ["requests", "tqdm", "cloudpathlib", "boto3", "google", "azure"]
+
+
+def loaded(code):
+    """Run code in a fresh interpreter and list the heavy modules loaded."""
+    check = "import sys; print(' '.join(m for m in {} if m in sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-c", code + "; " + check.format(HEAVY)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return out.stdout.split()
+
+
+def test_import():
+    """Test that importing ppx does not import heavy dependencies."""
+    assert loaded("import ppx") == []
+
+
+def test_local_project(tmp_path):
+    """Test that local projects do not import cloud or progress modules."""
+    code = f"import ppx; ppx.set_data_dir({str(tmp_path)!r}); "
+    code += "ppx.PrideProject('PXD000001').local"
+    assert loaded(code) == ["requests"]
+
+
+def test_lazy_api():
+    """Test that the public API is available."""
+    import ppx
+
+    assert "find_project" in dir(ppx)
+    assert ppx.find_project is ppx.factory.find_project
+    with pytest.raises(AttributeError):
+        ppx.not_a_thing
+
+
+def test_import_time():
+    """Test that importing ppx is much faster than importing requests."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ppx, requests"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Each line is "import time: <self> | <cumulative> | <module>":
+    times = {}
+    for line in out.stderr.splitlines():
+        fields = [f.strip() for f in line.split(":", 1)[1].split("|")]
+        if fields[0].isdigit():
+            times[fields[2]] = int(fields[1])
+
+    assert times["ppx"] * 10 < times["requests"]
@@ -0,0 +1,89 @@
+"""Test the remote file index"""
+
+import random
+from pathlib import Path, PurePosixPath
+
+import pytest
+
+import ppx
+from ppx.index import RemoteIndex
+
+PATHS = [
+    "README.txt",
+    "peak/a.mzML",
+    "peak/b.mzML",
+    "peak/raw/a.raw",
+    "peak/raw/B.RAW",
+    "ccms_peak/x[1].mzXML",
+    "result/a.mzTab",
+    ".hidden.txt",
+    "peak2/c.mzML",
+]
+
+PATTERNS = [
+    "*.mzML",
+    "*.txt",
+    "peak/*",
+    "*/*",
+    "**/*.raw",
+    "raw/*.[rR][aA][wW]",
+    "*[!a].mzML",
+    "*[!]].mzXML",
+    "*[!]a].mzML",
+    "*[]].mzXML",
+    "*[]-!!].mzML",
+    "*.mz[z-aM]L",
+    "?.mzML",
+    "x[1].mzXML",
+    "peak*/*.mzML",
+    "README.txt",
+    "/peak/a.mzML",
+    "a.raw/",
+    "[",
+]
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_match(pattern):
+    """Test that globs match the same files as pathlib."""
+    index = RemoteIndex(PATHS)
+    expected = [p for p in PATHS if Path(p).match(pattern)]
+    assert index.match(pattern) == expected
+
+
+def test_sets():
+    """Test that random character sets match the same names as pathlib."""
+    rng = random.Random(1)
+    names = list("]^a!-\\zb[&") + ["a]", "]]"]
+    index = RemoteIndex(names)
+    for _ in range(2_000):
+        chars = rng.choices("]![^a-z\\&", k=rng.randint(1, 5))
+        pattern = "[" + "".join(chars) + rng.choice(["", "]"])
+        expected = [n for n in names if PurePosixPath(n).match(pattern)]
+        assert index.match(pattern) == expected, pattern
+
+
+def test_membership():
+    """Test membership queries"""
+    index = RemoteIndex(PATHS)
+    assert "peak/a.mzML" in index
+    assert "peak" not in index
+    assert len(index) == len(PATHS)
+    assert list(index) == PATHS
+    assert index.missing(["peak/b.mzML", "nope", "peak"]) == ["nope", "peak"]
+
+    with pytest.raises(ValueError):
+        index.match("")
+
+    assert RemoteIndex([]).match("*") == []
+
+
+def test_project(ftp_server):
+    """Test that projects use the index for globs and downloads."""
+    proj = ppx.PrideProject("PXD000001")
+    proj._url = ftp_server.url + "data/PXD000001"
+    assert proj.remote_files("*.txt") == ["README.txt", "sub/result.txt"]
+    assert proj.remote_dirs("*/deeper") == ["sub/deeper"]
+
+    with pytest.raises(FileNotFoundError, match="nope.txt, other.raw"):
+        proj.download(["README.txt", "nope.txt", "other.raw"], silent=True)
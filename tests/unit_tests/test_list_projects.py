@@ -34,4 +34,4 @@ def no_requests(monkeypatch):
     def mock_get(*args, **kwargs):
         raise OSError
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
@@ -0,0 +1,109 @@
+"""Test the download manifest"""
+
+import pytest
+
+import ppx
+from ppx.manifest import Manifest, ManifestEntry
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """An empty manifest."""
+    with Manifest(tmp_path / "manifest.sqlite") as manifest:
+        yield manifest
+
+
+def test_plan(manifest, tmp_path):
+    """Test that files are planned, updated, and found complete."""
+    manifest.plan([("a.raw", 10, ("sha1", "a" * 40)), ("b.raw", None, None)])
+    assert len(manifest) == 2
+    assert "a.raw" in manifest
+    assert manifest.get("a.raw") == ManifestEntry(
+        "a.raw", 10, "sha1", "a" * 40, 0, "pending"
+    )
+    assert manifest.unknown(["c.raw", "a.raw", "d.raw"]) == ["c.raw", "d.raw"]
+
+    (tmp_path / "a.raw").write_bytes(b"x" * 10)
+    manifest.update("a.raw", "done", completed=10)
+    manifest.update("b.raw", "failed", completed=3)
+    assert manifest.done(["a.raw", "b.raw"], tmp_path) == {"a.raw"}
+    assert manifest.progress() == {"done": (1, 10), "failed": (1, 3)}
+
+    # Replanning without a size keeps the state:
+    manifest.plan([("a.raw", None, None)])
+    assert manifest.get("a.raw").status == "done"
+
+    # ...but a new size does not:
+    manifest.plan([("a.raw", 11, None)])
+    assert manifest.get("a.raw").status == "pending"
+    assert manifest.done(["a.raw"], tmp_path) == set()
+
+    # A complete file that was removed locally is not done:
+    manifest.update("a.raw", "done", completed=10)
+    (tmp_path / "a.raw").unlink()
+    assert manifest.done(["a.raw"], tmp_path) == set()
+
+
+def test_resume(ftp_server, tmp_path):
+    """Test that complete files are skipped without contacting the server."""
+    files = ["README.txt", "sub/result.txt"]
+    proj = ppx.PrideProject("PXD000001", local=tmp_path)
+    proj._url = ftp_server.url + "data/PXD000001"
+    assert proj.download(files, silent=True) == [tmp_path / f for f in files]
+    assert proj.manifest.progress() == {"done": (2, 2_100)}
+
+    # A new session must not need the server at all:
+    ppx.ftp.connections.clear()
+    commands = len(ftp_server.commands)
+    proj = ppx.PrideProject("PXD000001", local=tmp_path)
+    assert proj.download(files, silent=True) == [tmp_path / f for f in files]
+    assert len(ftp_server.commands) == commands
+
+    # A truncated file is downloaded again:
+    (tmp_path / "README.txt").write_bytes(b"x")
+    proj._url = ftp_server.url + "data/PXD000001"
+    proj.download(files, silent=True)
+    assert (tmp_path / "README.txt").stat().st_size == 100
+    assert proj.manifest.get("README.txt").status == "done"
+
+
+def test_throughput(manifest):
+    """Test that the throughput of recent transfers is measured."""
+    assert manifest.throughput() is None
+    manifest.record(1_000, 1.0)
+    manifest.record(0, 1.0)  # Skipped files are ignored.
+    manifest.record(3_000, 0.5)
+    assert manifest.throughput() == 4_000 / 1.5
+    assert manifest.throughput(recent=1) == 6_000
+
+
+def test_project_plan(ftp_server, tmp_path, monkeypatch):
+    """Test previewing a download."""
+    # Use the sizes from the FTP listing, rather than the PRIDE API:
+    monkeypatch.setattr(
+        ppx.PrideProject, "remote_sizes", ppx.project.BaseProject.remote_sizes
+    )
+    proj = ppx.PrideProject("PXD000001", local=tmp_path)
+    proj._url = ftp_server.url + "data/PXD000001"
+    plan = proj.plan(["README.txt", "big.raw"])
+    assert plan.sizes == {"README.txt": 100, "big.raw": 300_000}
+    assert plan.complete == []
+    assert plan.total_bytes == plan.remaining_bytes == 300_100
+    assert plan.throughput is None
+    assert plan.seconds is None
+    assert ftp_server.commands.count("RETR") == 0
+
+    # Files downloaded with or without the manifest are complete:
+    proj.download("README.txt", silent=True)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "result.txt").write_bytes(b"x" * 2_000)
+    files = ["README.txt", "big.raw", "sub/result.txt"]
+    plan = proj.plan(files)
+    assert plan.complete == ["README.txt", "sub/result.txt"]
+    assert plan.remaining_bytes == 300_000
+    assert plan.throughput > 0
+    assert plan.seconds == pytest.approx(300_000 / plan.throughput)
+    assert proj.plan(files, force_=True).complete == []
+
+    with pytest.raises(FileNotFoundError):
+        proj.plan("missing.raw")
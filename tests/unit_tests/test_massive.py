@@ -4,6 +4,7 @@ import shutil
 from pathlib import Path
 
 import pytest
+import requests
 
 import ppx
 
@@ -70,3 +71,49 @@ def test_metadata(tmp_path):
         "Investigators are interested in the protein polzeta.  "
     )
     assert proj.description == desc
+
+
+def test_file_info(monkeypatch):
+    """Test that the file info is streamed once and cached."""
+    lines = [
+        "usi,filepath,dataset,collection,size",
+        f'mzspec:{MSVID},{MSVID}/peak/a.mzML,{MSVID},peak,"1,024"',
+        f"mzspec:{MSVID},ccms_peak/b.mzML,{MSVID},ccms_peak,2048",
+    ]
+    calls = []
+
+    class MockResponse:
+        status_code = 200
+        encoding = None
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def iter_lines(self, decode_unicode=False):
+            yield from lines
+
+    def mock_get(*args, **kwargs):
+        calls.append(kwargs)
+        return MockResponse()
+
+    monkeypatch.setattr(requests.Session, "get", mock_get)
+    proj = ppx.MassiveProject(MSVID)
+    proj._url = "ftp://massive-ftp.ucsd.edu/v03/" + MSVID
+    assert proj.remote_files() == ["peak/a.mzML", "ccms_peak/b.mzML"]
+    assert len(calls) == 1
+    assert calls[0]["stream"]
+
+    # From the cache:
+    (proj.local / ".remote_files").unlink()
+    proj._remote_files = None
+    assert proj.remote_files() == ["peak/a.mzML", "ccms_peak/b.mzML"]
+    assert proj.file_info().splitlines() == lines
+    assert len(calls) == 1
+    assert not (proj.local / ".file_info.csv.part").exists()
+    assert proj.remote_sizes() == {
+        "peak/a.mzML": 1_024,
+        "ccms_peak/b.mzML": 2_048,
+    }
@@ -1,6 +1,8 @@
 """Test PRIDE functionality w/o internet access"""
 
 import json
+import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
@@ -224,3 +226,93 @@ def test_broken_pride_links(tmp_path, monkeypatch):
 
     monkeypatch.setattr(ppx.utils, "test_url", mock_test_url)
     assert proj.url == url
+
+
+def test_checksums(tmp_path, mock_pride_files_response):
+    """Test that the PRIDE checksums are keyed by remote file."""
+    proj = ppx.PrideProject(PXID)
+    checksums = proj.checksums()
+    assert checksums[
+        "generated/PRIDE_Exp_Complete_Ac_22134.pride.mztab.gz"
+    ] == (
+        "sha1",
+        "c37fa5f5d0e2b52d0e9e4825a1006e446b2dfff7",
+    )
+    assert len(checksums) == 8
+
+    local = tmp_path / PXID / "F063721.dat"
+    local.write_text("not the readme")
+    assert proj.verify() == {local: False}
+    assert proj.verify("README.txt") == {}
+
+
+def test_remote_sizes(mock_pride_files_response):
+    """Test that the PRIDE file sizes are keyed by remote file."""
+    proj = ppx.PrideProject(PXID)
+    sizes = proj.remote_sizes()
+    assert sizes["generated/PRIDE_Exp_Complete_Ac_22134.pride.mztab.gz"] == (
+        497_985
+    )
+    assert len(sizes) == 8
+
+
+def test_url_cache(tmp_path, monkeypatch, mock_pride_files_path_response):
+    """Test that resolved URLs are cached and fixes are learned."""
+    tested = []
+
+    def mock_test_url(url):
+        tested.append(url)
+        if "/data/" in url:
+            raise requests.HTTPError
+
+        return url
+
+    monkeypatch.setattr(ppx.utils, "test_url", mock_test_url)
+    monkeypatch.setattr(ppx.pride, "_URL_FIX_ORDER", [0, 1, 2])
+    url = "ftp://ftp.pride.ebi.ac.uk/pride-archive/2012/03/PXD000001"
+    assert ppx.PrideProject(PXID).url == url
+    assert len(tested) == 2
+
+    # From the cache:
+    assert ppx.PrideProject(PXID).url == url
+    assert len(tested) == 2
+
+    # Expired, so the learned fix is tried first:
+    monkeypatch.setattr(ppx.config.config, "url_ttl", 0)
+    assert ppx.PrideProject(PXID).url == url
+    assert tested[2:] == [url]
+
+    # A forced fetch resolves the address again and rewrites the cache:
+    url_file = tmp_path / PXID / ".pride-url"
+    url_file.write_text(json.dumps({"url": "ftp://old", "resolved": 0}))
+    monkeypatch.setattr(ppx.config.config, "url_ttl", 10**10)
+    assert ppx.PrideProject(PXID).url == "ftp://old"
+    assert ppx.PrideProject(PXID, fetch=True).url == url
+    assert tested[3:] == [url]
+    assert json.loads(url_file.read_text())["url"] == url
+
+
+def test_url_fix_threads(monkeypatch, mock_pride_files_path_response):
+    """Test that the fixes are learned safely from many threads."""
+
+    def mock_test_url(url):
+        if random.random() < 0.5:
+            raise requests.HTTPError
+
+        return url
+
+    monkeypatch.setattr(ppx.utils, "test_url", mock_test_url)
+    monkeypatch.setattr(ppx.pride, "_URL_FIX_ORDER", [0, 1, 2])
+    proj = ppx.PrideProject(PXID)
+    assert proj.files_metadata
+
+    def resolve(_):
+        try:
+            return proj._resolve_url()
+        except requests.HTTPError:
+            return None
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(resolve, range(2_000)))
+
+    assert sorted(ppx.pride._URL_FIX_ORDER) == [0, 1, 2]
@@ -0,0 +1,137 @@
+"""Test the retry policy and circuit breaker"""
+
+import errno
+import time
+from ftplib import error_perm, error_temp
+
+import pytest
+
+from ppx import events
+from ppx.ftp import FTPParser, _BufferedWriter
+from ppx.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, breaker
+
+PROJ = "data/PXD000001"
+
+
+@pytest.fixture
+def received():
+    """Collect the events emitted during a test."""
+    out = []
+    events.subscribe(out.append)
+    yield out
+    events.unsubscribe(out.append)
+
+
+def test_policy():
+    """Test classifying errors and the backoff delays."""
+    policy = RetryPolicy(backoff=1.0, max_backoff=5.0)
+    assert policy.is_transient(error_temp("421 Too many users"))
+    assert policy.is_transient(ConnectionResetError())
+    assert policy.is_transient(EOFError())
+    assert policy.is_transient(error_perm("530 Too many connections"))
+    assert not policy.is_transient(error_perm("550 No such file"))
+    assert not policy.is_transient(ValueError())
+    assert policy.is_transient(TimeoutError())
+    assert policy.is_transient(OSError(errno.EHOSTUNREACH, "No route"))
+    assert not policy.is_transient(OSError(errno.ENOSPC, "Disk full"))
+    assert not policy.is_transient(PermissionError(errno.EACCES, "Denied"))
+
+    for retry, window in [(1, 1.0), (2, 2.0), (3, 4.0), (10, 5.0)]:
+        delays = [policy.delay(retry) for _ in range(100)]
+        assert all(0 <= d <= window for d in delays)
+        assert max(delays) > window / 2
+
+
+def test_breaker():
+    """Test that a circuit opens, cools down, and closes."""
+    circuit = CircuitBreaker(threshold=2, cooldown=0.1)
+    circuit.failure("a.org")
+    circuit.check("a.org")
+    circuit.failure("a.org")
+    with pytest.raises(CircuitOpenError):
+        circuit.check("a.org")
+
+    circuit.check("b.org")
+    time.sleep(0.1)
+    circuit.check("a.org")
+    circuit.failure("a.org")
+    with pytest.raises(CircuitOpenError):
+        circuit.check("a.org")
+
+    time.sleep(0.1)
+    circuit.success("a.org")
+    circuit.failure("a.org")
+    circuit.check("a.org")
+
+
+def test_permanent(ftp_server):
+    """Test that permanent errors are not retried."""
+    parser = FTPParser(ftp_server.url + "data/missing", timeout=5)
+    with pytest.raises(error_perm):
+        parser.files
+
+    assert ftp_server.commands.count("CWD") == 1
+
+
+def test_local_error(ftp_server, tmp_path, monkeypatch):
+    """Test that local errors are not retried or blamed on the server."""
+
+    def full(self, final=False):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(_BufferedWriter, "flush", full)
+    parser = FTPParser(ftp_server.url + PROJ, timeout=5)
+    with pytest.raises(OSError, match="No space"):
+        parser.download("README.txt", tmp_path, silent=True)
+
+    assert ftp_server.commands.count("RETR") == 1
+    assert not breaker._failures
+
+
+def test_backoff(ftp_server, tmp_path, received):
+    """Test that transient errors are retried after a delay."""
+    ftp_server.failures["RETR"] = 2
+    policy = RetryPolicy(attempts=3, backoff=0.05)
+    parser = FTPParser(ftp_server.url + PROJ, timeout=5, retry=policy)
+    start = time.monotonic()
+    parser.download("README.txt", tmp_path, silent=True)
+    delays = [e.fields["delay"] for e in received if e.name == "reconnect"]
+    assert len(delays) == 2
+    assert time.monotonic() - start >= sum(delays)
+    assert all(0 <= d <= 0.1 for d in delays)
+
+    ftp_server.failures["RETR"] = 3
+    with pytest.raises(error_temp, match="Failed after 3"):
+        parser.download("README.txt", tmp_path, force_=True, silent=True)
+
+
+def test_resume(ftp_server, tmp_path, received):
+    """Test that a retried transfer does not download bytes again."""
+    ftp_server.drop_after = 100_000
+    parser = FTPParser(ftp_server.url + PROJ, timeout=5)
+    (out,) = parser.download("big.raw", tmp_path, silent=True)
+    assert (
+        out.read_bytes() == (ftp_server.root / PROJ / "big.raw").read_bytes()
+    )
+
+    transfers = [e.fields["n_bytes"] for e in received if e.name == "transfer"]
+    assert len(transfers) == 2
+    assert sum(transfers) == 300_000
+
+
+def test_circuit(ftp_server, tmp_path, monkeypatch, received):
+    """Test that a failing host is not contacted while its circuit is open."""
+    monkeypatch.setattr(breaker, "threshold", 3)
+    ftp_server.failures["RETR"] = 100
+    parser = FTPParser(ftp_server.url + PROJ, timeout=5)
+    with pytest.raises(CircuitOpenError):
+        parser.download("README.txt", tmp_path, silent=True)
+
+    assert ftp_server.commands.count("RETR") == 3
+    assert [e.name for e in received].count("circuit_open") == 1
+
+    # Other files fail immediately:
+    with pytest.raises(CircuitOpenError):
+        parser.download("small.mzML", tmp_path, silent=True)
+
+    assert ftp_server.commands.count("RETR") == 3
@@ -0,0 +1,85 @@
+"""Test stall detection and adaptive timeouts"""
+
+import time
+from ftplib import error_temp
+
+import pytest
+
+from ppx.ftp import FTPParser
+from ppx.retry import RetryPolicy
+from ppx.stall import StallDetector, StallError, Stats, stats
+from ppx.throttle import limits
+
+PROJ = "data/PXD000001"
+
+
+def test_detector():
+    """Test that a slow transfer is detected after the window."""
+    detector = StallDetector(min_rate=10_000, window=0.1)
+    for _ in range(10):
+        detector.update(10_000)
+        time.sleep(0.02)
+
+    detector = StallDetector(min_rate=10_000, window=0.1)
+    with pytest.raises(StallError):
+        for _ in range(10):
+            detector.update(100)
+            time.sleep(0.02)
+
+    assert detector.total < 1_000
+
+
+def test_stats():
+    """Test the smoothed statistics and the timeouts they produce."""
+    host_stats = Stats(min_timeout=1.0)
+    assert host_stats.timeout("a.org", 10.0) == 10.0
+    assert host_stats.get("a.org").rtt is None
+
+    for _ in range(20):
+        host_stats.observe_rtt("a.org", 0.01)
+        host_stats.observe_rtt("b.org", 1.0)
+
+    assert host_stats.get("a.org").rtt == pytest.approx(0.01)
+    assert host_stats.timeout("a.org", 10.0) == 1.0
+    assert 4.0 <= host_stats.timeout("b.org", 10.0) < 5.0
+    assert host_stats.timeout("b.org", 2.0) == 2.0
+
+    host_stats.observe_transfer("a.org", 10_000_000, 1.0)
+    assert host_stats.get("a.org").throughput == 10_000_000
+    assert host_stats.min_rate("a.org", 1_000) == 100_000
+    assert host_stats.min_rate("b.org", 1_000) == 1_000
+    limits.set_rate(1_000)
+    try:
+        assert host_stats.min_rate("a.org", 1_000) == 500
+    finally:
+        limits.clear()
+
+
+def test_stalled_transfer(ftp_server, tmp_path):
+    """Test that a trickling transfer is aborted and resumed."""
+    ftp_server.chunk_size = 100
+    ftp_server.throttle = 0.02
+    parser = FTPParser(
+        ftp_server.url + PROJ,
+        timeout=5,
+        retry=RetryPolicy(attempts=2, backoff=0),
+        stall_rate="100k",
+        stall_window=0.2,
+    )
+    with pytest.raises(error_temp, match="stalled"):
+        parser.download("big.raw", tmp_path, silent=True)
+
+    assert stats.get("127.0.0.1").stalls == 2
+    partial = (tmp_path / "big.raw").stat().st_size
+    assert 0 < partial < 300_000
+
+    # The data that was received is kept:
+    ftp_server.throttle = 0
+    ftp_server.chunk_size = 65536
+    received = ftp_server.commands.count("RETR")
+    parser.download("big.raw", tmp_path, silent=True)
+    assert ftp_server.commands.count("RETR") == received + 1
+    expected = (ftp_server.root / PROJ / "big.raw").read_bytes()
+    assert (tmp_path / "big.raw").read_bytes() == expected
+    assert stats.get("127.0.0.1").transfers >= 1
+    assert stats.get("127.0.0.1").rtt is not None
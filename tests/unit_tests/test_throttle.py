@@ -0,0 +1,81 @@
+"""Test the rate and connection limits"""
+
+import threading
+import time
+
+import pytest
+
+from ppx.ftp import FTPParser
+from ppx.throttle import Limits, TokenBucket, limits, parse_rate
+
+
+@pytest.fixture
+def no_limits():
+    """Remove the shared limits after a test."""
+    yield limits
+    limits.clear()
+
+
+def test_parse_rate():
+    """Test parsing rates with suffixes."""
+    assert parse_rate(None) is None
+    assert parse_rate(1_000) == 1_000
+    assert parse_rate("100") == 100
+    assert parse_rate("10k") == 10 * 2**10
+    assert parse_rate("1.5M") == 1.5 * 2**20
+    assert parse_rate("2 GiB/s") == 2 * 2**30
+    with pytest.raises(ValueError):
+        parse_rate("fast")
+
+
+def test_token_bucket():
+    """Test that consuming beyond the burst waits for tokens."""
+    bucket = TokenBucket(100_000, burst=10_000)
+    start = time.monotonic()
+    waits = [bucket.consume(10_000) for _ in range(4)]
+    assert waits[0] == 0
+    assert time.monotonic() - start == pytest.approx(0.3, abs=0.1)
+
+
+def test_connections():
+    """Test that concurrent transfers from a host are capped."""
+    caps = Limits()
+    caps.set_connections(2)
+    caps.set_connections(1, host="slow.org")
+    active = {"fast.org": 0, "slow.org": 0}
+    peak = dict(active)
+    lock = threading.Lock()
+
+    def transfer(host):
+        with caps.connection(host):
+            with lock:
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+
+            time.sleep(0.02)
+            with lock:
+                active[host] -= 1
+
+    threads = [
+        threading.Thread(target=transfer, args=(h,))
+        for h in ["fast.org", "slow.org"] * 4
+    ]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert peak == {"fast.org": 2, "slow.org": 1}
+
+
+def test_ftp_rate(ftp_server, tmp_path, no_limits):
+    """Test that FTP transfers respect the rate limit."""
+    parser = FTPParser(ftp_server.url + "data/PXD000001", blocksize=2**14)
+    no_limits.set_rate("1M", host="127.0.0.1")
+    start = time.monotonic()
+    for _ in range(5):
+        parser.download(["big.raw"], tmp_path, force_=True, silent=True)
+
+    # 1.5 MB at 1 MiB per second, after a 1 MiB burst:
+    assert 0.3 < time.monotonic() - start < 2
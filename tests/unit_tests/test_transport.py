@@ -0,0 +1,118 @@
+"""Test transferring files from FTP and HTTP mirrors"""
+
+import pytest
+
+from ppx import events
+from ppx.ftp import FTPParser
+from ppx.transport import Mirrors, mirrors_for
+
+PROJ = "data/PXD000001"
+
+
+@pytest.fixture
+def received():
+    """Collect the events emitted during a test."""
+    out = []
+    events.subscribe(out.append)
+    yield out
+    events.unsubscribe(out.append)
+
+
+def expected(ftp_server, fname):
+    """The content of a file on the server."""
+    return (ftp_server.root / PROJ / fname).read_bytes()
+
+
+def test_mirrors_for():
+    """Test finding the HTTPS mirror of an FTP address."""
+    url = "ftp://ftp.pride.ebi.ac.uk/pride/data/archive/2012/03/PXD000001"
+    mirrors = mirrors_for(url, "auto")
+    assert list(mirrors.throughput()) == [
+        url.replace("ftp://", "https://"),
+        url,
+    ]
+    assert mirrors.probe_size > 0
+    assert mirrors_for(url, "HTTPS").probe_size == 0
+    assert mirrors_for(url, "ftp") is None
+    assert mirrors_for("ftp://127.0.0.1:2121/data", "auto") is None
+    with pytest.raises(ValueError):
+        mirrors_for(url, "aspera")
+
+
+@pytest.mark.parametrize("slow", ["ftp", "http"])
+def test_fastest(ftp_server, file_server, tmp_path, received, slow):
+    """Test that files are transferred from the fastest endpoint."""
+    server = ftp_server if slow == "ftp" else file_server
+    server.chunk_size = 8192
+    server.throttle = 0.02
+    url = ftp_server.url + PROJ
+    mirrors = Mirrors(url, [file_server.url + PROJ], probe_size=2**16)
+    parser = FTPParser(url, timeout=5, mirrors=mirrors)
+    parser.download(["big.raw", "small.mzML"], tmp_path, silent=True)
+    for fname in ["big.raw", "small.mzML"]:
+        assert (tmp_path / fname).read_bytes() == expected(ftp_server, fname)
+
+    probes = [e.fields for e in received if e.name == "probe"]
+    assert len(probes) == 2
+    assert all(p["error"] is None for p in probes)
+
+    # One probe, plus each transfer from the fastest endpoint:
+    http_requests = 3 if slow == "ftp" else 1
+    assert len(file_server.requests) == http_requests
+    assert ftp_server.commands.count("RETR") == 4 - http_requests
+    throughput = mirrors.throughput()
+    assert (throughput[url] < throughput[file_server.url + PROJ]) == (
+        slow == "ftp"
+    )
+
+
+def test_probe_size(ftp_server, file_server, tmp_path, received):
+    """Test that small files are not used to benchmark the endpoints."""
+    url = ftp_server.url + PROJ
+    mirrors = Mirrors(url, [file_server.url + PROJ], probe_size=2**16)
+    parser = FTPParser(url, timeout=5, mirrors=mirrors)
+    parser.download(["README.txt", "small.mzML"], tmp_path, silent=True)
+    assert not [e for e in received if e.name == "probe"]
+    assert set(mirrors.throughput().values()) == {None}
+
+    parser.download("big.raw", tmp_path, silent=True)
+    probes = [e.fields["file"] for e in received if e.name == "probe"]
+    assert probes == ["big.raw", "big.raw"]
+    assert None not in mirrors.throughput().values()
+
+
+def test_failover(ftp_server, file_server, tmp_path, received):
+    """Test that a failed transfer resumes over another endpoint."""
+    file_server.drop_after = 100_000
+    url = ftp_server.url + PROJ
+    mirrors = Mirrors(url, [file_server.url + PROJ], probe_size=0)
+    parser = FTPParser(url, timeout=5, mirrors=mirrors)
+    parser.download(["big.raw", "small.mzML"], tmp_path, silent=True)
+    for fname in ["big.raw", "small.mzML"]:
+        assert (tmp_path / fname).read_bytes() == expected(ftp_server, fname)
+
+    # The FTP transfer continued after the bytes received over HTTP:
+    transfers = [e.fields["n_bytes"] for e in received if e.name == "transfer"]
+    assert sum(transfers[:2]) == 300_000
+    assert 0 < transfers[0] < 300_000
+    assert ["failover"] == [e.name for e in received if e.name == "failover"]
+
+    # The failed endpoint is not used for the next file:
+    assert len(file_server.requests) == 1
+    assert file_server.encodings == {"identity"}
+    assert ftp_server.commands.count("RETR") == 2
+
+
+def test_no_ranges(ftp_server, file_server, tmp_path):
+    """Test that a partial file is not resumed without range requests."""
+    file_server.ranges = False
+    partial = expected(ftp_server, "big.raw")[:1000]
+    (tmp_path / "big.raw").write_bytes(partial)
+    url = ftp_server.url + PROJ
+    mirrors = Mirrors(url, [file_server.url + PROJ], probe_size=0)
+    parser = FTPParser(url, timeout=5, mirrors=mirrors)
+    parser.download("big.raw", tmp_path, silent=True)
+    assert (tmp_path / "big.raw").read_bytes() == expected(
+        ftp_server, "big.raw"
+    )
+    assert file_server.requests == [(f"/{PROJ}/big.raw", "bytes=1000-")]
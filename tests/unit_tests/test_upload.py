@@ -0,0 +1,373 @@
+"""Test streaming uploads to cloud storage"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from cloudpathlib import CloudPath
+from cloudpathlib.local import LocalGSClient, LocalGSPath
+
+import ppx.upload
+from ppx.ftp import FTPParser
+from ppx.upload import CloudSink
+
+BUCKET = "s3://ppx-test-bucket/ppx"
+PART = 1_000
+
+
+@pytest.fixture
+def data():
+    """Some random bytes."""
+    return random.Random(1).randbytes(4_500)
+
+
+def write(sink, data, chunk=300):
+    """Write data to a sink in chunks."""
+    for idx in range(0, len(data), chunk):
+        sink.write(data[idx : idx + chunk])
+
+
+def test_sink(cloud_bucket, data):
+    """Test that a file is uploaded in parts."""
+    path = CloudPath(BUCKET) / "sub" / "test.raw"
+    with CloudSink(path, size=len(data), part_size=PART, workers=2) as sink:
+        write(sink, data)
+        assert sink.tell() == len(data)
+
+    assert path.read_bytes() == data
+    assert [p.name for p in path.parent.iterdir()] == ["test.raw"]
+
+
+def test_empty(cloud_bucket):
+    """Test that an empty file is created."""
+    path = CloudPath(BUCKET) / "empty.txt"
+    with CloudSink(path, size=0):
+        pass
+
+    assert path.read_bytes() == b""
+
+
+def test_resume(cloud_bucket, data):
+    """Test that an interrupted upload resumes after its last full part."""
+    path = CloudPath(BUCKET) / "test.raw"
+    with pytest.raises(RuntimeError):
+        with CloudSink(path, size=len(data), part_size=PART) as sink:
+            write(sink, data[:2_500])
+            raise RuntimeError("Interrupted")
+
+    assert not path.exists()
+    parts = path.with_name(".test.raw.parts")
+    assert sorted(p.name for p in parts.iterdir()) == ["00001", "00002"]
+    sink = CloudSink(path, size=len(data), part_size=PART)
+    assert sink.tell() == 2_000
+    write(sink, data[2_000:])
+    sink.close()
+    assert path.read_bytes() == data
+
+    # Restarting ignores previous parts:
+    sink = CloudSink(path, size=len(data), part_size=PART)
+    write(sink, data[:2_000])
+    sink._finish_parts()
+    sink = CloudSink(path, size=len(data), part_size=PART, restart=True)
+    assert sink.tell() == 0
+    sink.abort()
+
+    # Parts past the end of a smaller file are not resumed:
+    sink = CloudSink(path, size=len(data), part_size=PART)
+    write(sink, data[:3_000])
+    sink._finish_parts()
+    sink = CloudSink(path, size=1_500, part_size=PART)
+    assert sink.tell() == 0
+    write(sink, data[:1_500])
+    sink.close()
+    assert path.read_bytes() == data[:1_500]
+
+
+def test_size_check(cloud_bucket, data):
+    """Test that a short upload does not create the file."""
+    path = CloudPath(BUCKET) / "test.raw"
+    sink = CloudSink(path, size=len(data), part_size=PART)
+    write(sink, data[:1_500])
+    with pytest.raises(EOFError):
+        sink.close()
+
+    assert not path.exists()
+    assert CloudSink(path, size=len(data), part_size=PART).tell() == 1_000
+
+
+def test_ftp_to_cloud(cloud_bucket, ftp_server):
+    """Test that FTP downloads stream into cloud storage."""
+    proj = "data/PXD000001"
+    parser = FTPParser(ftp_server.url + proj, timeout=5, part_size=2**16)
+    dest = CloudPath(BUCKET)
+    files = ["big.raw", "sub/result.txt"]
+    out = parser.download(files, dest, silent=True)
+    for fname, out_file in zip(files, out):
+        expected = (ftp_server.root / proj / fname).read_bytes()
+        assert out_file.read_bytes() == expected
+
+    # Complete files are skipped:
+    retr = ftp_server.commands.count("RETR")
+    parser.download(files, dest, silent=True)
+    assert ftp_server.commands.count("RETR") == retr
+
+
+class StubGoogle:
+    """A stand-in for a google.cloud.storage client over local storage."""
+
+    def __init__(self):
+        """Initialize the StubGoogle"""
+        self.uploaded = []
+
+    def bucket(self, name):
+        return StubBucket(self, name)
+
+
+class StubBucket:
+    """A stand-in for a google.cloud.storage bucket."""
+
+    def __init__(self, client, name):
+        """Initialize the StubBucket"""
+        self.client = client
+        self.name = name
+
+    def blob(self, name):
+        return StubBlob(self, name)
+
+
+class StubBlob:
+    """A stand-in for a google.cloud.storage blob."""
+
+    def __init__(self, bucket, name):
+        """Initialize the StubBlob"""
+        self.bucket = bucket
+        self.name = name
+        path = LocalGSPath(f"gs://{bucket.name}/{name}")
+        self.local = path.client._cloud_path_to_local(path)
+
+    def upload_from_string(self, data):
+        self.bucket.client.uploaded.append(self.name)
+        self.local.parent.mkdir(parents=True, exist_ok=True)
+        self.local.write_bytes(data)
+
+    def compose(self, sources):
+        data = b"".join(s.local.read_bytes() for s in sources)
+        self.upload_from_string(data)
+
+
+def test_google(monkeypatch, data):
+    """Test that parts are uploaded and composed with the google client."""
+    path = LocalGSPath("gs://ppx-test-bucket/ppx/test.raw")
+    google = StubGoogle()
+    monkeypatch.setattr(path.client, "client", google, raising=False)
+    monkeypatch.setattr(ppx.upload, "_parts_for", ppx.upload._GSParts)
+    monkeypatch.setattr(ppx.upload._GSParts, "max_sources", 2)
+
+    # Writing through a CloudPath would stage the part in the file cache:
+    def write_bytes(self, data):
+        raise AssertionError(f"{self} was written through cloudpathlib")
+
+    monkeypatch.setattr(LocalGSPath, "write_bytes", write_bytes)
+    try:
+        with CloudSink(path, size=len(data), part_size=PART) as sink:
+            write(sink, data)
+    finally:
+        LocalGSClient.reset_default_storage_dir()
+
+    parts = [f"ppx/.test.raw.parts/{n:05d}" for n in range(1, 6)]
+    assert google.uploaded[:5] == parts
+    assert google.uploaded[5:] == ["ppx/test.raw"] * 4
+
+
+class StubPath:
+    """A stand-in for an S3Path or AzureBlobPath, backed by a stub client."""
+
+    def __init__(self, client):
+        """Initialize the StubPath"""
+        self.client = SimpleNamespace(client=client, service_client=client)
+        self.bucket = self.container = "ppx-test-bucket"
+        self.key = self.blob = "ppx/test.raw"
+
+    def stat(self):
+        """The size of the created file."""
+        return SimpleNamespace(st_size=len(self.client.client.objects[None]))
+
+
+class StubS3:
+    """A stand-in for a boto3 S3 client that keeps uploads in memory."""
+
+    def __init__(self):
+        """Initialize the StubS3"""
+        self.calls = []
+        self.uploads = {}
+        self.objects = {}
+
+    def create_multipart_upload(self, Bucket, Key):  # noqa: N803
+        self.calls.append("create_multipart_upload")
+        upload_id = f"upload-{len(self.calls)}"
+        self.uploads[upload_id] = {"Key": Key, "Parts": {}}
+        return {"UploadId": upload_id}
+
+    def list_multipart_uploads(self, Bucket, Prefix):  # noqa: N803
+        return {
+            "Uploads": [
+                {"Key": u["Key"], "UploadId": i, "Initiated": i}
+                for i, u in self.uploads.items()
+                if u["Key"].startswith(Prefix)
+            ]
+        }
+
+    def get_paginator(self, name):
+        assert name == "list_parts"
+        return self
+
+    def paginate(self, Bucket, Key, UploadId):  # noqa: N803
+        parts = self.uploads[UploadId]["Parts"]
+        yield {
+            "Parts": [
+                {"PartNumber": n, "Size": len(d), "ETag": f"etag-{n}"}
+                for n, d in sorted(parts.items())
+            ]
+        }
+
+    def upload_part(
+        self,
+        Bucket,  # noqa: N803
+        Key,  # noqa: N803
+        UploadId,  # noqa: N803
+        PartNumber,  # noqa: N803
+        Body,  # noqa: N803
+    ):
+        self.calls.append(("upload_part", PartNumber))
+        self.uploads[UploadId]["Parts"][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(
+        self,
+        Bucket,  # noqa: N803
+        Key,  # noqa: N803
+        UploadId,  # noqa: N803
+        MultipartUpload,  # noqa: N803
+    ):
+        self.calls.append("complete_multipart_upload")
+        parts = self.uploads.pop(UploadId)["Parts"]
+        assert [p["ETag"] for p in MultipartUpload["Parts"]] == [
+            f"etag-{n}" for n in sorted(parts)
+        ]
+        self.objects[None] = b"".join(d for _, d in sorted(parts.items()))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):  # noqa: N803
+        self.calls.append("abort_multipart_upload")
+        del self.uploads[UploadId]
+
+
+def test_s3(monkeypatch, data):
+    """Test a resumed S3 multipart upload."""
+    s3 = StubS3()
+    path = StubPath(s3)
+    monkeypatch.setattr(ppx.upload, "_parts_for", ppx.upload._S3Parts)
+    with pytest.raises(RuntimeError):
+        with CloudSink(path, size=len(data), part_size=PART) as sink:
+            write(sink, data[:2_500])
+            raise RuntimeError("Interrupted")
+
+    assert s3.calls[0] == "create_multipart_upload"
+    assert sorted(s3.calls[1:]) == [("upload_part", 1), ("upload_part", 2)]
+    assert not s3.objects
+
+    s3.calls.clear()
+    with CloudSink(path, size=len(data), part_size=PART) as sink:
+        assert sink.tell() == 2_000
+        write(sink, data[2_000:])
+
+    assert sorted(s3.calls[:-1], key=str) == [
+        ("upload_part", 3),
+        ("upload_part", 4),
+        ("upload_part", 5),
+    ]
+    assert s3.calls[-1] == "complete_multipart_upload"
+    assert s3.objects[None] == data
+    assert not s3.uploads
+
+    # Restarting aborts the unfinished upload:
+    sink = CloudSink(path, size=len(data), part_size=PART)
+    write(sink, data[:2_000])
+    sink._finish_parts()
+    s3.calls.clear()
+    sink = CloudSink(path, size=len(data), part_size=PART, restart=True)
+    assert sink.tell() == 0
+    assert s3.calls == ["abort_multipart_upload"]
+
+
+class StubAzure:
+    """A stand-in for an Azure service and blob client."""
+
+    def __init__(self):
+        """Initialize the StubAzure"""
+        self.calls = []
+        self.blocks = {}
+        self.objects = {}
+
+    def get_blob_client(self, container, blob):
+        return self
+
+    def get_block_list(self, block_list_type):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        assert block_list_type == "uncommitted"
+        if None not in self.objects and not self.blocks:
+            raise ResourceNotFoundError("The blob does not exist.")
+
+        uncommitted = [
+            SimpleNamespace(id=i, size=len(d))
+            for i, d in sorted(self.blocks.items())
+        ]
+        return [], uncommitted
+
+    def stage_block(self, block_id, data):
+        self.calls.append(("stage_block", block_id))
+        self.blocks[block_id] = data
+
+    def commit_block_list(self, blocks):
+        self.calls.append("commit_block_list")
+        data = b"".join(self.blocks[b.id] for b in blocks)
+        self.objects[None] = data
+        self.blocks.clear()
+
+
+def test_azure(monkeypatch, data):
+    """Test a resumed upload of Azure blocks."""
+    pytest.importorskip("azure.storage.blob")
+    azure = StubAzure()
+    path = StubPath(azure)
+    monkeypatch.setattr(ppx.upload, "_parts_for", ppx.upload._AzureParts)
+    with pytest.raises(RuntimeError):
+        with CloudSink(path, size=len(data), part_size=PART) as sink:
+            write(sink, data[:2_500])
+            raise RuntimeError("Interrupted")
+
+    assert sorted(azure.calls) == [
+        ("stage_block", "000001"),
+        ("stage_block", "000002"),
+    ]
+
+    azure.calls.clear()
+    with CloudSink(path, size=len(data), part_size=PART) as sink:
+        assert sink.tell() == 2_000
+        write(sink, data[2_000:])
+
+    assert sorted(azure.calls[:-1]) == [
+        ("stage_block", "000003"),
+        ("stage_block", "000004"),
+        ("stage_block", "000005"),
+    ]
+    assert azure.calls[-1] == "commit_block_list"
+    assert azure.objects[None] == data
+
+    # Restarting ignores the uncommitted blocks:
+    sink = CloudSink(path, size=len(data), part_size=PART)
+    write(sink, data[:2_000])
+    sink._finish_parts()
+    sink = CloudSink(path, size=len(data), part_size=PART, restart=True)
+    assert sink.tell() == 0
+    sink.abort()